@@ -0,0 +1,140 @@
+"""
+Alert Index
+Active price alerts grouped by ticker, with Above/Below thresholds kept sorted.
+A price update finds every crossed alert with one bisect per direction instead of
+scanning every row, and a whole quote snapshot can be evaluated in one call.
+"""
+
+import bisect
+
+
+def _price_of(quote):
+    """Accepts a bare price or a quote dict ({'price': ...}) as returned by fetch_live_prices."""
+    if isinstance(quote, dict):
+        quote = quote.get('price')
+    try:
+        price = float(quote)
+    except (TypeError, ValueError):
+        return None
+    return price if price > 0 else None
+
+
+class AlertIndex:
+    def __init__(self):
+        # ticker -> {'Above': ([thresholds], [keys]), 'Below': ([thresholds], [keys])}
+        self._books = {}
+        self._entries = {}  # key -> (ticker, direction, threshold)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def tickers(self):
+        return sorted(self._books)
+
+    def add(self, key, ticker, target, direction):
+        """Indexes one alert. `key` identifies it to the caller (e.g. its sheet row)."""
+        if direction not in ('Above', 'Below'):
+            raise ValueError(f"Unknown direction: {direction}")
+        if key in self._entries:
+            self.remove(key)
+        target = float(target)
+        book = self._books.setdefault(ticker, {'Above': ([], []), 'Below': ([], [])})
+        thresholds, keys = book[direction]
+        pos = bisect.bisect_right(thresholds, target)
+        thresholds.insert(pos, target)
+        keys.insert(pos, key)
+        self._entries[key] = (ticker, direction, target)
+
+    def remove(self, key):
+        """Drops an alert (e.g. once it has fired). Unknown keys are ignored."""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        ticker, direction, target = entry
+        thresholds, keys = self._books[ticker][direction]
+        pos = bisect.bisect_left(thresholds, target)
+        while keys[pos] != key:
+            pos += 1
+        del thresholds[pos]
+        del keys[pos]
+        if not any(self._books[ticker][d][0] for d in ('Above', 'Below')):
+            del self._books[ticker]
+
+    def drop_tickers(self, tickers):
+        """Removes every alert on the given tickers (e.g. stocks while the exchange is closed)."""
+        tickers = set(tickers)
+        for key in [k for k, (t, _, _) in self._entries.items() if t in tickers]:
+            self.remove(key)
+
+    def crossed(self, ticker, price):
+        """Keys of the alerts on `ticker` that `price` triggers (Above: price >= target, Below: price <= target)."""
+        book = self._books.get(ticker)
+        if book is None:
+            return []
+        above_thresholds, above_keys = book['Above']
+        below_thresholds, below_keys = book['Below']
+        hits = above_keys[:bisect.bisect_right(above_thresholds, price)]
+        return hits + below_keys[bisect.bisect_left(below_thresholds, price):]
+
+    def evaluate(self, quotes):
+        """
+        Batch check against a quote snapshot ({ticker: price or quote dict}).
+        Returns [(key, ticker, price)] ordered by key; tickers without a usable price are skipped.
+        """
+        fired = []
+        for ticker in self._books:
+            price = _price_of(quotes.get(ticker))
+            if price is None:
+                continue
+            fired.extend((key, ticker, price) for key in self.crossed(ticker, price))
+        fired.sort(key=lambda hit: hit[0])
+        return fired
+
+    def nearest_gap(self, quotes):
+        """
+        Smallest relative distance |target - price| / price from any quoted price to a
+        threshold it has not crossed yet (None if nothing is pending).
+        """
+        best = None
+        for ticker, book in self._books.items():
+            price = _price_of(quotes.get(ticker))
+            if price is None:
+                continue
+            above_thresholds = book['Above'][0]
+            below_thresholds = book['Below'][0]
+            pos = bisect.bisect_right(above_thresholds, price)
+            if pos < len(above_thresholds):
+                gap = (above_thresholds[pos] - price) / price
+                best = gap if best is None else min(best, gap)
+            pos = bisect.bisect_left(below_thresholds, price)
+            if pos > 0:
+                gap = (price - below_thresholds[pos - 1]) / price
+                best = gap if best is None else min(best, gap)
+        return best
+
+    @classmethod
+    def from_records(cls, records, ticker_col='Ticker', target_col='Target Price',
+                     direction_col='Direction', status_col='Status', inactive=('sent',)):
+        """
+        Builds the index from sheet records (worksheet.get_all_records()).
+        Keys are the record positions; rows whose status is in `inactive` or that have
+        no ticker / target / valid direction are left out.
+        """
+        index = cls()
+        inactive = {s.lower() for s in inactive}
+        for i, rec in enumerate(records):
+            if str(rec.get(status_col, '')).strip().lower() in inactive:
+                continue
+            ticker = str(rec.get(ticker_col, '')).strip().upper()
+            direction = str(rec.get(direction_col, '')).strip().capitalize()
+            try:
+                target = float(rec.get(target_col))
+            except (TypeError, ValueError):
+                continue
+            if not ticker or not target or direction not in ('Above', 'Below'):
+                continue
+            index.add(i, ticker, target, direction)
+        return index
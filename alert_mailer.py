@@ -0,0 +1,179 @@
+"""
+Alert Mailer
+Sends a cycle's triggered alerts over ONE authenticated SMTP session instead of a
+TLS handshake + login per alert. In digest mode every subscriber gets a single
+message listing all of their alerts for the cycle.
+
+ALERT_SMTP_HOST / ALERT_SMTP_PORT / ALERT_SMTP_SSL override the Gmail defaults
+(e.g. to point at a local SMTP server for testing).
+"""
+
+import os
+import smtplib
+import ssl
+from datetime import datetime
+from email.message import EmailMessage
+
+DEFAULT_HOST = os.getenv('ALERT_SMTP_HOST', 'smtp.gmail.com')
+DEFAULT_PORT = int(os.getenv('ALERT_SMTP_PORT', 465))
+DEFAULT_SSL = os.getenv('ALERT_SMTP_SSL', '1') not in ('0', 'false', 'False')
+
+
+def _clean_recipients(subscribers):
+    """Remove duplicates and cleanup, keeping first-seen order."""
+    if isinstance(subscribers, str):
+        subscribers = subscribers.split(',')
+    return list(dict.fromkeys(s.strip() for s in subscribers if '@' in str(s)))
+
+
+def _alert_line(alert):
+    return f"{alert['ticker']}: {alert['direction']} ${alert['target']:.2f} | Current Price: ${alert['price']:.2f}"
+
+
+class AlertDispatcher:
+    def __init__(self, sender, password, host=DEFAULT_HOST, port=DEFAULT_PORT, use_ssl=DEFAULT_SSL,
+                 digest=True, smtp_factory=None):
+        """
+        digest: True -> one message per recipient with all of their alerts,
+                False -> one Bcc message per alert (the original format)
+        smtp_factory: callable(host, port) -> smtplib.SMTP-like object (defaults to SMTP_SSL / SMTP)
+        """
+        self.sender = sender
+        self.password = password
+        self.host = host
+        self.port = port
+        self.use_ssl = use_ssl
+        self.digest = digest
+        self._factory = smtp_factory
+        self._server = None
+        self._pending = []
+        self.connections = 0
+        self.messages_sent = 0
+        self.send_errors = 0
+
+    @classmethod
+    def from_creds(cls, creds, **kwargs):
+        """Accepts {'user' or 'email': ..., 'password': ...}; returns None if incomplete."""
+        creds = creds or {}
+        sender = creds.get('user') or creds.get('email')
+        password = creds.get('password')
+        if not sender or not password:
+            return None
+        return cls(sender, password, **kwargs)
+
+    # --- Session ---
+    def _connect(self):
+        if self._factory:
+            server = self._factory(self.host, self.port)
+        elif self.use_ssl:
+            server = smtplib.SMTP_SSL(self.host, self.port, context=ssl.create_default_context())
+        else:
+            server = smtplib.SMTP(self.host, self.port)
+        server.login(self.sender, self.password)
+        self.connections += 1
+        return server
+
+    def _deliver(self, msg):
+        """Sends on the open session, reconnecting once if the server dropped it."""
+        for attempt in range(2):
+            try:
+                if self._server is None:
+                    self._server = self._connect()
+                self._server.send_message(msg)
+                self.messages_sent += 1
+                return
+            except smtplib.SMTPServerDisconnected:
+                self._server = None
+                if attempt == 1:
+                    raise
+
+    def close(self):
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except Exception:
+                pass
+            self._server = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --- Messages ---
+    def add(self, key, ticker, price, direction, subscribers, target=None):
+        """Queues one triggered alert; `key` is returned by send() to report delivery."""
+        recipients = _clean_recipients(subscribers)
+        if not recipients:
+            return False
+        self._pending.append({
+            'key': key, 'ticker': ticker, 'price': float(price), 'direction': direction,
+            'target': float(price if target is None else target), 'recipients': recipients,
+        })
+        return True
+
+    def _alert_message(self, alert):
+        ticker, price, direction = alert['ticker'], alert['price'], alert['direction']
+        msg = EmailMessage()
+        msg.set_content(f"🚀 ALERT TRIGGERED!\n\nTicker: {ticker}\nCondition: {direction} ${alert['target']:.2f}\n\nCurrent Price: ${price:.2f}\n\nHappy Trading!")
+        msg['Subject'] = f"🔔 Alert: {ticker} hit ${price:.2f}"
+        msg['From'] = self.sender
+        msg['Bcc'] = ", ".join(alert['recipients'])  # Use Bcc to hide other subscribers
+        return msg
+
+    def _digest_message(self, recipient, alerts):
+        if len(alerts) == 1:
+            msg = self._alert_message(alerts[0])
+            del msg['Bcc']
+            msg['To'] = recipient
+            return msg
+        tickers = ", ".join(dict.fromkeys(a['ticker'] for a in alerts))
+        lines = "\n".join(_alert_line(a) for a in alerts)
+        msg = EmailMessage()
+        msg.set_content(f"🚀 {len(alerts)} ALERTS TRIGGERED!\n\n{lines}\n\n"
+                        f"Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\nHappy Trading!")
+        msg['Subject'] = f"🔔 {len(alerts)} Alerts: {tickers}"
+        msg['From'] = self.sender
+        msg['To'] = recipient
+        return msg
+
+    def send(self):
+        """
+        Sends everything queued over one session and clears the queue.
+        Returns {key: delivered}; an alert counts as delivered once any of its recipients got it.
+        """
+        pending, self._pending = self._pending, []
+        delivered = {a['key']: False for a in pending}
+        if not pending:
+            return delivered
+
+        if self.digest:
+            by_recipient = {}
+            for alert in pending:
+                for recipient in alert['recipients']:
+                    by_recipient.setdefault(recipient, []).append(alert)
+            batches = [(self._digest_message(r, alerts), alerts) for r, alerts in by_recipient.items()]
+        else:
+            batches = [(self._alert_message(a), [a]) for a in pending]
+
+        try:
+            for msg, alerts in batches:
+                try:
+                    self._deliver(msg)
+                except (smtplib.SMTPRecipientsRefused, smtplib.SMTPDataError) as e:
+                    self.send_errors += 1
+                    print(f"Failed to send email: {e}")
+                    continue
+                for alert in alerts:
+                    delivered[alert['key']] = True
+        except Exception as e:
+            # Login / connection failure: nothing more can go out this cycle
+            self.send_errors += 1
+            print(f"Failed to send email: {e}")
+        finally:
+            self.close()
+        return delivered
+
+    def stats(self):
+        return {'connections': self.connections, 'messages_sent': self.messages_sent, 'send_errors': self.send_errors}
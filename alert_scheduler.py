@@ -0,0 +1,250 @@
+"""
+Alert Scheduler
+Exactly one alert loop per deployment. Within a process the scheduler is a
+singleton, so every Streamlit session shares one thread. Across processes the
+loop only runs while holding an exclusive file lock; other processes stay on
+standby and take over if the leader goes away. How long to wait between cycles
+comes from a polling policy (market hours, 24/7 crypto alerts and distance to
+the nearest alert).
+"""
+
+import math
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, process-wide only
+    fcntl = None
+
+from market_calendar import get_market_calendar, is_crypto
+from metadata_store import DEFAULT_CACHE_DIR
+
+DEFAULT_INTERVAL_SECONDS = float(os.getenv('ALERT_INTERVAL_SECONDS', 30 * 60))
+DEFAULT_MIN_INTERVAL_SECONDS = float(os.getenv('ALERT_MIN_INTERVAL_SECONDS', 60))
+DEFAULT_RETRY_SECONDS = 5 * 60
+
+
+def _fmt(ts):
+    return datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S") if ts else None
+
+
+class AdaptivePollingPolicy:
+    """
+    Picks the delay until the next alert cycle from market hours, the pending tickers
+    and how close the nearest pending alert is (process_alerts' 'tickers', 'nearest_gap'
+    and 'nearest_crypto_gap', gaps as a fraction of price):
+    - gap <= near: poll every min_interval; gap >= far (or no alerts): every max_interval;
+      in between the interval scales geometrically
+    - market closed: sleep until the next session opens, unless a crypto alert is pending:
+      crypto trades 24/7, so keep polling on its nearest gap (never past the next open)
+    - never sleep past the session close, so the closing price is always checked
+    """
+
+    def __init__(self, calendar=None, min_interval=DEFAULT_MIN_INTERVAL_SECONDS, max_interval=DEFAULT_INTERVAL_SECONDS,
+                 near=0.005, far=0.05, close_grace=timedelta(minutes=5)):
+        self.calendar = calendar or get_market_calendar()
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.near = near
+        self.far = far
+        self.close_grace = close_grace
+        self._crypto_pending = False  # from the last successful cycle, for retry_delay
+
+    def _open_interval(self, gap):
+        if gap is None or gap >= self.far:
+            return self.max_interval
+        if gap <= self.near:
+            return self.min_interval
+        frac = math.log(gap / self.near) / math.log(self.far / self.near)
+        return self.min_interval * (self.max_interval / self.min_interval) ** frac
+
+    def _until_open(self, now):
+        return (self.calendar.next_open(now) - now).total_seconds()
+
+    def next_delay(self, result, now=None):
+        now = now or datetime.now(self.calendar.tz)
+        result = result if isinstance(result, dict) else {}
+        self._crypto_pending = any(is_crypto(t) for t in result.get('tickers') or [])
+        if not self.calendar.is_open(now, grace=self.close_grace):
+            delay = self._until_open(now)
+            if self._crypto_pending:
+                delay = min(delay, self._open_interval(result.get('nearest_crypto_gap')))
+            return max(self.min_interval, delay)
+        delay = self._open_interval(result.get('nearest_gap'))
+        until_close = (self.calendar.next_close(now) - now).total_seconds()
+        if until_close > 0:
+            delay = min(delay, until_close)
+        return max(self.min_interval, delay)
+
+    def retry_delay(self, retry_seconds, now=None):
+        """After a failed cycle: retry_seconds, but while closed (and no crypto alert pending) not before the open."""
+        now = now or datetime.now(self.calendar.tz)
+        if self._crypto_pending or self.calendar.is_open(now, grace=self.close_grace):
+            return retry_seconds
+        return max(retry_seconds, self._until_open(now))
+
+
+class AlertScheduler:
+    def __init__(self, job, interval_seconds=DEFAULT_INTERVAL_SECONDS, retry_seconds=DEFAULT_RETRY_SECONDS,
+                 lock_path=None, policy=None):
+        """
+        job: callable() run once per cycle (its return value is kept as last_result)
+        retry_seconds: delay before the next attempt when the job raises
+        policy: optional object with next_delay(result) -> seconds (and optionally
+                retry_delay(retry_seconds) -> seconds); defaults to a fixed interval
+        """
+        self.job = job
+        self.policy = policy
+        self.interval_seconds = interval_seconds
+        self.retry_seconds = retry_seconds
+        self.lock_path = lock_path or os.path.join(DEFAULT_CACHE_DIR, 'alert_scheduler.lock')
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock_file = None
+        self.state = 'idle'
+        self.runs = 0
+        self.errors = 0
+        self.last_run = None
+        self.last_duration = None
+        self.last_result = None
+        self.last_error = None
+        self.next_run = None
+
+    # --- Cross-process leadership ---
+    def _acquire_leadership(self):
+        if self._lock_file is not None:
+            return True
+        if fcntl is None:
+            return True
+        os.makedirs(os.path.dirname(self.lock_path), exist_ok=True)
+        f = open(self.lock_path, 'a+')
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            return False
+        f.seek(0)
+        f.truncate()
+        f.write(str(os.getpid()))
+        f.flush()
+        self._lock_file = f
+        return True
+
+    def _release_leadership(self):
+        if self._lock_file is not None:
+            try:
+                fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+            finally:
+                self._lock_file.close()
+                self._lock_file = None
+
+    # --- Loop ---
+    def _run_once(self):
+        started = time.time()
+        with self._lock:
+            self.state = 'running'
+        try:
+            result = self.job()
+            error = None
+        except Exception as e:
+            result, error = None, e
+            print(f"Alert cycle failed: {e}")
+        finished = time.time()
+        with self._lock:
+            self.runs += 1
+            self.last_run = started
+            self.last_duration = finished - started
+            self.last_result = result
+            self.last_error = str(error) if error is not None else None
+            if error is not None:
+                self.errors += 1
+                delay = self.retry_seconds
+                if hasattr(self.policy, 'retry_delay'):
+                    delay = self.policy.retry_delay(self.retry_seconds)
+            elif self.policy is not None:
+                delay = self.policy.next_delay(result)
+            else:
+                delay = self.interval_seconds
+            self.next_run = finished + delay
+
+    def _loop(self):
+        try:
+            while not self._stop.is_set():
+                if self._acquire_leadership():
+                    self._run_once()
+                    with self._lock:
+                        self.state = 'waiting'
+                else:
+                    # Another process owns the loop; check again next interval
+                    with self._lock:
+                        self.state = 'standby'
+                        self.next_run = time.time() + self.interval_seconds
+                delay = max(0.0, self.next_run - time.time())
+                self._wake.wait(delay)
+                self._wake.clear()
+        finally:
+            self._release_leadership()
+            with self._lock:
+                self.state = 'stopped'
+                self.next_run = None
+
+    def start(self):
+        """Starts the loop unless it is already running in this process. Returns True if started."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return False
+            self._stop.clear()
+            self.state = 'starting'
+            self._thread = threading.Thread(target=self._loop, name='alert-scheduler', daemon=True)
+            self._thread.start()
+            return True
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def run_now(self):
+        """Wakes the loop so the next cycle runs immediately (leader only)."""
+        self._wake.set()
+
+    def status(self):
+        with self._lock:
+            return {
+                'state': self.state,
+                'leader': self._lock_file is not None or (fcntl is None and self.runs > 0),
+                'pid': os.getpid(),
+                'runs': self.runs,
+                'errors': self.errors,
+                'last_run': _fmt(self.last_run),
+                'last_duration_s': round(self.last_duration, 3) if self.last_duration is not None else None,
+                'last_result': self.last_result,
+                'last_error': self.last_error,
+                'next_run': _fmt(self.next_run),
+                'next_run_in_s': round(max(0.0, self.next_run - time.time())) if self.next_run else None,
+            }
+
+
+# --- Process-wide scheduler (shared by every session) ---
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_alert_scheduler(job=None, policy=None):
+    """
+    Returns the process's scheduler, creating it with `job` on first call (later jobs are ignored).
+    Uses the market-hours AdaptivePollingPolicy unless another policy is given.
+    """
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            if job is None:
+                return None
+            _scheduler = AlertScheduler(job, policy=policy or AdaptivePollingPolicy())
+        return _scheduler
@@ -5,17 +5,29 @@ Checks price conditions and sends email notifications via Gmail SMTP.
 
 import gspread
 from oauth2client.service_account import ServiceAccountCredentials
-import yfinance as yf
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 import json
 import os
-from datetime import datetime
+import time
+from datetime import datetime, timedelta
+
+from alert_index import AlertIndex
+from alert_mailer import AlertDispatcher
+from alert_scheduler import AdaptivePollingPolicy
+from fake_sheets import fake_sheets_enabled, get_fake_client
+from market_calendar import get_market_calendar, is_crypto
+from price_provider import get_price_provider
+from sheets_retry import call_with_backoff
+
+# Keep checking for a few minutes after the bell so closing prices are evaluated
+CLOSE_GRACE = timedelta(minutes=15)
 
 
 def get_sheets_client():
     """Initialize Google Sheets client from environment credentials."""
+    if fake_sheets_enabled():
+        print("Using in-memory Sheets stand-in (FAKE_SHEETS=1)")
+        return get_fake_client()
+    
     try:
         credentials_json = os.getenv('GOOGLE_CREDENTIALS')
         if not credentials_json:
@@ -40,94 +52,71 @@ def get_sheets_client():
         return None
 
 
-def fetch_current_price(ticker):
-    """Fetch current price for a ticker using yfinance."""
+def fetch_current_prices(tickers):
+    """Fetch current prices for all tickers in one batch via the configured price provider."""
     try:
-        stock = yf.Ticker(ticker)
-        info = stock.info
-        
-        current_price = info.get('currentPrice') or info.get('regularMarketPrice')
-        
-        if current_price is None:
-            hist = stock.history(period='1d')
-            if len(hist) > 0:
-                current_price = hist['Close'].iloc[-1]
-        
-        return current_price
+        quotes = get_price_provider().get_latest_quotes(tickers)
     except Exception as e:
-        print(f"ERROR fetching price for {ticker}: {e}")
-        return None
-
-
-def send_email_alert(ticker, current_price, target_price, condition):
-    """Send email notification via Gmail SMTP."""
-    try:
-        # Email configuration from environment
-        sender_email = os.getenv('GMAIL_SENDER')
-        sender_password = os.getenv('GMAIL_APP_PASSWORD')
-        recipient_email = os.getenv('ALERT_EMAIL')
-        
-        if not all([sender_email, sender_password, recipient_email]):
-            print("ERROR: Email credentials not fully configured")
-            return False
-        
-        # Create message
-        message = MIMEMultipart()
-        message['From'] = sender_email
-        message['To'] = recipient_email
-        message['Subject'] = f"🔔 Price Alert: {ticker} ${current_price:.2f}"
-        
-        # Email body
-        body = f"""
-Portfolio Price Alert Triggered!
-
-Ticker: {ticker}
-Current Price: ${current_price:.2f}
-Target Price: ${target_price:.2f}
-Condition: {condition}
-
-The price is now {condition.lower()} your target.
-
-Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-
----
-Pro Portfolio Tracker
-        """
-        
-        message.attach(MIMEText(body, 'plain'))
-        
-        # Send email via Gmail SMTP
-        with smtplib.SMTP('smtp.gmail.com', 587) as server:
-            server.starttls()
-            server.login(sender_email, sender_password)
-            server.send_message(message)
-        
-        print(f"✅ Email sent for {ticker}")
+        print(f"ERROR fetching prices: {e}")
+        return {}
+    prices = {}
+    for ticker, quote in quotes.items():
+        current_price = (quote or {}).get('price', 0.0)
+        if current_price > 0:
+            prices[ticker] = current_price
+    return prices
+
+
+def send_email_alerts(triggered):
+    """
+    Send all triggered alerts over one Gmail SMTP session, merged into a single digest.
+    triggered: list of (row_index, ticker, current_price, target_price, condition)
+    Returns the row indexes whose alert was delivered.
+    """
+    # Email configuration from environment
+    sender_email = os.getenv('GMAIL_SENDER')
+    sender_password = os.getenv('GMAIL_APP_PASSWORD')
+    recipient_email = os.getenv('ALERT_EMAIL')
+    
+    if not all([sender_email, sender_password, recipient_email]):
+        print("ERROR: Email credentials not fully configured")
+        return []
+    
+    dispatcher = AlertDispatcher(sender_email, sender_password, digest=True)
+    for row_index, ticker, current_price, target_price, condition in triggered:
+        dispatcher.add(row_index, ticker, current_price, condition, [recipient_email], target=target_price)
+    delivered = [row_index for row_index, sent in dispatcher.send().items() if sent]
+    if delivered:
+        print(f"✅ Email sent for {len(delivered)} alert(s)")
+    return delivered
+
+
+def update_alert_statuses(worksheet, row_indexes):
+    """Set Email_Sent to True for all given rows in one batched write (retried on rate limits)."""
+    if not row_indexes:
         return True
-        
-    except Exception as e:
-        print(f"ERROR sending email: {e}")
-        return False
-
-
-def update_alert_status(worksheet, row_index):
-    """Update Email_Sent status to True in the sheet."""
     try:
         # Column D is Email_Sent (index 4)
-        worksheet.update_cell(row_index, 4, 'True')
-        print(f"✅ Updated alert status for row {row_index}")
+        updates = [{'range': f"D{row_index}", 'values': [['True']]} for row_index in row_indexes]
+        call_with_backoff(worksheet.batch_update, updates)
+        print(f"✅ Updated alert status for {len(row_indexes)} row(s)")
         return True
     except Exception as e:
-        print(f"ERROR updating alert status: {e}")
+        print(f"ERROR updating alert statuses: {e}")
         return False
 
 
-def check_alerts():
-    """Main function to check all active alerts."""
+def check_alerts(client=None, crypto_only=False):
+    """
+    Check all active alerts once (only those on 24/7 crypto tickers if crypto_only,
+    e.g. while the NYSE is closed).
+    Returns {'nearest_gap', 'nearest_crypto_gap', 'tickers'} (distance of the closest pending
+    alert, as a fraction of price, and the tickers still pending) or None.
+    """
     print(f"🔍 Starting alert check at {datetime.now()}")
     
     # Get Google Sheets client
-    client = get_sheets_client()
+    client = client or get_sheets_client()
     if not client:
         print("❌ Failed to initialize Google Sheets client")
         return
@@ -149,54 +138,84 @@ def check_alerts():
         
         print(f"📋 Found {len(alerts)} total alerts")
         
-        # Process each alert
-        alerts_triggered = 0
+        # Index pending alerts by ticker (sorted thresholds) and price them in one batch
+        index = AlertIndex.from_records(
+            alerts, target_col='Target_Price', direction_col='Condition',
+            status_col='Email_Sent', inactive=('true',)
+        )
+        skipped = sum(1 for a in alerts if str(a.get('Email_Sent')).strip().lower() != 'true') - len(index)
+        if skipped:
+            print(f"⚠️ Skipped {skipped} invalid alert(s)")
+        if crypto_only:
+            index.drop_tickers([t for t in index.tickers() if not is_crypto(t)])
+        if not len(index):
+            print("ℹ️ No pending crypto alerts" if crypto_only else "ℹ️ No pending alerts")
+            return
         
-        for idx, alert in enumerate(alerts, start=2):  # Start at 2 (row 1 is header)
-            # Skip if already sent
-            if alert.get('Email_Sent') == 'True':
-                continue
-            
-            ticker = alert.get('Ticker', '').strip()
+        print(f"Checking {len(index)} pending alert(s) on {len(index.tickers())} ticker(s)")
+        prices = fetch_current_prices(index.tickers())
+        missing = [t for t in index.tickers() if t not in prices]
+        if missing:
+            print(f"⚠️ Could not fetch price for {', '.join(missing)}")
+        
+        triggered = []
+        
+        for i, ticker, current_price in index.evaluate(prices):
+            alert = alerts[i]
+            idx = i + 2  # Row 1 is header
             target_price = float(alert.get('Target_Price', 0))
             condition = alert.get('Condition', '').strip()
+            print(f"  🔔 ALERT! {ticker} ${current_price:.2f} is {condition.lower()} target ${target_price}")
             
-            if not ticker or not target_price:
-                print(f"⚠️ Skipping invalid alert in row {idx}")
-                continue
-            
-            print(f"Checking {ticker}: Target ${target_price} ({condition})")
-            
-            # Fetch current price
-            current_price = fetch_current_price(ticker)
-            
-            if current_price is None:
-                print(f"⚠️ Could not fetch price for {ticker}")
-                continue
-            
-            print(f"  Current price: ${current_price:.2f}")
-            
-            # Check condition
-            alert_triggered = False
-            
-            if condition == 'Above' and current_price >= target_price:
-                alert_triggered = True
-                print(f"  🔔 ALERT! Price is above target")
-            elif condition == 'Below' and current_price <= target_price:
-                alert_triggered = True
-                print(f"  🔔 ALERT! Price is below target")
-            
-            # Send email and update status if triggered
-            if alert_triggered:
-                if send_email_alert(ticker, current_price, target_price, condition):
-                    update_alert_status(worksheet, idx)
-                    alerts_triggered += 1
+            triggered.append((idx, ticker, current_price, target_price, condition))
         
-        print(f"\n✅ Alert check complete. {alerts_triggered} alert(s) triggered.")
+        # Send emails and update status for everything triggered this run
+        sent_rows = send_email_alerts(triggered) if triggered else []
+        update_alert_statuses(worksheet, sent_rows)
+        print(f"\n✅ Alert check complete. {len(sent_rows)} alert(s) triggered.")
+        
+        for row_index in sent_rows:
+            index.remove(row_index - 2)
+        return {
+            'nearest_gap': index.nearest_gap(prices),
+            'nearest_crypto_gap': index.nearest_gap({t: p for t, p in prices.items() if is_crypto(t)}),
+            'tickers': index.tickers(),
+        }
         
     except Exception as e:
         print(f"❌ ERROR in check_alerts: {e}")
 
 
+def main():
+    """
+    Check once and keep re-checking within ALERT_WATCH_SECONDS while an alert is close
+    to its target. While the market is closed (holidays and early closes included) only
+    crypto alerts are checked, since they trade 24/7. FORCE_RUN=1 bypasses the
+    market-hours gate.
+    """
+    calendar = get_market_calendar()
+    force = os.getenv('FORCE_RUN', '').lower() in ('1', 'true')
+    if not force and not calendar.is_open(grace=CLOSE_GRACE):
+        print(f"💤 Market closed. Next session opens {calendar.next_open():%Y-%m-%d %H:%M %Z}; "
+              f"checking crypto alerts only.")
+    
+    client = get_sheets_client()
+    if not client:
+        print("❌ Failed to initialize Google Sheets client")
+        return
+    
+    policy = AdaptivePollingPolicy(calendar, close_grace=CLOSE_GRACE)
+    deadline = time.time() + float(os.getenv('ALERT_WATCH_SECONDS', 0))
+    while True:
+        crypto_only = not force and not calendar.is_open(grace=CLOSE_GRACE)
+        result = check_alerts(client, crypto_only=crypto_only) or {}
+        gap = result.get('nearest_crypto_gap' if crypto_only else 'nearest_gap')
+        delay = policy.next_delay(result)
+        if gap is None or time.time() + delay >= deadline:
+            break
+        print(f"⏱️ Nearest alert is {gap:.2%} away; checking again in {delay:.0f}s")
+        time.sleep(delay)
+
+
 if __name__ == "__main__":
-    check_alerts()
+    main()
@@ -1,27 +1,37 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.graph_objects as go
 import plotly.express as px
 from datetime import datetime, timedelta
 import os
-import threading
 import time
 import traceback
 import traceback
 from portfolio_manager import PortfolioManager
+from alert_scheduler import get_alert_scheduler
+from fake_sheets import fake_sheets_enabled, get_fake_client
+from metadata_store import get_metadata_store
+from price_store import get_price_store
+from quote_cache import get_quote_cache
+from sheet_delta import TRANSACTION_HEADERS, diff_transactions, build_delta_requests, full_rewrite_payload, payload_bytes
+from sheets_retry import call_with_backoff, RATE_LIMIT_STATUS
+from user_cache import get_user_cache, ledger_fingerprint
+from write_queue import get_write_queue
+from returns import money_weighted_return
+from risk import compute_risk
 
 # --- IMPORT LOGIC FROM HELPER FILE ---
 from portfolio_logic import (
-    calculate_cash_balance,
-    get_current_holdings,
+    compute_ledger,
     fetch_live_prices,
     build_portfolio_table,
     calculate_portfolio_metrics,
     calculate_historical_portfolio_value,
+    rebase_history,
     get_sector_allocation,
     process_alerts,
     reset_all_alerts,
-    check_and_create_alerts_sheet,
     send_test_email,
     validate_ticker,
     delete_alert_row,
@@ -43,6 +53,10 @@ st.set_page_config(
 # --- INITIALIZE MANAGER ---
 @st.cache_resource
 def get_portfolio_manager_v2():
+    # 0. In-memory Sheets stand-in (FAKE_SHEETS=1) for offline runs and load tests
+    if fake_sheets_enabled():
+        return PortfolioManager(None, client=get_fake_client())
+
     # 1. Check Local File First
     if os.path.exists('credentials.json'):
         return PortfolioManager('credentials.json')
@@ -66,55 +80,33 @@ def get_portfolio_manager_v2():
 
 manager = get_portfolio_manager_v2()
 
-# --- BACKGROUND ALERTS THREAD ---
-def start_alert_monitor():
-    if 'alert_thread_started' not in st.session_state:
-        st.session_state.alert_thread_started = True
-        
-        def run_check():
-            while True:
-                try:
-                    # Credentials for Email (Updated to match user request)
-                    # Using nested calls or get to avoid keyerrors if not set
-                    try:
-                        email_creds = {
-                            'user': st.secrets["email"]["user"],
-                            'password': st.secrets["email"]["password"]
-                        }
-                    except:
-                        # Fallback or silent fail if secrets not set yes
-                        print("Email secrets not found")
-                        time.sleep(300)
-                        continue
+# --- BACKGROUND ALERTS (one loop per deployment, shared by all sessions) ---
+def run_alert_cycle():
+    # Credentials for Email
+    try:
+        email_creds = {
+            'user': st.secrets["email"]["user"],
+            'password': st.secrets["email"]["password"]
+        }
+    except Exception:
+        # Raising makes the scheduler retry sooner than the full interval
+        raise RuntimeError("Email secrets not found")
 
-                    if manager and manager.client:
-                        try:
-                             # FIXED: Use ID from manager meant for this
-                             spreadsheet = manager.client.open_by_key(manager.USERS_DB_ID)
-                             
-                             # Adapt keys for process_alerts which expects specific keys if I named them differently?
-                             # In portfolio_logic.py: send_alert_email_with_creds uses 'email' and 'password'.
-                             # I should map them.
-                             creds_for_func = {
-                                 'email': email_creds['user'],
-                                 'password': email_creds['password']
-                             }
-                             process_alerts(spreadsheet, creds_for_func)
-                        except Exception as e:
-                            print(f"Alert Loop Error: {e}")
-                            traceback.print_exc()
-                            
-                except Exception as e:
-                    print(f"Thread Error: {e}")
-                
-                # Sleep for 30 minutes
-                time.sleep(1800) 
+    if not (manager and manager.client):
+        return None
 
-        # Daemon thread so it dies when main thread dies (though Streamlit management is tricky)
-        t = threading.Thread(target=run_check, daemon=True)
-        t.start()
+    try:
+        return process_alerts(manager.get_alerts_sheet(), email_creds)
+    except Exception:
+        manager.invalidate_handles()
+        raise
+
+def start_alert_monitor():
+    scheduler = get_alert_scheduler(run_alert_cycle)
+    scheduler.start()
+    return scheduler
 
-start_alert_monitor()
+alert_scheduler = start_alert_monitor()
 
 # --- SESSION STATE ---
 if 'logged_in' not in st.session_state: st.session_state.logged_in = False
@@ -123,34 +115,107 @@ if 'alerts_tab' not in st.session_state: st.session_state.alerts_tab = None
 if 'user_email' not in st.session_state: st.session_state.user_email = "" # Initialize email
 
 # --- HELPER FUNCTIONS ---
+def current_user_key():
+    """Cache scope for the logged-in user (their transaction tab is unique per user)."""
+    return st.session_state.user_tab.title
+
+def _parse_transactions(data):
+    df = pd.DataFrame(data)
+    if not df.empty and 'Type' in df.columns:
+        df['Date'] = pd.to_datetime(df['Date'])
+        df['Quantity'] = pd.to_numeric(df['Quantity'], errors='coerce')
+        df['Price'] = pd.to_numeric(df['Price'], errors='coerce')
+        return df
+    return pd.DataFrame()
+
 def load_user_transactions():
+    """
+    The user's typed transactions. The tab is only re-read when the spreadsheet's revision
+    (Drive modifiedTime) has moved; our own writes invalidate the entry directly.
+    """
     try:
-        data = st.session_state.user_tab.get_all_records()
-        df = pd.DataFrame(data)
-        if not df.empty and 'Type' in df.columns:
-            df['Date'] = pd.to_datetime(df['Date'])
-            df['Quantity'] = pd.to_numeric(df['Quantity'], errors='coerce')
-            df['Price'] = pd.to_numeric(df['Price'], errors='coerce')
-            return df
-        return pd.DataFrame()
+        ws = st.session_state.user_tab
+        user = current_user_key()
+
+        def read_sheet():
+            data = ws.get_all_records()
+            # Parsed frame is shared by every render with the same sheet content
+            return get_user_cache().get_or_compute(
+                user, 'transactions', ledger_fingerprint(data), lambda: _parse_transactions(data)
+            )
+
+        df = get_user_cache().get_revisioned(
+            user, 'transactions_sheet', lambda: manager.spreadsheet_revision(ws.spreadsheet.id), read_sheet
+        )
+        # Optimistic: rows still in the write-behind queue show up right away
+        pending = get_write_queue().pending(ws)
+        if pending:
+            queued = _parse_transactions([dict(zip(TRANSACTION_HEADERS, row)) for row in pending])
+            df = queued if df.empty else pd.concat([df, queued], ignore_index=True)
+        return df
     except: return pd.DataFrame()
 
-def add_user_transaction(date, ticker, trans_type, quantity, price):
+def invalidate_user_caches():
+    """A write by this user drops only this user's cached transactions / ledger / history."""
+    get_user_cache().invalidate_user(current_user_key())
+
+def _on_rows_written(ws, rows):
+    # Queued rows are now in the sheet: drop the tab owner's cached copy (the Alerts tab has no owner entries)
+    get_user_cache().invalidate_user(ws.title)
+
+write_queue = get_write_queue(on_flush=_on_rows_written)
+
+def add_user_transactions(rows):
+    """
+    Queues [(date, ticker, type, quantity, price), ...] for a batched background append.
+    The rows are part of load_user_transactions() immediately.
+    """
     try:
-        st.session_state.user_tab.append_row([
-            date.strftime('%Y-%m-%d'), ticker, trans_type, quantity, price
+        write_queue.enqueue(st.session_state.user_tab, [
+            [date.strftime('%Y-%m-%d'), ticker, trans_type, quantity, price]
+            for date, ticker, trans_type, quantity, price in rows
         ])
-        st.cache_data.clear()
         return True
     except Exception as e:
         st.error(f"Error: {e}")
         return False
 
-def update_user_transactions(df):
+def add_user_transaction(date, ticker, trans_type, quantity, price):
+    return add_user_transactions([(date, ticker, trans_type, quantity, price)])
+
+def update_user_transactions(df, original=None):
     """
-    Overwrites the user's transaction sheet with the provided DataFrame.
-    Used for Edit Mode.
+    Saves the user's transaction sheet from the provided DataFrame. Used for Edit Mode.
+    Given the originally loaded DataFrame, only the changed / deleted / new rows are sent
+    in one atomic batchUpdate; otherwise the sheet is overwritten.
     """
+    # Queued appends must land first: the delta addresses sheet rows by position,
+    # and a full rewrite followed by a late append would duplicate them
+    if not write_queue.flush(st.session_state.user_tab):
+        st.error("Pending transactions could not be written yet; please try again.")
+        return False
+    diff = diff_transactions(original, df) if original is not None else None
+    if diff is not None:
+        try:
+            ws = st.session_state.user_tab
+            requests = build_delta_requests(ws.id, diff)
+            if requests:
+                # Row deletes / appends are not idempotent: a 5xx may arrive after they applied
+                call_with_backoff(ws.spreadsheet.batch_update, {"requests": requests}, retry_status=RATE_LIMIT_STATUS)
+            st.session_state.last_save_stats = {
+                'updated': len(diff['updated']),
+                'deleted': len(diff['deleted']),
+                'appended': len(diff['appended']),
+                'payload_bytes': payload_bytes({"requests": requests}) if requests else 0,
+                'full_rewrite_bytes': payload_bytes(full_rewrite_payload(df, ws.id)),
+            }
+            print(f"SAVE TRANSACTIONS (delta): {st.session_state.last_save_stats}")
+            invalidate_user_caches()
+            return True
+        except Exception as e:
+            st.error(f"Failed to update sheet: {e}")
+            return False
+
     try:
         # Prepare data
         update_data = []
@@ -232,7 +297,7 @@ def update_user_transactions(df):
         except Exception as format_error:
             print(f"Warning: Could not format columns: {format_error}")
             # Continue anyway - data is saved even if formatting fails
-        st.cache_data.clear()
+        invalidate_user_caches()
         return True
     except Exception as e:
         st.error(f"Failed to update sheet: {e}")
@@ -242,11 +307,8 @@ def load_alerts():
     try:
         # Load from Global Alerts Sheet via Manager (or reconstruct)
         # We need the "Alerts" sheet from the spreadsheet.
-        # FIXED: Use ID
-        spreadsheet = manager.client.open_by_key(manager.USERS_DB_ID)
-        print(f"LOAD ALERTS: Accessing Spreadsheet: {spreadsheet.title}")
-        
-        ws = check_and_create_alerts_sheet(spreadsheet)
+        # Cached handle: one API call (the read) per load
+        ws = manager.get_alerts_sheet()
         print(f"LOAD ALERTS: Accessing Worksheet: {ws.title}")
         
         data = ws.get_all_records()
@@ -254,47 +316,55 @@ def load_alerts():
             print("Alerts sheet found but no data rows")
         else:
             print(f"Alerts loaded: {len(data)} rows")
+
+        # Alerts still in the write-behind queue (no sheet row yet, so no actions)
+        for row in write_queue.pending(ws):
+            record = dict(zip(manager.ALERTS_SHEET_HEADERS, row))
+            record['Pending'] = True
+            data.append(record)
             
         return pd.DataFrame(data)
     except Exception as e:
         print(f"LOAD ALERTS ERROR: {e}")
         traceback.print_exc()
+        manager.invalidate_handles()
         return pd.DataFrame()
 
 def add_alert_to_sheet(ticker, target, condition, note=""):
     try:
-        # FIXED: Use ID from manager
-        spreadsheet = manager.client.open_by_key(manager.USERS_DB_ID)
-        print(f"ADD ALERT: Target Spreadsheet: {spreadsheet.title}")
-        
-        ws = check_and_create_alerts_sheet(spreadsheet)
+        ws = manager.get_alerts_sheet()
         print(f"ADD ALERT: Target Sheet: {ws.title}")
         
         # Headers: ["Ticker", "Target Price", "Direction", "Subscribers", "Status", "Note", "Last Checked"]
         user_email = st.session_state.user_email
         new_row = [ticker, target, condition, user_email, "Active", note, "Never"]
         
-        print(f"ADD ALERT: Data being sent: {new_row}")
+        print(f"ADD ALERT: Data being queued: {new_row}")
         
-        ws.append_row(new_row)
-        st.cache_data.clear()
+        write_queue.enqueue(ws, [new_row])
         return True
     except Exception as e:
         print(f"ADD ALERT ERROR: {e}")
         traceback.print_exc()
+        manager.invalidate_handles()
         return False
 
+def show_alert_action_error(msg):
+    # Drop cached handles in case the tab was recreated
+    manager.invalidate_handles()
+    st.error(msg)
+
 # --- CHARTING FUNCTIONS ---
-def create_performance_chart(historical_df, timeframe):
-    if historical_df.empty: return None
+def timeframe_start(timeframe, first_date):
     today = datetime.now()
-    if timeframe == '1W': start = today - timedelta(days=7)
-    elif timeframe == '1M': start = today - timedelta(days=30)
-    elif timeframe == 'YTD': start = datetime(today.year, 1, 1)
-    elif timeframe == '1Y': start = today - timedelta(days=365)
-    else: start = historical_df['Date'].min()
-    
-    filtered = historical_df[historical_df['Date'] >= start].copy()
+    if timeframe == '1W': return today - timedelta(days=7)
+    elif timeframe == '1M': return today - timedelta(days=30)
+    elif timeframe == 'YTD': return datetime(today.year, 1, 1)
+    elif timeframe == '1Y': return today - timedelta(days=365)
+    return first_date
+
+def create_performance_chart(filtered):
+    """filtered: a history slice already rebased to its timeframe (rebase_history)."""
     if filtered.empty: return None
     
     fig = go.Figure()
@@ -305,6 +375,30 @@ def create_performance_chart(historical_df, timeframe):
     fig.update_layout(title='Performance vs S&P 500', template='plotly_white', height=400, hovermode='x unified')
     return fig
 
+def create_risk_charts(risk, start):
+    """Drawdown and rolling volatility / beta figures, sliced to the timeframe."""
+    start = pd.to_datetime(start)
+    drawdown = risk['drawdown'][risk['drawdown'].index >= start]
+    rolling = risk['rolling'][risk['rolling'].index >= start].dropna(how='all')
+    fig1 = fig2 = None
+    if not drawdown.empty:
+        fig1 = go.Figure()
+        fig1.add_trace(go.Scatter(x=drawdown.index, y=drawdown['Drawdown_%'], mode='lines', name='Drawdown',
+                                  fill='tozeroy', line=dict(color='#d62728', width=2)))
+        fig1.update_layout(title='Drawdown (%)', template='plotly_white', height=320, hovermode='x unified')
+    if not rolling.empty:
+        fig2 = go.Figure()
+        fig2.add_trace(go.Scatter(x=rolling.index, y=rolling['Volatility_%'], mode='lines', name='Volatility %',
+                                  line=dict(color='#1f77b4', width=2)))
+        fig2.add_trace(go.Scatter(x=rolling.index, y=rolling['Beta'], mode='lines', name='Beta (SPY)',
+                                  yaxis='y2', line=dict(color='#ff7f0e', width=2, dash='dash')))
+        fig2.update_layout(title='Rolling 3M Volatility & Beta', template='plotly_white', height=320,
+                           hovermode='x unified', yaxis2=dict(overlaying='y', side='right', showgrid=False))
+    return fig1, fig2
+
+def _fmt_ratio(value, suffix=""):
+    return f"{value:,.2f}{suffix}" if value is not None and np.isfinite(value) else "n/a"
+
 def create_allocation_charts(portfolio_df, cash_balance):
     if portfolio_df.empty: return None, None
     
@@ -411,10 +505,10 @@ if not st.session_state.logged_in:
             
     with tab2:
         nu = st.text_input("New User", key="sign_user")
-        np = st.text_input("New Pass", type="password", key="sign_pass")
+        new_pass = st.text_input("New Pass", type="password", key="sign_pass")
         ne = st.text_input("Email", key="sign_email")
         if st.button("Sign Up"):
-            success, msg = manager.sign_up(nu, np, ne)
+            success, msg = manager.sign_up(nu, new_pass, ne)
             if success: st.success(msg)
             else: st.error(msg)
 
@@ -445,12 +539,52 @@ else:
         except Exception as e:
             st.sidebar.error(f"Config Error: {e}")
 
+    # Cache diagnostics (hit/miss counters)
+    with st.sidebar.expander("Cache Stats"):
+        if fake_sheets_enabled():
+            st.caption("Sheets API calls (fake backend)")
+            st.json(get_fake_client().backend.stats())
+        st.caption("Live quotes (shared, in-process)")
+        st.json(get_quote_cache().stats())
+        st.caption("Ticker metadata (SQLite)")
+        st.json(get_metadata_store().stats())
+        st.caption("Price history (SQLite)")
+        st.json(get_price_store().stats())
+        st.caption("User index (login / sign-up)")
+        st.json(manager.user_index.stats())
+        st.caption("Per-user cache (transactions / ledger / history)")
+        st.json(get_user_cache().stats())
+        st.caption("Write-behind queue (appends)")
+        st.json(write_queue.stats())
+
+    with st.sidebar.expander("Alert Scheduler"):
+        status = alert_scheduler.status()
+        st.caption(f"State: {status['state']} (pid {status['pid']})")
+        st.caption(f"Next run: {status['next_run'] or '-'}")
+        st.json(status)
+        if st.button("Run alert check now", key="btn_run_alerts_now"):
+            alert_scheduler.run_now()
+            st.toast("Alert check triggered")
+
     # Main Area
     st.title("Portfolio Tracker")
 
     st.divider()
 
     df = load_user_transactions()
+
+    failed_rows = write_queue.failed(st.session_state.user_tab)
+    if failed_rows:
+        st.error(f"{len(failed_rows)} transaction(s) could not be saved: {failed_rows[-1][1]}. "
+                 "A server error can arrive after the rows were written: if they already appear "
+                 "in your transactions, discard them instead of retrying.")
+        f1, f2 = st.columns([1, 5])
+        if f1.button("Retry", key="btn_retry_writes"):
+            write_queue.requeue_failed(st.session_state.user_tab)
+            st.rerun()
+        if f2.button("Discard", key="btn_discard_writes"):
+            write_queue.discard_failed(st.session_state.user_tab)
+            st.rerun()
     
     if df.empty:
         st.info("Welcome! Your portfolio is empty.")
@@ -466,6 +600,7 @@ else:
             if not edited_df.empty:
                 count = 0
                 errors = []
+                rows = []
                 with st.spinner("Building Portfolio..."):
                     today = datetime.now()
                     for idx, row in edited_df.iterrows():
@@ -483,8 +618,12 @@ else:
                             
                         t = msg
                         # Add as 'Initial' type
-                        add_user_transaction(today, t, "Initial", q, c)
+                        rows.append((today, t, "Initial", q, c))
                         count += 1
+
+                    # One queued batch -> one append_rows call for the whole portfolio
+                    if rows and not add_user_transactions(rows):
+                        count = 0
                 
                 if errors:
                     for e in errors: st.error(e)
@@ -528,22 +667,32 @@ else:
         )
         
         if st.button("Save Changes"):
-            if update_user_transactions(edited_tx):
+            if update_user_transactions(edited_tx, original=df):
                 st.success("Changes saved to Google Sheets!")
                 st.rerun()
+
+        save_stats = st.session_state.get('last_save_stats')
+        if save_stats:
+            st.caption(f"Last save: {save_stats['updated']} updated, {save_stats['deleted']} deleted, "
+                       f"{save_stats['appended']} added - {save_stats['payload_bytes']:,} bytes sent "
+                       f"(full rewrite: {save_stats['full_rewrite_bytes']:,})")
                 
     else:
         # Normal Dashboard View...
         pass # Flow continues to standard metrics
         
-    cash = calculate_cash_balance(df)
-    holdings = get_current_holdings(df)
+    # One vectorized pass for cash, holdings and deposits (cached per user + ledger content)
+    user_key = current_user_key()
+    fingerprint = ledger_fingerprint(df)
+    ledger = get_user_cache().get_or_compute(user_key, 'ledger', fingerprint, lambda: compute_ledger(df))
+    cash = ledger['cash']
+    holdings = ledger['holdings']
     
     with st.spinner("Fetching data..."):
         prices = fetch_live_prices(holdings['Ticker'].unique().tolist())
         
     port_df = build_portfolio_table(holdings, prices, cash)
-    metrics = calculate_portfolio_metrics(port_df, cash, df)
+    metrics = calculate_portfolio_metrics(port_df, cash, df, total_deposited=ledger['total_deposited'])
     
     # Metrics - 5 columns
     c1, c2, c3, c4, c5 = st.columns(5)
@@ -663,14 +812,45 @@ else:
     
     # History
     timeframe = st.selectbox("Timeframe", ['1W', '1M', 'YTD', '1Y', 'All'], index=2)
-    if timeframe == 'All': start = df['Date'].min()
-    elif timeframe == 'YTD': start = datetime(datetime.now().year, 1, 1)
-    elif timeframe == '1Y': start = datetime.now() - timedelta(days=365)
-    else: start = datetime.now() - timedelta(days=30)
     
-    hist_df = calculate_historical_portfolio_value(df, start)
+    # Full-range NAV, cached per user + ledger; expires with the price store's intraday tail.
+    # Timeframes are rebased slices of it, so switching costs no download or reconstruction.
+    first_date = df['Date'].min()
+    full_hist = get_user_cache().get_or_compute(
+        user_key, 'history', fingerprint, lambda: calculate_historical_portfolio_value(df, first_date),
+        ttl_seconds=15 * 60
+    )
+    hist_df = rebase_history(full_hist, timeframe_start(timeframe, first_date))
     if not hist_df.empty:
-        st.plotly_chart(create_performance_chart(hist_df, timeframe), use_container_width=True)
+        st.plotly_chart(create_performance_chart(hist_df), use_container_width=True)
+        # Time-weighted ignores deposits / withdrawals; money-weighted (XIRR) weighs them in
+        span_days = (hist_df['Date'].iloc[-1] - hist_df['Date'].iloc[0]).days
+        mwr = money_weighted_return(hist_df.set_index('Date')['Portfolio_Value'], hist_df['Net_Flow'],
+                                    annualize=span_days >= 365)
+        mwr_label = "XIRR, annualized" if span_days >= 365 else "for the period"
+        mwr_text = f"{mwr * 100:,.2f}%" if np.isfinite(mwr) else "n/a"
+        st.caption(f"Time-weighted return: {hist_df['Portfolio_Return_%'].iloc[-1]:,.2f}% | "
+                   f"Money-weighted return ({mwr_label}): {mwr_text}")
+
+        # Risk over the full history: same NAV + SPY series, cached per ledger fingerprint
+        risk = get_user_cache().get_or_compute(
+            user_key, 'risk', fingerprint, lambda: compute_risk(full_hist), ttl_seconds=15 * 60
+        )
+        summary = risk['summary']
+        if summary:
+            st.markdown("#### ⚠️ Risk (since inception)")
+            r1, r2, r3, r4, r5, r6 = st.columns(6)
+            r1.metric("Volatility", _fmt_ratio(summary['volatility_pct'], "%"))
+            r2.metric("Sharpe", _fmt_ratio(summary['sharpe']))
+            r3.metric("Sortino", _fmt_ratio(summary['sortino']))
+            r4.metric("Beta (SPY)", _fmt_ratio(summary['beta']))
+            r5.metric("Correlation", _fmt_ratio(summary['correlation']))
+            r6.metric("Max Drawdown", _fmt_ratio(summary['max_drawdown_pct'], "%"),
+                      f"{summary['longest_drawdown_sessions']} sessions longest", delta_color="off")
+            c1, c2 = st.columns(2)
+            fig_dd, fig_roll = create_risk_charts(risk, hist_df['Date'].iloc[0])
+            if fig_dd: c1.plotly_chart(fig_dd, use_container_width=True)
+            if fig_roll: c2.plotly_chart(fig_roll, use_container_width=True)
 
     # Pies
     c1, c2 = st.columns(2)
@@ -691,6 +871,9 @@ else:
             c4.write(row['Note'])
             
             # Status
+            if row.get('Pending') is True:
+                c5.write("💾 Saving")
+                continue
             if row['Status'] == 'Sent':
                 c5.write("✅ Sent")
             else:
@@ -710,49 +893,49 @@ else:
                     if c6.button("Reactivate", key=f"react_{i}"):
                         try:
                             with st.spinner("Reactivating..."):
-                                spreadsheet = manager.client.open_by_key(manager.USERS_DB_ID)
-                                success, msg = reactivate_alert(spreadsheet, i)
+                                success, msg = reactivate_alert(manager.get_alerts_sheet(), i)
                                 if success:
                                     st.toast(msg, icon='🔄')
                                     time.sleep(1)
                                     st.rerun()
-                                else: st.error(msg)
+                                else:
+                                    show_alert_action_error(msg)
                         except Exception as e: st.error(f"Error: {e}")
 
                 if c6.button("Delete", key=f"del_{i}"):
                     try:
                         with st.spinner("Deleting..."):
-                            spreadsheet = manager.client.open_by_key(manager.USERS_DB_ID)
-                            success, msg = delete_alert_row(spreadsheet, i)
+                            success, msg = delete_alert_row(manager.get_alerts_sheet(), i)
                             if success:
                                 st.toast(msg, icon='🗑️')
                                 time.sleep(1)
                                 st.rerun()
-                            else: st.error(msg)
+                            else:
+                                show_alert_action_error(msg)
                     except Exception as e: st.error(f"Error: {e}")
             elif is_subscribed:
                 if c6.button("Unsubscribe", key=f"unsub_{i}"):
                     try:
                         with st.spinner("Unsubscribing..."):
-                            spreadsheet = manager.client.open_by_key(manager.USERS_DB_ID)
-                            success, msg = unsubscribe_from_alert(spreadsheet, i, user_email)
+                            success, msg = unsubscribe_from_alert(manager.get_alerts_sheet(), i, user_email)
                             if success:
                                 st.toast(msg, icon='👋')
                                 time.sleep(1)
                                 st.rerun()
-                            else: st.error(msg)
+                            else:
+                                show_alert_action_error(msg)
                     except Exception as e: st.error(f"Error: {e}")
             else:
                  if c6.button("Join", key=f"join_{i}"):
                     try:
                         with st.spinner("Joining..."):
-                            spreadsheet = manager.client.open_by_key(manager.USERS_DB_ID)
-                            success, msg = subscribe_to_alert(spreadsheet, i, user_email)
+                            success, msg = subscribe_to_alert(manager.get_alerts_sheet(), i, user_email)
                             if success:
                                 st.toast(msg, icon='✅')
                                 time.sleep(1)
                                 st.rerun()
-                            else: st.error(msg)
+                            else:
+                                show_alert_action_error(msg)
                     except Exception as e: st.error(f"Error: {e}")
     else:
         st.info("No active alerts.")
@@ -0,0 +1,101 @@
+"""
+Benchmark Series Service
+Downloads a benchmark (SPY by default) once, caches it in-process, and answers
+"return since date X" for many dates at once with a vectorized lookup.
+"""
+
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from price_provider import get_price_provider
+
+
+def _download_closes(symbol, start):
+    closes = get_price_provider().get_history([symbol], start, datetime.now())
+    if closes.empty or symbol not in closes.columns:
+        return pd.Series(dtype=float)
+    return closes[symbol].dropna().astype(float)
+
+
+class BenchmarkSeries:
+    def __init__(self, symbol='SPY', ttl_seconds=900, downloader=None):
+        """
+        symbol: benchmark ticker
+        ttl_seconds: how long a download is reused before refreshing the latest close
+        downloader: callable(symbol, start) -> Close Series (defaults to the price provider)
+        """
+        self.symbol = symbol
+        self.ttl_seconds = ttl_seconds
+        self._download = downloader or _download_closes
+        self._closes = pd.Series(dtype=float)
+        self._start = None
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+        self.fetch_count = 0
+
+    def get_closes(self, start):
+        """
+        Close series covering `start` onwards.
+        Downloads only if the cache is stale or does not reach back far enough.
+        """
+        start = pd.Timestamp(start).normalize()
+        with self._lock:
+            fresh = (time.time() - self._fetched_at) < self.ttl_seconds
+            covered = self._start is not None and self._start <= start
+            if not (fresh and covered):
+                fetch_from = start if self._start is None else min(start, self._start)
+                try:
+                    closes = self._download(self.symbol, fetch_from)
+                    self.fetch_count += 1
+                except Exception as e:
+                    print(f"Benchmark download failed for {self.symbol}: {e}")
+                    closes = None
+                if closes is not None and not closes.empty:
+                    self._closes = closes.sort_index()
+                    self._start = fetch_from
+                    self._fetched_at = time.time()
+            return self._closes
+
+    def returns_since(self, dates):
+        """
+        % return from the first close on/after each date to the latest close.
+        One download for all dates; 0.0 where there is no data (or date is missing).
+        """
+        dates = pd.to_datetime(pd.Series(dates), errors='coerce')
+        result = np.zeros(len(dates))
+        valid = dates.notna().to_numpy()
+        if not valid.any():
+            return result
+
+        closes = self.get_closes(dates[valid].min())
+        if closes.empty:
+            return result
+
+        values = closes.to_numpy()
+        pos = closes.index.searchsorted(pd.DatetimeIndex(dates[valid]).tz_localize(None), side='left')
+        in_range = pos < len(values)
+        start_p = values[np.minimum(pos, len(values) - 1)]
+        end_p = values[-1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rets = np.where(in_range & (start_p > 0), (end_p - start_p) / start_p * 100, 0.0)
+        result[valid] = rets
+        return result
+
+    def return_since(self, date):
+        return float(self.returns_since([date])[0])
+
+
+# --- Process-wide instances (one per symbol) ---
+_series = {}
+_series_lock = threading.Lock()
+
+
+def get_benchmark_series(symbol='SPY'):
+    with _series_lock:
+        if symbol not in _series:
+            _series[symbol] = BenchmarkSeries(symbol)
+        return _series[symbol]
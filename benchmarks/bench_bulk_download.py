@@ -0,0 +1,113 @@
+"""
+Bulk history download benchmark.
+Downloads a large ticker universe from a simulated provider (per-ticker latency,
+like yfinance fetching one symbol at a time, plus random request failures,
+dropped tickers and per-ticker failures returned as all-NaN columns, as
+yfinance does) as one request - the original path - and through the chunked,
+parallel BulkDownloader, and checks the merged panel against the source data.
+A few tickers have no data at all in the range: they must come back as empty
+answers, not be retried.
+
+Run from the repo root:
+    python -m benchmarks.bench_bulk_download
+    python -m benchmarks.bench_bulk_download --tickers 500 --latency-ms 20 --fail 0.1 --drop 0.02 --nan-fail 0.05
+"""
+
+import argparse
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from bulk_download import BulkDownloader
+from price_provider import drop_raised
+from benchmarks.generators import make_tickers, make_price_panel
+
+
+class FlakyProvider:
+    """
+    get_history-style fetch over a fixed panel with latency, failed requests, dropped
+    tickers and per-ticker failures that come back as all-NaN columns (yfinance-style).
+    """
+
+    def __init__(self, panel, latency, fail, drop, nan_fail, seed=0):
+        self.panel = panel
+        self.latency = latency
+        self.fail = fail
+        self.drop = drop
+        self.nan_fail = nan_fail
+        self._rng = np.random.default_rng(seed)
+        self._lock = threading.Lock()
+        self.requests = 0
+
+    def fetch(self, tickers, start, end):
+        """(frame, tickers that raised): raised tickers are all-NaN columns, like yf.download()."""
+        with self._lock:
+            self.requests += 1
+            failed = self._rng.random() < self.fail
+            dropped = {t for t in tickers if self._rng.random() < self.drop}
+            raised = {t for t in tickers if self._rng.random() < self.nan_fail}
+        time.sleep(self.latency * len(tickers))
+        if failed:
+            raise ConnectionError("simulated request failure")
+        cols = [t for t in tickers if t not in dropped]
+        frame = self.panel.loc[pd.Timestamp(start):pd.Timestamp(end), cols].copy()
+        frame[[t for t in cols if t in raised]] = np.nan
+        return frame, raised
+
+    def __call__(self, tickers, start, end):
+        # What YFinanceProvider._download_chunk hands the downloader
+        return drop_raised(*self.fetch(tickers, start, end))
+
+
+def run(n_tickers, years, latency, fail, drop, nan_fail, chunk, workers, rate, n_empty=3):
+    tickers = make_tickers(n_tickers)
+    panel = make_price_panel(tickers, '2015-01-01', years, missing=0.0)
+    empty = tickers[-n_empty:]  # e.g. listed after the range: no data, nothing to retry
+    panel[empty] = np.nan
+    start, end = panel.index[0], panel.index[-1]
+
+    provider = FlakyProvider(panel, latency, fail, drop, nan_fail)
+    t0 = time.perf_counter()
+    try:
+        single, _ = provider.fetch(tickers, start, end)
+    except ConnectionError:
+        single = pd.DataFrame()
+    t_single = time.perf_counter() - t0
+    single_got = int(single.notna().any().sum())
+
+    provider = FlakyProvider(panel, latency, fail, drop, nan_fail)
+    downloader = BulkDownloader(provider, chunk_size=chunk, max_workers=workers, rate=rate, retry_delay=0.1)
+    t0 = time.perf_counter()
+    merged = downloader.download(tickers, start, end)
+    t_bulk = time.perf_counter() - t0
+    stats = downloader.last_stats
+
+    got = [t for t in tickers if t in merged.columns and t not in empty]
+    pd.testing.assert_frame_equal(merged[got], panel.loc[merged.index, got], check_freq=False, check_names=False)
+    assert set(stats['empty']) == set(empty) - set(stats['failed']), "A failed ticker was taken as empty"
+
+    print(f"{n_tickers} tickers x {len(panel)} days | {latency * 1000:.0f} ms/ticker, {fail:.0%} failed requests, "
+          f"{drop:.0%} dropped, {nan_fail:.0%} NaN-column failures, {n_empty} with no data")
+    print(f"single request  {t_single:7.2f}s | {single_got:>4} / {n_tickers - n_empty} tickers with data")
+    print(f"chunked x{workers:<2}     {t_bulk:7.2f}s | {len(got):>4} / {n_tickers - n_empty} tickers with data | "
+          f"{stats['requests']} requests in {stats['rounds']} rounds, "
+          f"{len(stats['failed'])} still failed, {len(stats['empty'])} empty (not retried) | panel matches source")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark chunked parallel history downloads")
+    parser.add_argument('--tickers', type=int, default=300)
+    parser.add_argument('--years', type=float, default=5)
+    parser.add_argument('--latency-ms', type=float, default=10)
+    parser.add_argument('--fail', type=float, default=0.1, help="probability a request fails")
+    parser.add_argument('--drop', type=float, default=0.02, help="probability a ticker is missing from an answer")
+    parser.add_argument('--nan-fail', type=float, default=0.02,
+                        help="probability a ticker's own request fails and comes back as an all-NaN column")
+    parser.add_argument('--chunk', type=int, default=25)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--rate', type=float, default=20.0, help="chunk requests per second")
+    args = parser.parse_args()
+    run(args.tickers, args.years, args.latency_ms / 1000, args.fail, args.drop, args.nan_fail,
+        args.chunk, args.workers, args.rate)
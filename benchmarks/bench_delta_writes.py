@@ -0,0 +1,81 @@
+"""
+Edit Mode save benchmark.
+Compares the payload of the old clear + full rewrite + reformat save with the
+diff-based batchUpdate for a typical edit, and checks that the delta leaves the
+(fake) sheet identical to a full rewrite.
+
+Run from the repo root:
+    python -m benchmarks.bench_delta_writes
+    python -m benchmarks.bench_delta_writes --rows 5000 --edits 10 --deletes 3 --adds 5
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from fake_sheets import FakeClient
+from sheet_delta import (
+    TRANSACTION_HEADERS, transaction_rows, diff_transactions, build_delta_requests,
+    full_rewrite_payload, payload_bytes,
+)
+from benchmarks.generators import make_ledger
+
+
+def _sheet_with(client, df):
+    sh = client.create("bench")
+    ws = sh.add_worksheet("User_bench", rows=len(df) + 10, cols=5)
+    ws.update('A1', [TRANSACTION_HEADERS] + transaction_rows(df))
+    return sh, ws
+
+
+def _edit(df, n_edits, n_deletes, n_adds, seed=0):
+    rng = np.random.default_rng(seed)
+    edited = df.copy()
+    rows = rng.choice(len(df), size=n_edits + n_deletes, replace=False)
+    for label in rows[:n_edits]:
+        edited.loc[label, 'Price'] = round(float(edited.loc[label, 'Price']) * 1.01, 2)
+    edited = edited.drop(index=rows[n_edits:])
+    new = pd.DataFrame({
+        'Date': pd.Timestamp('2025-01-02'), 'Ticker': 'T000', 'Type': 'Buy',
+        'Quantity': 1.0, 'Price': 100.0,
+    }, index=range(len(df), len(df) + n_adds))
+    return pd.concat([edited, new])
+
+
+def run(n_rows, n_edits, n_deletes, n_adds):
+    df = make_ledger(n_rows)
+    edited = _edit(df, n_edits, n_deletes, n_adds)
+    client = FakeClient()
+    sh, ws = _sheet_with(client, df)
+
+    t0 = time.perf_counter()
+    diff = diff_transactions(df, edited)
+    requests = build_delta_requests(ws.id, diff)
+    t_diff = time.perf_counter() - t0
+
+    client.backend.reset_stats()
+    sh.batch_update({'requests': requests})
+    calls = client.backend.total_calls
+
+    full = payload_bytes(full_rewrite_payload(edited, ws.id))
+    delta = payload_bytes({'requests': requests})
+    expected = [TRANSACTION_HEADERS] + [[str(v) if not isinstance(v, str) else v for v in r] for r in transaction_rows(edited)]
+    actual = [[str(v) if not isinstance(v, str) else v for v in r] for r in ws.get_all_values()]
+    assert actual == expected, "Delta write diverged from a full rewrite"
+
+    print(f"{n_rows:,} rows | {n_edits} edited, {n_deletes} deleted, {n_adds} added")
+    print(f"full rewrite  {full:>12,} bytes | 3 calls (clear, update, format), not atomic")
+    print(f"delta write   {delta:>12,} bytes | {calls} call (batchUpdate), atomic | "
+          f"{full / max(delta, 1):,.0f}x smaller | diff {t_diff * 1000:.1f} ms | sheet matches")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark Edit Mode save payloads")
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--edits', type=int, default=10)
+    parser.add_argument('--deletes', type=int, default=3)
+    parser.add_argument('--adds', type=int, default=5)
+    args = parser.parse_args()
+    run(args.rows, args.edits, args.deletes, args.adds)
@@ -0,0 +1,73 @@
+"""
+Alert email dispatch benchmark.
+Sends one cycle of triggered alerts to a local SMTP stand-in three ways:
+a new session per alert (the original behaviour), one pooled session, and one
+pooled session with per-recipient digests.
+
+Run from the repo root:
+    python -m benchmarks.bench_dispatch
+    python -m benchmarks.bench_dispatch --alerts 200 --subscribers 3 --handshake-ms 150
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from alert_mailer import AlertDispatcher
+from benchmarks.smtp_stub import SMTPStub
+
+
+def make_fired(n_alerts, n_subscribers, pool_size=50, seed=0):
+    rng = np.random.default_rng(seed)
+    fired = []
+    for i in range(n_alerts):
+        subs = [f"user{j}@example.com" for j in rng.choice(pool_size, size=n_subscribers, replace=False)]
+        fired.append((i, f"T{i % 40:03d}", float(rng.uniform(10, 500)), rng.choice(['Above', 'Below']), subs))
+    return fired
+
+
+def _dispatch(stub, fired, digest, pooled):
+    kwargs = {'host': '127.0.0.1', 'port': stub.port, 'use_ssl': False, 'digest': digest}
+    if pooled:
+        dispatcher = AlertDispatcher('bench@example.com', 'secret', **kwargs)
+        for key, ticker, price, direction, subs in fired:
+            dispatcher.add(key, ticker, price, direction, subs)
+        return dispatcher.send()
+    delivered = {}
+    for key, ticker, price, direction, subs in fired:
+        dispatcher = AlertDispatcher('bench@example.com', 'secret', **kwargs)
+        dispatcher.add(key, ticker, price, direction, subs)
+        delivered.update(dispatcher.send())
+    return delivered
+
+
+def run(n_alerts, n_subscribers, handshake_ms):
+    fired = make_fired(n_alerts, n_subscribers)
+    modes = [
+        ('session per alert', False, False),
+        ('pooled session', False, True),
+        ('pooled + digest', True, True),
+    ]
+    with SMTPStub(handshake_delay=handshake_ms / 1000) as stub:
+        baseline = None
+        for label, digest, pooled in modes:
+            stub.reset()
+            t0 = time.perf_counter()
+            delivered = _dispatch(stub, fired, digest, pooled)
+            elapsed = time.perf_counter() - t0
+            assert all(delivered.values()) and len(delivered) == n_alerts
+            baseline = baseline or elapsed
+            c = stub.counts
+            print(f"{label:<18} {elapsed * 1000:>9.1f} ms | {n_alerts / elapsed:>8.1f} alerts/s | "
+                  f"{c['connections']:>4} sessions | {c['messages']:>4} messages | {baseline / elapsed:>5.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark alert email dispatch")
+    parser.add_argument('--alerts', type=int, default=20)
+    parser.add_argument('--subscribers', type=int, default=3, help="Subscribers per alert (drawn from 50 users)")
+    parser.add_argument('--handshake-ms', type=float, default=100.0,
+                        help="Simulated TLS handshake + login cost per SMTP session")
+    args = parser.parse_args()
+    run(args.alerts, args.subscribers, args.handshake_ms)
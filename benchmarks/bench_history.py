@@ -0,0 +1,50 @@
+"""
+Historical NAV benchmark.
+Times reconstruct_portfolio_history() (position matrix) against the original
+day-by-day loop on a synthetic 'All' timeframe, with no network access.
+
+Run from the repo root:
+    python -m benchmarks.bench_history
+    python -m benchmarks.bench_history --years 10 --transactions 5000 --legacy
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from portfolio_logic import reconstruct_portfolio_history
+from benchmarks.generators import make_ledger, make_price_panel
+from benchmarks.legacy import legacy_portfolio_history
+
+
+def run(years, n_transactions, legacy):
+    df = make_ledger(n_transactions, n_tickers=40)
+    # Spread the ledger over the whole window
+    start = pd.Timestamp('2015-01-01')
+    tickers = sorted(set(df['Ticker']) - {'CASH'}) + ['SPY']
+    panel = make_price_panel(tickers, start, years)
+    df['Date'] = np.sort(np.random.default_rng(1).choice(panel.index, size=len(df)))
+
+    t0 = time.perf_counter()
+    fast = reconstruct_portfolio_history(df, panel, start)
+    t_new = time.perf_counter() - t0
+    print(f"{years}y x {n_transactions:,} transactions | position matrix {t_new * 1000:.1f} ms ({len(fast)} days)")
+
+    if legacy:
+        t0 = time.perf_counter()
+        slow = legacy_portfolio_history(df, panel, start)
+        t_old = time.perf_counter() - t0
+        assert np.allclose(fast['Portfolio_Value'], slow['Portfolio_Value'], rtol=1e-6)
+        assert np.allclose(fast['SPY_Price'], slow['SPY_Price'].astype(float))
+        print(f"day-by-day loop {t_old:.1f} s | speedup {t_old / t_new:,.0f}x | values match")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark historical portfolio reconstruction")
+    parser.add_argument('--years', type=int, default=10)
+    parser.add_argument('--transactions', type=int, default=5000)
+    parser.add_argument('--legacy', action='store_true', help="Also run (and parity-check) the original loop")
+    args = parser.parse_args()
+    run(args.years, args.transactions, args.legacy)
@@ -0,0 +1,72 @@
+"""
+Ledger engine benchmark.
+Times compute_ledger() against the original iterrows() functions at 10k / 100k / 1M rows
+and checks that both give the same cash, holdings and deposits.
+
+Run from the repo root:
+    python -m benchmarks.bench_ledger
+    python -m benchmarks.bench_ledger --sizes 10000 100000 --legacy-max 100000
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from ledger import compute_ledger
+from benchmarks.generators import make_ledger
+from benchmarks.legacy import legacy_cash_balance, legacy_current_holdings, legacy_total_deposited
+
+
+def _timed(func, *args):
+    t0 = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - t0
+
+
+def check_parity(ledger, cash, holdings, deposited):
+    assert np.isclose(ledger['cash'], cash), (ledger['cash'], cash)
+    assert np.isclose(ledger['total_deposited'], deposited), (ledger['total_deposited'], deposited)
+    assert ledger['holdings'].empty == holdings.empty, "Holdings emptiness differs"
+    if holdings.empty:
+        return
+    new = ledger['holdings'].set_index('Ticker').sort_index()
+    old = holdings.set_index('Ticker').sort_index()
+    assert list(new.index) == list(old.index), "Different tickers held"
+    assert np.allclose(new['Qty'], old['Qty'])
+    assert np.allclose(new['Avg_Buy_Price'], old['Avg_Buy_Price'], rtol=1e-6)
+    assert (pd.to_datetime(new['First_Buy_Date']) == pd.to_datetime(old['First_Buy_Date'])).all()
+
+
+def run(sizes, legacy_max):
+    results = []
+    for n in sizes:
+        df = make_ledger(n)
+        ledger, t_new = _timed(compute_ledger, df)
+        row = {'rows': n, 'vectorized_s': round(t_new, 4), 'legacy_s': None, 'speedup': None}
+
+        if n <= legacy_max:
+            t0 = time.perf_counter()
+            cash = legacy_cash_balance(df)
+            holdings = legacy_current_holdings(df)
+            deposited = legacy_total_deposited(df)
+            t_old = time.perf_counter() - t0
+            check_parity(ledger, cash, holdings, deposited)
+            row['legacy_s'] = round(t_old, 4)
+            row['speedup'] = round(t_old / t_new, 1) if t_new > 0 else None
+
+        print(f"{n:>9,} rows | vectorized {row['vectorized_s']:>8.4f}s | "
+              f"legacy {row['legacy_s'] if row['legacy_s'] is not None else '-':>8} | "
+              f"speedup {row['speedup'] if row['speedup'] is not None else '-'}")
+        results.append(row)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the ledger engine")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--legacy-max', type=int, default=10_000,
+                        help="Largest size to also run (and parity-check) the iterrows() version on")
+    args = parser.parse_args()
+    run(args.sizes, args.legacy_max)
@@ -0,0 +1,100 @@
+"""
+Returns engine benchmark.
+Builds 20-year daily NAV series with monthly deposits / withdrawals for many
+users, then times the time-weighted returns and the batched XIRR solver (every
+user's since-inception XIRR, and every rolling 1-year window of one user) against
+solving one schedule at a time. TWR is checked against the generated returns and
+every XIRR against its own NPV.
+
+Run from the repo root:
+    python -m benchmarks.bench_returns
+    python -m benchmarks.bench_returns --years 20 --users 500 --window 252
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from market_calendar import trading_days
+from returns import (
+    cumulative_twr, time_weighted_returns, xirr_batch, pad_schedules, rolling_xirr, DAYS_PER_YEAR,
+)
+
+
+def make_nav(years, seed=0):
+    """(values, flows, true daily returns) on NYSE sessions; flows land before that day's return."""
+    rng = np.random.default_rng(seed)
+    dates = trading_days('2005-01-03', pd.Timestamp('2005-01-03') + pd.Timedelta(days=int(366 * years)))
+    dates = dates[:int(252 * years)]
+    r = rng.normal(0.0003, 0.012, len(dates))
+    r[0] = 0.0
+    flows = np.zeros(len(dates))
+    flows[0] = 10_000.0
+    month_starts = np.flatnonzero(np.diff(dates.month, prepend=0) != 0)[1:]
+    flows[month_starts] = rng.choice([500.0, 1000.0, -750.0], size=len(month_starts), p=[0.6, 0.3, 0.1])
+    values = np.empty(len(dates))
+    prev = 0.0
+    for i in range(len(dates)):
+        prev = (prev + flows[i]) * (1 + r[i])
+        values[i] = prev
+    return pd.Series(values, index=dates), pd.Series(flows, index=dates), r
+
+
+def _schedule(values, flows):
+    amounts = -flows.to_numpy().copy()
+    amounts[0] = -values.iloc[0]
+    amounts[-1] += values.iloc[-1]
+    return values.index, amounts
+
+
+def _npv_residual(dates, amounts, rate):
+    t = (pd.DatetimeIndex(dates) - dates[0]).days.to_numpy() / DAYS_PER_YEAR
+    return abs((amounts * (1 + rate) ** -t).sum()) / np.abs(amounts).sum()
+
+
+def run(years, n_users, window):
+    users = [make_nav(years, seed=i) for i in range(n_users)]
+    values, flows, true_r = users[0]
+    print(f"{n_users} users x {years}y daily ({len(values):,} sessions each)")
+
+    t0 = time.perf_counter()
+    for v, f, _ in users:
+        cumulative_twr(v, f)
+    t_twr = time.perf_counter() - t0
+    assert np.allclose(time_weighted_returns(values, flows).to_numpy(), true_r, atol=1e-12)
+    print(f"TWR, all users              {t_twr * 1000:9.1f} ms | matches generated returns")
+
+    schedules = [_schedule(v, f) for v, f, _ in users]
+    t0 = time.perf_counter()
+    batched = xirr_batch(*pad_schedules(schedules))
+    t_batch = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    single = [xirr_batch(*pad_schedules([s]))[0] for s in schedules]
+    t_loop = time.perf_counter() - t0
+    assert np.allclose(batched, single, rtol=1e-7, equal_nan=True)
+    worst = max(_npv_residual(d, a, r) for (d, a), r in zip(schedules, batched))
+    print(f"XIRR since inception, batch {t_batch * 1000:9.1f} ms | one at a time {t_loop * 1000:9.1f} ms | "
+          f"{t_loop / t_batch:5.1f}x | worst NPV residual {worst:.1e}")
+
+    t0 = time.perf_counter()
+    rolling = rolling_xirr(values, flows, window)
+    t_roll = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for end in range(window, len(values)):
+        sl = slice(end - window, end + 1)
+        d, a = _schedule(values.iloc[sl], flows.iloc[sl])
+        xirr_batch(*pad_schedules([(d, a)]))
+    t_roll_loop = time.perf_counter() - t0
+    print(f"rolling {window}-day XIRR, batch {t_roll * 1000:6.1f} ms | one at a time {t_roll_loop * 1000:9.1f} ms | "
+          f"{t_roll_loop / t_roll:5.1f}x | {len(rolling):,} windows, {rolling.isna().sum()} without an IRR")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark TWR and batched XIRR")
+    parser.add_argument('--years', type=int, default=20)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--window', type=int, default=252)
+    args = parser.parse_args()
+    run(args.years, args.users, args.window)
@@ -0,0 +1,116 @@
+"""
+Write-behind append benchmark.
+Adds a "Build Portfolio" worth of positions to a (fake) transactions tab the old
+way - one blocking append_row per position - and through the write-behind queue,
+then checks the queued rows landed in order. Further runs inject a 429 on the
+first append to show a rate-limited batch is retried ahead of later rows, and a
+503 returned after the rows were written to show the batch is parked as failed
+instead of being appended twice.
+
+Run from the repo root:
+    python -m benchmarks.bench_write_queue
+    python -m benchmarks.bench_write_queue --positions 30 --latency-ms 150
+"""
+
+import argparse
+import time
+
+from gspread.exceptions import APIError
+
+from fake_sheets import FakeClient, _FakeResponse
+from sheet_delta import TRANSACTION_HEADERS
+from write_queue import WriteBehindQueue
+
+
+def _rows(n, offset=0):
+    return [['2025-01-02', f"T{i:03d}", 'Initial', float(i + 1), 100.0 + i] for i in range(offset, offset + n)]
+
+
+def _tab(client):
+    ws = client.create("bench").add_worksheet("User_bench", rows=100, cols=5)
+    ws.append_row(TRANSACTION_HEADERS)
+    client.backend.reset_stats()
+    return ws
+
+
+def _values(ws):
+    return [[r[0], r[1], r[2], float(r[3]), float(r[4])] for r in ws.get_all_values()[1:]]
+
+
+def run(n_positions, latency):
+    rows = _rows(n_positions)
+
+    client = FakeClient(latency=latency)
+    ws = _tab(client)
+    t0 = time.perf_counter()
+    for row in rows:
+        ws.append_row(row)
+    blocking = time.perf_counter() - t0
+    sync_calls = client.backend.total_calls
+
+    client = FakeClient(latency=latency)
+    ws = _tab(client)
+    queue = WriteBehindQueue(flush_delay=0.05)
+    t0 = time.perf_counter()
+    queue.enqueue(ws, rows)
+    ui = time.perf_counter() - t0
+    queue.flush()
+    total = time.perf_counter() - t0
+    queued_calls = client.backend.total_calls
+    assert _values(ws) == rows, "Queued rows landed out of order"
+
+    print(f"{n_positions} positions, {latency * 1000:.0f} ms per call")
+    print(f"append_row each   UI blocked {blocking:8.3f}s | {sync_calls} calls")
+    print(f"write-behind      UI blocked {ui:8.4f}s | {queued_calls} call(s), written after {total:.3f}s | order ok")
+
+
+def run_retry(n_positions):
+    client = FakeClient()
+    ws = _tab(client)
+    real_append, failures = ws.append_rows, [1]
+
+    def rate_limited_append(values, **kwargs):
+        if failures:
+            failures.pop()
+            raise APIError(_FakeResponse(429, "Quota exceeded.", 'RESOURCE_EXHAUSTED'))
+        return real_append(values, **kwargs)
+
+    ws.append_rows = rate_limited_append
+    queue = WriteBehindQueue(flush_delay=0.0)
+    first, second = _rows(n_positions), _rows(n_positions, offset=n_positions)
+    queue.enqueue(ws, first)
+    queue.enqueue(ws, second)
+    queue.flush()
+    assert _values(ws) == first + second, "Retried batch was overtaken"
+    print(f"rate-limited 429  retried {queue.stats()['retries']}x, {len(first + second)} rows in order")
+
+
+def run_late_error(n_positions):
+    client = FakeClient()
+    ws = _tab(client)
+    real_append, failures = ws.append_rows, [1]
+
+    def applied_then_503(values, **kwargs):
+        result = real_append(values, **kwargs)
+        if failures:
+            failures.pop()
+            raise APIError(_FakeResponse(503, "The service is currently unavailable.", 'UNAVAILABLE'))
+        return result
+
+    ws.append_rows = applied_then_503
+    queue = WriteBehindQueue(flush_delay=0.0)
+    rows = _rows(n_positions)
+    queue.enqueue(ws, rows)
+    queue.flush()
+    assert _values(ws) == rows, "Batch was appended twice"
+    print(f"503 after write   not retried, {len(queue.failed(ws))} rows parked for review, no duplicates")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark write-behind appends")
+    parser.add_argument('--positions', type=int, default=30)
+    parser.add_argument('--latency-ms', type=float, default=150)
+    args = parser.parse_args()
+    run(args.positions, args.latency_ms / 1000)
+    run_retry(args.positions)
+    run_late_error(args.positions)
@@ -0,0 +1,87 @@
+"""
+Synthetic data generators for benchmarks and offline load tests.
+Everything is seeded so runs are comparable over time.
+"""
+
+import numpy as np
+import pandas as pd
+
+from market_calendar import trading_days
+
+
+def make_tickers(n_tickers):
+    return [f"T{i:03d}" for i in range(n_tickers)]
+
+
+def make_ledger(n_rows, n_tickers=50, years=10, seed=0, start='2015-01-01'):
+    """
+    Realistic mixed ledger: Initial positions first, then Buy/Sell/Deposit/Withdraw
+    spread over `years`. Sells are smaller than buys so most positions stay long.
+    """
+    rng = np.random.default_rng(seed)
+    tickers = np.array(make_tickers(n_tickers))
+    start = pd.Timestamp(start)
+
+    n_initial = min(n_tickers, max(n_rows // 20, 1))
+    n_rest = max(n_rows - n_initial, 0)
+    types = rng.choice(
+        ['Buy', 'Sell', 'Deposit Cash', 'Withdraw Cash'],
+        size=n_rest, p=[0.5, 0.25, 0.2, 0.05]
+    )
+    is_cash = np.isin(types, ['Deposit Cash', 'Withdraw Cash'])
+    is_sell = types == 'Sell'
+    offsets = np.sort(rng.integers(1, max(int(365 * years), 2), n_rest))
+
+    initial = pd.DataFrame({
+        'Date': start,
+        'Ticker': tickers[:n_initial],
+        'Type': 'Initial',
+        'Quantity': rng.integers(10, 100, n_initial).astype(float),
+        'Price': np.round(rng.uniform(20, 300, n_initial), 2),
+    })
+    rest = pd.DataFrame({
+        'Date': start + pd.to_timedelta(offsets, unit='D'),
+        'Ticker': np.where(is_cash, 'CASH', rng.choice(tickers, size=n_rest)),
+        'Type': types,
+        'Quantity': np.where(is_cash, 1.0, np.where(is_sell, rng.integers(1, 10, n_rest), rng.integers(5, 50, n_rest))).astype(float),
+        'Price': np.where(is_cash, np.round(rng.uniform(500, 5000, n_rest), 2), np.round(rng.uniform(5, 500, n_rest), 2)),
+    })
+    return pd.concat([initial, rest], ignore_index=True).head(n_rows)
+
+
+def make_price_panel(tickers, start, years, seed=0, missing=0.01):
+    """NYSE-session random-walk Close panel (dates x tickers) with a few missing cells."""
+    rng = np.random.default_rng(seed)
+    # NYSE trading days (weekends and exchange holidays excluded), like real downloads
+    dates = trading_days(start, pd.Timestamp(start) + pd.Timedelta(days=int(366 * years) + 30))[:int(252 * years)]
+    steps = rng.normal(0.0003, 0.015, size=(len(dates), len(tickers)))
+    panel = pd.DataFrame(100 * np.exp(np.cumsum(steps, axis=0)), index=dates, columns=list(tickers))
+    return panel.mask(rng.random(panel.shape) < missing)
+
+
+def make_metadata(tickers, seed=0):
+    rng = np.random.default_rng(seed)
+    sectors = ['Technology', 'Healthcare', 'Financial Services', 'Energy', 'Industrials', 'Consumer Cyclical']
+    return pd.DataFrame({
+        'Ticker': list(tickers),
+        'sector': rng.choice(sectors, size=len(tickers)),
+        'category': 'Unknown',
+        'name': list(tickers),
+        'currency': 'USD',
+    })
+
+
+def make_alert_rows(n_alerts, panel, seed=0, n_subscribers=3):
+    """
+    Rows for the shared Alerts sheet (fake_sheets.ALERT_HEADERS order).
+    Thresholds sit within +/-20% of each ticker's last close so a realistic share fire.
+    """
+    rng = np.random.default_rng(seed)
+    last = panel.ffill().iloc[-1].dropna()
+    tickers = rng.choice(last.index.to_numpy(), size=n_alerts)
+    direction = rng.choice(['Above', 'Below'], size=n_alerts)
+    target = np.round(last[tickers].to_numpy() * rng.uniform(0.8, 1.2, n_alerts), 2)
+    subs = [",".join(f"user{j}@example.com" for j in rng.choice(1000, size=n_subscribers, replace=False))
+            for _ in range(n_alerts)]
+    rows = [[t, float(p), d, s, 'Active', '', 'Never'] for t, p, d, s in zip(tickers, target, direction, subs)]
+    return rows
@@ -0,0 +1,208 @@
+"""
+Reference (row-by-row) implementations kept for benchmarking and parity checks.
+These are the original iterrows() versions from portfolio_logic.py.
+"""
+
+import pandas as pd
+
+# --- 1. Cash Balance ---
+def legacy_cash_balance(transactions_df):
+    cash = 0.0
+    if transactions_df.empty:
+        return cash
+        
+    for _, row in transactions_df.iterrows():
+        t_type = str(row['Type']).strip()
+        try:
+            price = float(row['Price'])
+            quantity = float(row['Quantity'])
+        except:
+            price = 0.0
+            quantity = 0.0
+
+        if t_type == 'Deposit Cash':
+            cash += price
+        elif t_type == 'Withdraw Cash':
+            cash -= price
+        elif t_type == 'Buy':
+            cash -= quantity * price
+        elif t_type == 'Sell':
+            cash += quantity * price
+        elif t_type == 'Initial':
+            # Initial Setup does not affect cash balance
+            pass
+    
+    return cash
+
+# --- 2. Holdings ---
+def legacy_current_holdings(transactions_df):
+    holdings = {}
+    if transactions_df.empty:
+        return pd.DataFrame()
+    
+    # Include 'Initial' as a valid holding acquisition
+    stock_transactions = transactions_df[
+        transactions_df['Type'].isin(['Buy', 'Sell', 'Initial'])
+    ].copy()
+    
+    for _, row in stock_transactions.iterrows():
+        ticker = str(row['Ticker']).strip().upper()
+        
+        if ticker not in holdings:
+            holdings[ticker] = {
+                'total_qty': 0.0,
+                'total_cost': 0.0,
+                'first_buy_date': None
+            }
+        
+        qty = float(row['Quantity'])
+        price = float(row['Price'])
+        t_type = str(row['Type']).strip()
+
+        t_type = str(row['Type']).strip()
+        
+        # 'Initial' behaves exactly like 'Buy' for holdings calculations
+        if t_type == 'Buy' or t_type == 'Initial':
+            holdings[ticker]['total_qty'] += qty
+            holdings[ticker]['total_cost'] += qty * price
+            
+            current_date = pd.to_datetime(row['Date'])
+            if holdings[ticker]['first_buy_date'] is None:
+                holdings[ticker]['first_buy_date'] = current_date
+            else:
+                if holdings[ticker]['first_buy_date'] is not None:
+                    holdings[ticker]['first_buy_date'] = min(
+                        holdings[ticker]['first_buy_date'],
+                        current_date
+                    )
+        
+        elif t_type == 'Sell':
+            holdings[ticker]['total_qty'] -= qty
+            if holdings[ticker]['total_qty'] > 0:
+                avg_price = holdings[ticker]['total_cost'] / (holdings[ticker]['total_qty'] + qty)
+                holdings[ticker]['total_cost'] = holdings[ticker]['total_qty'] * avg_price
+            else:
+                holdings[ticker]['total_cost'] = 0
+    
+    holdings_list = []
+    for ticker, data in holdings.items():
+        if data['total_qty'] > 0.0001:
+            holdings_list.append({
+                'Ticker': ticker,
+                'Qty': data['total_qty'],
+                'Avg_Buy_Price': data['total_cost'] / data['total_qty'],
+                'First_Buy_Date': data['first_buy_date']
+            })
+    
+    return pd.DataFrame(holdings_list) if holdings_list else pd.DataFrame()
+
+# --- 3. Total Deposited (from calculate_portfolio_metrics) ---
+def legacy_total_deposited(transactions_df):
+    total_deposited = 0.0
+    if not transactions_df.empty:
+        for _, r in transactions_df.iterrows():
+            t_type = str(r['Type']).strip()
+            try:
+                price = float(r['Price'])
+                quantity = float(r['Quantity']) if 'Quantity' in r else 0.0
+            except:
+                price = 0.0
+                quantity = 0.0
+                
+            if t_type == 'Deposit Cash': 
+                total_deposited += price
+            elif t_type == 'Withdraw Cash': 
+                total_deposited -= price
+            elif t_type == 'Initial':
+                total_deposited += (quantity * price)
+    return total_deposited
+
+
+# --- 4. Historical Value (day-by-day loop from calculate_historical_portfolio_value) ---
+def legacy_portfolio_history(transactions_df, price_data, start_date):
+    """Steps 4-5 of the original function, given the already-downloaded Close panel."""
+    price_data = price_data.copy()
+    # 4. Reconstruct Portfolio Value Day by Day
+    # Handle timezone issues
+    price_data.index = price_data.index.tz_localize(None)
+    dates = price_data.index
+    
+    trans_sorted = transactions_df.sort_values('Date')
+    history_records = []
+    
+    for date in dates:
+        # Ignore dates before our actual requested start (due to the 10-day buffer)
+        if date < pd.to_datetime(start_date):
+            continue
+
+        # Transactions up to this day
+        current_trans = trans_sorted[trans_sorted['Date'] <= date]
+        
+        if current_trans.empty:
+            continue
+            
+        cash = legacy_cash_balance(current_trans)
+        holdings = legacy_current_holdings(current_trans)
+        
+        portfolio_val = cash
+        
+        if not holdings.empty:
+            for _, row in holdings.iterrows():
+                t = row['Ticker']
+                q = row['Qty']
+                
+                # Check if we have price data for this ticker
+                if t in price_data.columns:
+                    price = price_data.loc[date, t]
+                    
+                    # Fix NaNs (Forward Fill logic manually)
+                    if pd.isna(price):
+                        # Look at previous 5 days
+                        prev_days = price_data[t].loc[:date].tail(6)[:-1] # Exclude current
+                        if not prev_days.empty:
+                             valid_prev = prev_days.dropna()
+                             if not valid_prev.empty:
+                                 price = valid_prev.iloc[-1]
+                             else:
+                                 price = 0.0
+                        else:
+                             price = 0.0
+                    
+                    portfolio_val += float(q) * float(price)
+        
+        # Get SPY value
+        spy_val = 0.0
+        if 'SPY' in price_data.columns:
+            spy_val = price_data.loc[date, 'SPY']
+            if pd.isna(spy_val):
+                 valid_spy = price_data['SPY'].loc[:date].dropna()
+                 if not valid_spy.empty:
+                     spy_val = valid_spy.iloc[-1]
+
+        history_records.append({
+            'Date': date,
+            'Portfolio_Value': portfolio_val,
+            'SPY_Price': spy_val
+        })
+    
+    # 5. Final Output
+    history_df = pd.DataFrame(history_records)
+    
+    if history_df.empty:
+        return pd.DataFrame()
+
+    # Normalize to Percentage Return (Starting at 0%)
+    initial_port = history_df['Portfolio_Value'].iloc[0]
+    initial_spy = history_df['SPY_Price'].iloc[0]
+    
+    if initial_port > 0:
+        history_df['Portfolio_Return_%'] = (history_df['Portfolio_Value'] - initial_port) / initial_port * 100
+    else:
+        history_df['Portfolio_Return_%'] = 0.0
+        
+    if initial_spy > 0:
+        history_df['SPY_Return_%'] = (history_df['SPY_Price'] - initial_spy) / initial_spy * 100
+    else:
+        history_df['SPY_Return_%'] = 0.0
+        
+    return history_df
@@ -0,0 +1,199 @@
+"""
+Benchmark Suite
+Times and memory-profiles the core portfolio functions at several scales against
+synthetic ledgers, a synthetic price panel (LocalFileProvider) and the in-memory
+Sheets stand-in. Results go to JSON so runs can be compared over time.
+
+Run from the repo root:
+    python -m benchmarks.run
+    python -m benchmarks.run --scales small medium --repeat 5
+    python -m benchmarks.run --compare benchmarks/results/<previous>.json
+"""
+
+import os
+import tempfile
+
+# Keep benchmark caches away from the real .cache/ (must be set before the stores are imported)
+os.environ.setdefault('PORTFOLIO_CACHE_DIR', tempfile.mkdtemp(prefix='portfolio-bench-cache-'))
+
+import argparse
+import json
+import platform
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from fake_sheets import FakeClient, seed_demo_workbook
+from price_provider import LocalFileProvider, save_fixtures, set_price_provider
+from portfolio_logic import (
+    calculate_cash_balance,
+    get_current_holdings,
+    fetch_live_prices,
+    build_portfolio_table,
+    calculate_portfolio_metrics,
+    calculate_historical_portfolio_value,
+    process_alerts,
+)
+from benchmarks.generators import make_ledger, make_price_panel, make_metadata, make_alert_rows, make_tickers
+
+SCALES = {
+    'small': {'rows': 1_000, 'tickers': 10, 'alerts': 100},
+    'medium': {'rows': 10_000, 'tickers': 50, 'alerts': 1_000},
+    'large': {'rows': 100_000, 'tickers': 200, 'alerts': 5_000},
+}
+YEARS = 10
+PANEL_START = '2015-01-01'
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+
+def _time(func, repeat, setup=None):
+    """Returns (min, mean) seconds over `repeat` runs; setup() runs untimed before each."""
+    times = []
+    for _ in range(repeat):
+        args = setup() if setup else ()
+        t0 = time.perf_counter()
+        func(*args)
+        times.append(time.perf_counter() - t0)
+    return min(times), sum(times) / len(times)
+
+
+def _peak_mb(func, setup=None):
+    args = setup() if setup else ()
+    tracemalloc.start()
+    try:
+        func(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024 / 1024
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return None
+
+
+def prepare_prices(max_tickers):
+    """One panel for every scale (same tickers, same values), served offline."""
+    tickers = make_tickers(max_tickers) + ['SPY']
+    panel = make_price_panel(tickers, PANEL_START, YEARS)
+    fixtures_dir = tempfile.mkdtemp(prefix='portfolio-bench-fixtures-')
+    save_fixtures(fixtures_dir, panel, make_metadata(tickers))
+    set_price_provider(LocalFileProvider(fixtures_dir))
+    return panel
+
+
+def bench_scale(name, cfg, panel, repeat):
+    df = make_ledger(cfg['rows'], n_tickers=cfg['tickers'], years=YEARS, start=PANEL_START)
+    # Ledger dates must fall on the panel's calendar range
+    df = df[df['Date'] <= panel.index[-1]].reset_index(drop=True)
+
+    cash = calculate_cash_balance(df)
+    holdings = get_current_holdings(df)
+    prices = fetch_live_prices(holdings['Ticker'].tolist()) if not holdings.empty else {}
+    port_df = build_portfolio_table(holdings, prices, cash)
+    start = df['Date'].min()
+
+    # Cold history load (fills the local price store); the timed runs below are warm
+    t0 = time.perf_counter()
+    calculate_historical_portfolio_value(df, start)
+    history_cold = time.perf_counter() - t0
+
+    client = FakeClient()
+    alert_rows = make_alert_rows(cfg['alerts'], panel[make_tickers(cfg['tickers'])])
+
+    def alerts_setup():
+        client.backend.spreadsheets.clear()
+        sh = seed_demo_workbook(client, 'bench', alerts=alert_rows)
+        client.backend.reset_stats()
+        return (sh, {})
+
+    cases = [
+        ('calculate_cash_balance', lambda: calculate_cash_balance(df), None),
+        ('get_current_holdings', lambda: get_current_holdings(df), None),
+        ('build_portfolio_table', lambda: build_portfolio_table(holdings, prices, cash), None),
+        ('calculate_portfolio_metrics', lambda: calculate_portfolio_metrics(port_df, cash, df), None),
+        ('calculate_historical_portfolio_value', lambda: calculate_historical_portfolio_value(df, start), None),
+        ('process_alerts', lambda sh, creds: process_alerts(sh, creds), alerts_setup),
+    ]
+
+    results = []
+    for func_name, func, setup in cases:
+        t_min, t_mean = _time(func, repeat, setup)
+        peak = _peak_mb(func, setup)
+        row = {
+            'scale': name,
+            'function': func_name,
+            'rows': len(df),
+            'tickers': cfg['tickers'],
+            'min_s': round(t_min, 6),
+            'mean_s': round(t_mean, 6),
+            'peak_mb': round(peak, 3),
+        }
+        if func_name == 'calculate_historical_portfolio_value':
+            row['cold_s'] = round(history_cold, 6)
+        if func_name == 'process_alerts':
+            row['alerts'] = cfg['alerts']
+            row['sheets_calls'] = client.backend.total_calls
+        results.append(row)
+        print(f"  {func_name:<38} min {t_min * 1000:>10.2f} ms | mean {t_mean * 1000:>10.2f} ms | peak {peak:>8.2f} MB")
+    return results
+
+
+def compare(results, previous_path):
+    with open(previous_path) as f:
+        previous = {(r['scale'], r['function']): r for r in json.load(f)['results']}
+    print(f"\nCompared with {previous_path}:")
+    for r in results:
+        old = previous.get((r['scale'], r['function']))
+        if not old or not old['min_s']:
+            continue
+        ratio = r['min_s'] / old['min_s']
+        print(f"  {r['scale']:<7} {r['function']:<38} {old['min_s'] * 1000:>10.2f} -> {r['min_s'] * 1000:>10.2f} ms ({ratio:.2f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the portfolio benchmark suite")
+    parser.add_argument('--scales', nargs='+', choices=list(SCALES), default=['small', 'medium'])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--out', default=None, help="JSON output path (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument('--compare', default=None, help="Previous results JSON to compare against")
+    args = parser.parse_args()
+
+    panel = prepare_prices(max(SCALES[s]['tickers'] for s in args.scales))
+    results = []
+    for name in args.scales:
+        print(f"[{name}] {SCALES[name]}")
+        results.extend(bench_scale(name, SCALES[name], panel, args.repeat))
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'repeat': args.repeat,
+            'years': YEARS,
+        },
+        'results': results,
+    }
+    out = args.out or os.path.join(RESULTS_DIR, f"{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(out) or '.', exist_ok=True)
+    with open(out, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {out}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Local SMTP stand-in for dispatch benchmarks.
+Speaks just enough plain SMTP for smtplib (EHLO, AUTH, MAIL, RCPT, DATA, RSET, QUIT)
+and records what it receives. `handshake_delay` is slept once per connection to
+stand in for the TLS handshake + login round trips of a real provider.
+"""
+
+import socketserver
+import threading
+import time
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def _reply(self, line):
+        self.wfile.write((line + "\r\n").encode())
+
+    def handle(self):
+        stub = self.server.stub
+        stub.count('connections')
+        time.sleep(stub.handshake_delay)
+        self._reply("220 localhost stub ready")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            cmd = line.decode(errors='replace').strip()
+            verb = cmd.split(' ', 1)[0].upper()
+            if verb in ('EHLO', 'HELO'):
+                self._reply("250-localhost")
+                self._reply("250 AUTH PLAIN LOGIN")
+            elif verb == 'AUTH':
+                stub.count('logins')
+                self._reply("235 Authentication successful")
+            elif verb in ('MAIL', 'RCPT', 'RSET', 'NOOP'):
+                if verb == 'RCPT':
+                    stub.count('recipients')
+                self._reply("250 OK")
+            elif verb == 'DATA':
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+                while self.rfile.readline() not in (b".\r\n", b".\n", b""):
+                    pass
+                time.sleep(stub.message_delay)
+                stub.count('messages')
+                self._reply("250 OK queued")
+            elif verb == 'QUIT':
+                self._reply("221 Bye")
+                return
+            else:
+                self._reply("502 Command not implemented")
+
+
+class SMTPStub:
+    def __init__(self, handshake_delay=0.0, message_delay=0.0):
+        self.handshake_delay = handshake_delay
+        self.message_delay = message_delay
+        self.counts = {'connections': 0, 'logins': 0, 'messages': 0, 'recipients': 0}
+        self._lock = threading.Lock()
+        self._server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), _Handler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self.port = self._server.server_address[1]
+
+    def count(self, name):
+        with self._lock:
+            self.counts[name] += 1
+
+    def reset(self):
+        with self._lock:
+            self.counts = {k: 0 for k in self.counts}
+
+    def __enter__(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
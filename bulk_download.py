@@ -0,0 +1,123 @@
+"""
+Bulk History Download
+Splits a large ticker universe into chunks, fetches them through a bounded
+worker pool under one shared rate limit, re-requests only the tickers that got
+no answer (request error or missing column) and merges everything into one
+aligned dates x tickers Close panel. A bad chunk no longer empties the whole
+download. An all-NaN column is an answer (no data in the range, e.g. before an
+IPO) and is not retried, so fetch functions must leave out tickers whose own
+request failed (see price_provider.drop_raised).
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+DOWNLOAD_CHUNK_SIZE = int(os.getenv('PRICE_DOWNLOAD_CHUNK', 25))
+DOWNLOAD_WORKERS = int(os.getenv('PRICE_DOWNLOAD_WORKERS', 4))
+DOWNLOAD_RATE = float(os.getenv('PRICE_DOWNLOAD_RATE', 2.0))  # chunk requests per second, all workers
+
+
+class RateLimiter:
+    """Spaces request starts at least 1/rate seconds apart across threads (rate 0 = unlimited)."""
+
+    def __init__(self, rate, clock=time.monotonic, sleep=time.sleep):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._clock = clock
+        self._sleep = sleep
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = self._clock()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            self._sleep(start - now)
+
+
+def chunked(items, size):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+class BulkDownloader:
+    def __init__(self, fetch, chunk_size=DOWNLOAD_CHUNK_SIZE, max_workers=DOWNLOAD_WORKERS, rate=DOWNLOAD_RATE,
+                 retries=2, retry_delay=1.0, sleep=time.sleep):
+        """
+        fetch: callable(tickers, start, end) -> dates x tickers Close frame for one request
+        retries: extra rounds for the tickers that got no answer, after retry_delay * 2**round seconds
+        """
+        self.fetch = fetch
+        self.chunk_size = max(1, chunk_size)
+        self.max_workers = max(1, max_workers)
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self._sleep = sleep
+        self._limiter = RateLimiter(rate, sleep=sleep)
+        self._lock = threading.Lock()
+        self.last_stats = {}
+
+    def _fetch_chunk(self, chunk, start, end):
+        self._limiter.wait()
+        try:
+            return chunk, self.fetch(chunk, start, end)
+        except Exception as e:
+            print(f"History chunk failed ({len(chunk)} tickers from {chunk[0]}): {e}")
+            return chunk, None
+
+    def download(self, tickers, start, end):
+        """
+        Aligned dates x tickers Close panel (union of dates, columns in request order).
+        Tickers that never got an answer are left out, so callers can tell them from
+        tickers that simply have no data in the range (all-NaN column).
+        """
+        tickers = list(dict.fromkeys(tickers))
+        if not tickers:
+            return pd.DataFrame()
+
+        series = {}
+        todo = tickers
+        requests = 0
+        rounds = 0
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self._sleep(self.retry_delay * 2 ** (attempt - 1))
+            chunks = chunked(todo, self.chunk_size)
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(chunks)),
+                                    thread_name_prefix='history-download') as pool:
+                results = list(pool.map(lambda chunk: self._fetch_chunk(chunk, start, end), chunks))
+            requests += len(chunks)
+            rounds += 1
+
+            failed = []
+            for chunk, frame in results:
+                for ticker in chunk:
+                    if frame is None or ticker not in frame.columns:
+                        failed.append(ticker)
+                        continue
+                    column = frame[ticker]
+                    if isinstance(column, pd.DataFrame):  # duplicate labels in a malformed answer
+                        column = column.iloc[:, 0]
+                    series[ticker] = column
+            todo = failed
+            if not todo:
+                break
+
+        with self._lock:
+            self.last_stats = {
+                'tickers': len(tickers),
+                'requests': requests,
+                'rounds': rounds,
+                'failed': todo,
+                'empty': [t for t in tickers if t in series and series[t].isna().all()],
+            }
+
+        if not series:
+            return pd.DataFrame()
+        panel = pd.concat([series[t].rename(t) for t in tickers if t in series], axis=1, sort=True)
+        panel.index = pd.to_datetime(panel.index)
+        return panel.sort_index().dropna(how='all')
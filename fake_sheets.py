@@ -0,0 +1,463 @@
+"""
+In-Memory Google Sheets Stand-in
+Implements the subset of gspread used by PortfolioManager, app.py, portfolio_logic.py
+and alerts.py, with per-call latency, quota errors and API call counters.
+Used for tests, benchmarks and offline runs (FAKE_SHEETS=1).
+"""
+
+import itertools
+import os
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime, timedelta
+
+from gspread.cell import Cell
+from gspread.exceptions import APIError, SpreadsheetNotFound, WorksheetNotFound
+from gspread.utils import a1_range_to_grid_range, a1_to_rowcol, numericise_all
+
+_ids = itertools.count(1000)
+
+
+class _FakeResponse:
+    """Just enough of a requests.Response for gspread's APIError."""
+    def __init__(self, code, message, status):
+        self.status_code = code
+        self.text = message
+        self._error = {'error': {'code': code, 'message': message, 'status': status}}
+
+    def json(self):
+        return self._error
+
+
+def _cell_value(cell):
+    """Plain value of a CellData dict ({'userEnteredValue': {'numberValue': 1.5}})."""
+    value = cell.get('userEnteredValue') or {}
+    for kind in ('numberValue', 'stringValue', 'boolValue', 'formulaValue'):
+        if kind in value:
+            return value[kind]
+    return ''
+
+
+class FakeBackend:
+    """
+    Shared state and call accounting for one fake Google account.
+    latency: seconds slept per API call
+    quota_per_minute: calls allowed per rolling 60s before a 429 APIError (None = unlimited)
+    """
+    def __init__(self, latency=0.0, quota_per_minute=None):
+        self.latency = latency
+        self.quota_per_minute = quota_per_minute
+        self.spreadsheets = {}
+        self.calls = Counter()
+        self.quota_errors = 0
+        self.api_time = 0.0
+        self._recent = deque()
+        self._lock = threading.RLock()
+
+    def record(self, method):
+        """Counts one API call; sleeps for latency; raises 429 when over quota."""
+        with self._lock:
+            now = time.time()
+            if self.quota_per_minute is not None:
+                while self._recent and now - self._recent[0] > 60:
+                    self._recent.popleft()
+                if len(self._recent) >= self.quota_per_minute:
+                    self.quota_errors += 1
+                    raise APIError(_FakeResponse(429, "Quota exceeded for quota metric 'Read/Write requests'", 'RESOURCE_EXHAUSTED'))
+                self._recent.append(now)
+            self.calls[method] += 1
+            self.api_time += self.latency
+        if self.latency:
+            time.sleep(self.latency)
+
+    @property
+    def total_calls(self):
+        return sum(self.calls.values())
+
+    def reset_stats(self):
+        with self._lock:
+            self.calls.clear()
+            self.quota_errors = 0
+            self.api_time = 0.0
+            self._recent.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'total_calls': self.total_calls, 'calls': dict(self.calls),
+                    'quota_errors': self.quota_errors, 'api_time': round(self.api_time, 4)}
+
+
+class FakeWorksheet:
+    def __init__(self, spreadsheet, title, rows=1000, cols=26, sheet_id=None):
+        self.spreadsheet = spreadsheet
+        self.title = title
+        self.id = sheet_id if sheet_id is not None else next(_ids)
+        self.row_count = int(rows)
+        self.col_count = int(cols)
+        self._rows = []
+        self.updated_at = datetime.now()
+
+    @property
+    def _backend(self):
+        return self.spreadsheet.client.backend
+
+    def _touch(self):
+        self.updated_at = datetime.now()
+        self.spreadsheet._touch()
+
+    def _ensure(self, row, col):
+        while len(self._rows) < row:
+            self._rows.append([])
+        r = self._rows[row - 1]
+        while len(r) < col:
+            r.append('')
+        self.row_count = max(self.row_count, row)
+        self.col_count = max(self.col_count, col)
+
+    def _get(self, row, col):
+        if row - 1 < len(self._rows) and col - 1 < len(self._rows[row - 1]):
+            return self._rows[row - 1][col - 1]
+        return ''
+
+    def _set(self, row, col, value):
+        self._ensure(row, col)
+        self._rows[row - 1][col - 1] = value
+
+    def _last_row(self):
+        for i in range(len(self._rows), 0, -1):
+            if any(v not in ('', None) for v in self._rows[i - 1]):
+                return i
+        return 0
+
+    # --- Reads ---
+    def get_all_values(self):
+        self._backend.record('values.get')
+        return [list(r) for r in self._rows[:self._last_row()]]
+
+    def get_all_records(self, **kwargs):
+        self._backend.record('values.get')
+        rows = [list(r) for r in self._rows[:self._last_row()]]
+        if not rows:
+            return []
+        headers = rows[0]
+        width = len(headers)
+        records = []
+        for r in rows[1:]:
+            r = (r + [''] * width)[:width]
+            records.append(dict(zip(headers, numericise_all([str(v) if v is not None else '' for v in r],
+                                                             empty2zero=kwargs.get('empty2zero', False),
+                                                             default_blank=kwargs.get('default_blank', '')))))
+        return records
+
+    def row_values(self, row):
+        self._backend.record('values.get')
+        values = list(self._rows[row - 1]) if row - 1 < len(self._rows) else []
+        while values and values[-1] in ('', None):
+            values.pop()
+        return values
+
+    def col_values(self, col):
+        self._backend.record('values.get')
+        values = [self._get(r, col) for r in range(1, self._last_row() + 1)]
+        while values and values[-1] in ('', None):
+            values.pop()
+        return values
+
+    def cell(self, row, col):
+        self._backend.record('values.get')
+        return Cell(row, col, self._get(row, col))
+
+    def range(self, name):
+        self._backend.record('values.get')
+        grid = a1_range_to_grid_range(name)
+        return [Cell(r + 1, c + 1, self._get(r + 1, c + 1))
+                for r in range(grid.get('startRowIndex', 0), grid.get('endRowIndex', self._last_row()))
+                for c in range(grid.get('startColumnIndex', 0), grid.get('endColumnIndex', self.col_count))]
+
+    # --- Writes ---
+    def append_row(self, values, **kwargs):
+        self._backend.record('values.append')
+        self._append([values])
+
+    def append_rows(self, values, **kwargs):
+        self._backend.record('values.append')
+        self._append(values)
+
+    def _append(self, rows):
+        start = self._last_row() + 1
+        for offset, values in enumerate(rows):
+            for c, v in enumerate(values, start=1):
+                self._set(start + offset, c, v)
+        self._touch()
+
+    def update_cell(self, row, col, value):
+        self._backend.record('values.update')
+        self._set(row, col, value)
+        self._touch()
+
+    def update_cells(self, cell_list, **kwargs):
+        self._backend.record('values.update')
+        for cell in cell_list:
+            self._set(cell.row, cell.col, cell.value)
+        self._touch()
+
+    def _write_range(self, range_name, values):
+        row, col = a1_to_rowcol(range_name.split(':')[0].split('!')[-1])
+        for r_off, r_values in enumerate(values):
+            for c_off, v in enumerate(r_values):
+                self._set(row + r_off, col + c_off, v)
+
+    def update(self, range_name=None, values=None, **kwargs):
+        self._backend.record('values.update')
+        # gspread accepts both update('A1', values) and update(values, 'A1')
+        if isinstance(range_name, list):
+            range_name, values = (values or 'A1'), range_name
+        self._write_range(range_name or 'A1', values or [])
+        self._touch()
+
+    def batch_update(self, data, **kwargs):
+        """Several range writes in one values.batchUpdate call."""
+        self._backend.record('values.batchUpdate')
+        for item in data:
+            self._write_range(item['range'], item['values'])
+        self._touch()
+
+    def batch_clear(self, ranges):
+        self._backend.record('values.batchClear')
+        for name in ranges:
+            for cell in self._cells_in(name):
+                self._set(cell[0], cell[1], '')
+        self._touch()
+
+    def _cells_in(self, name):
+        grid = a1_range_to_grid_range(name)
+        return [(r + 1, c + 1)
+                for r in range(grid.get('startRowIndex', 0), grid.get('endRowIndex', self._last_row()))
+                for c in range(grid.get('startColumnIndex', 0), grid.get('endColumnIndex', self.col_count))]
+
+    def clear(self):
+        self._backend.record('values.clear')
+        self._rows = []
+        self._touch()
+
+    def delete_rows(self, start_index, end_index=None):
+        self._backend.record('batchUpdate')
+        self._delete_rows(start_index, end_index or start_index)
+        self._touch()
+
+    def _delete_rows(self, start_index, end_index):
+        del self._rows[start_index - 1:end_index]
+        self.row_count = max(self.row_count - (end_index - start_index + 1), len(self._rows))
+
+    def resize(self, rows=None, cols=None):
+        self._backend.record('batchUpdate')
+        if rows is not None:
+            self.row_count = int(rows)
+            del self._rows[self.row_count:]
+        if cols is not None:
+            self.col_count = int(cols)
+            self._rows = [r[:self.col_count] for r in self._rows]
+
+
+class FakeSpreadsheet:
+    def __init__(self, client, key, title):
+        self.client = client
+        self.id = key
+        self.title = title
+        self._worksheets = []
+        self.lastUpdateTime = datetime.now().isoformat()
+
+    def _touch(self):
+        self.lastUpdateTime = datetime.now().isoformat()
+
+    def get_lastUpdateTime(self):
+        """Drive files.get (modifiedTime): the revision check used to skip unchanged re-reads."""
+        self.client.backend.record('drive.files.get')
+        return self.lastUpdateTime
+
+    def worksheets(self):
+        self.client.backend.record('spreadsheets.get')
+        return list(self._worksheets)
+
+    def worksheet(self, title):
+        self.client.backend.record('spreadsheets.get')
+        for ws in self._worksheets:
+            if ws.title == title:
+                return ws
+        raise WorksheetNotFound(title)
+
+    def get_worksheet(self, index):
+        self.client.backend.record('spreadsheets.get')
+        return self._worksheets[index] if index < len(self._worksheets) else None
+
+    def get_worksheet_by_id(self, sheet_id):
+        self.client.backend.record('spreadsheets.get')
+        return self._by_id(sheet_id)
+
+    def _by_id(self, sheet_id):
+        for ws in self._worksheets:
+            if str(ws.id) == str(sheet_id):
+                return ws
+        raise WorksheetNotFound(sheet_id)
+
+    def add_worksheet(self, title, rows, cols, sheet_id=None, **kwargs):
+        self.client.backend.record('batchUpdate')
+        if any(ws.title == title for ws in self._worksheets):
+            raise APIError(_FakeResponse(400, f'A sheet with the name "{title}" already exists.', 'INVALID_ARGUMENT'))
+        ws = FakeWorksheet(self, title, rows, cols, sheet_id=sheet_id)
+        self._worksheets.append(ws)
+        self._touch()
+        return ws
+
+    def del_worksheet(self, worksheet):
+        self.client.backend.record('batchUpdate')
+        self._worksheets.remove(worksheet)
+        self._touch()
+
+    def batch_update(self, body):
+        """
+        Structural requests, applied in order: deleteDimension (rows), updateCells and
+        appendCells (values only); formatting is accepted as a no-op.
+        """
+        self.client.backend.record('batchUpdate')
+        for request in body.get('requests', []):
+            delete = request.get('deleteDimension')
+            if delete and delete['range'].get('dimension', 'ROWS') == 'ROWS':
+                rng = delete['range']
+                ws = self._by_id(rng['sheetId'])
+                ws._delete_rows(rng['startIndex'] + 1, rng['endIndex'])
+            update = request.get('updateCells')
+            if update and 'start' in update:
+                start = update['start']
+                ws = self._by_id(start['sheetId'])
+                for r_off, row in enumerate(update.get('rows', [])):
+                    for c_off, cell in enumerate(row.get('values', [])):
+                        ws._set(start.get('rowIndex', 0) + r_off + 1, start.get('columnIndex', 0) + c_off + 1, _cell_value(cell))
+            append = request.get('appendCells')
+            if append:
+                ws = self._by_id(append['sheetId'])
+                ws._append([[_cell_value(cell) for cell in row.get('values', [])] for row in append.get('rows', [])])
+        self._touch()
+        return {'replies': [{} for _ in body.get('requests', [])]}
+
+    def values_batch_update(self, body):
+        """Several 'Sheet!A1' range writes in one call."""
+        self.client.backend.record('values.batchUpdate')
+        for item in body.get('data', []):
+            title, _, rng = item['range'].rpartition('!')
+            ws = next(w for w in self._worksheets if w.title == title.strip("'"))
+            ws._write_range(rng, item['values'])
+            ws._touch()
+        return {}
+
+
+class FakeClient:
+    """
+    Stand-in for gspread.Client.
+    autoseed: opening an unknown key/title creates the demo workbook instead of failing.
+    """
+    def __init__(self, backend=None, latency=0.0, quota_per_minute=None, autoseed=False):
+        self.backend = backend or FakeBackend(latency=latency, quota_per_minute=quota_per_minute)
+        self.autoseed = autoseed
+
+    def create(self, title, key=None):
+        self.backend.record('files.create')
+        key = key or f"fake-{next(_ids)}"
+        sh = FakeSpreadsheet(self, key, title)
+        self.backend.spreadsheets[key] = sh
+        return sh
+
+    def open_by_key(self, key):
+        self.backend.record('spreadsheets.get')
+        if key not in self.backend.spreadsheets:
+            if not self.autoseed:
+                raise SpreadsheetNotFound(key)
+            seed_demo_workbook(self, key)
+        return self.backend.spreadsheets[key]
+
+    def open(self, title):
+        self.backend.record('files.list')
+        for sh in self.backend.spreadsheets.values():
+            if sh.title == title:
+                return sh
+        if self.autoseed:
+            return seed_demo_workbook(self, f"fake-{title}", title=title)
+        raise SpreadsheetNotFound(title)
+
+    def list_spreadsheet_files(self, title=None):
+        self.backend.record('files.list')
+        return [{'id': sh.id, 'name': sh.title} for sh in self.backend.spreadsheets.values()
+                if title is None or sh.title == title]
+
+
+# --- Demo Workbook ---
+USERS_SHEET_GID = 1266209882
+ALERT_HEADERS = ["Ticker", "Target Price", "Direction", "Subscribers", "Status", "Note", "Last Checked"]
+
+
+def seed_demo_workbook(client, key, title='Portfolio Tracker', username='demo', password='demo',
+                       email='demo@example.com', transactions=None, alerts=None):
+    """
+    Creates the workbook layout the app expects: users DB (GID 1266209882),
+    one user's transaction tab and the shared Alerts sheet.
+    Seeding is not counted as API traffic (no latency, no quota).
+    """
+    backend = client.backend
+    latency, quota = backend.latency, backend.quota_per_minute
+    calls, quota_errors, api_time = Counter(backend.calls), backend.quota_errors, backend.api_time
+    backend.latency, backend.quota_per_minute = 0.0, None
+    try:
+        return _seed(client, key, title, username, password, email, transactions, alerts)
+    finally:
+        backend.latency, backend.quota_per_minute = latency, quota
+        backend.calls, backend.quota_errors, backend.api_time = calls, quota_errors, api_time
+
+
+def _seed(client, key, title, username, password, email, transactions, alerts):
+    sh = client.create(title, key=key)
+    users = sh.add_worksheet("Users", rows=100, cols=4, sheet_id=USERS_SHEET_GID)
+    users.append_row(["Username", "Password", "Sheet_ID", "Email"])
+    users.append_row([username, password, f"User_{username}", email])
+
+    user_tab = sh.add_worksheet(f"User_{username}", rows=100, cols=5)
+    user_tab.append_row(["Date", "Ticker", "Type", "Quantity", "Price"])
+    if transactions is None:
+        start = datetime.now() - timedelta(days=400)
+        transactions = [
+            [start.strftime('%Y-%m-%d'), 'CASH', 'Deposit Cash', 1, 20000],
+            [(start + timedelta(days=1)).strftime('%Y-%m-%d'), 'AAPL', 'Buy', 20, 150],
+            [(start + timedelta(days=1)).strftime('%Y-%m-%d'), 'MSFT', 'Buy', 10, 300],
+        ]
+    if transactions:
+        user_tab.append_rows(transactions)
+
+    alerts_ws = sh.add_worksheet("Alerts", rows=100, cols=len(ALERT_HEADERS))
+    alerts_ws.append_row(ALERT_HEADERS)
+    if alerts:
+        alerts_ws.append_rows(alerts)
+    return sh
+
+
+# --- Process-wide fake account (FAKE_SHEETS=1) ---
+_client = None
+_client_lock = threading.Lock()
+
+
+def fake_sheets_enabled():
+    return os.getenv('FAKE_SHEETS', '').lower() in ('1', 'true', 'yes')
+
+
+def get_fake_client():
+    """
+    Shared FakeClient configured from FAKE_SHEETS_LATENCY / FAKE_SHEETS_QUOTA.
+    Any workbook it is asked for is seeded with demo data on first open.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            quota = os.getenv('FAKE_SHEETS_QUOTA')
+            _client = FakeClient(latency=float(os.getenv('FAKE_SHEETS_LATENCY', 0)),
+                                 quota_per_minute=int(quota) if quota else None,
+                                 autoseed=True)
+        return _client
@@ -0,0 +1,180 @@
+"""
+Columnar Ledger Engine
+Computes cash, holdings (qty / average cost / first buy date) and total deposited
+from the transactions DataFrame in one vectorized pass (no iterrows).
+"""
+
+import numpy as np
+import pandas as pd
+
+HOLDING_TYPES = ['Buy', 'Sell', 'Initial']
+MIN_QTY = 0.0001
+
+# Average cost is a running product of sell ratios. Rows are split into blocks
+# whose log-product spans at most this much, so exp() never under/overflows.
+_LOG_BLOCK = 300.0
+
+
+# --- 1. Normalize ---
+def normalize_transactions(transactions_df):
+    """
+    Returns a typed copy of the ledger (original row order kept) with
+    per-row deltas: Cash_Delta, Qty_Delta and Deposit_Delta.
+    """
+    n = len(transactions_df)
+    index = transactions_df.index
+
+    def column(name):
+        if name in transactions_df.columns:
+            return transactions_df[name]
+        return pd.Series([None] * n, index=index, dtype=object)
+
+    t_type = column('Type').astype(str).str.strip()
+    price = pd.to_numeric(column('Price'), errors='coerce').fillna(0.0).to_numpy(dtype=float)
+    qty = pd.to_numeric(column('Quantity'), errors='coerce').fillna(0.0).to_numpy(dtype=float)
+
+    is_deposit = (t_type == 'Deposit Cash').to_numpy()
+    is_withdraw = (t_type == 'Withdraw Cash').to_numpy()
+    is_buy = t_type.isin(['Buy', 'Initial']).to_numpy()
+    is_sell = (t_type == 'Sell').to_numpy()
+    is_initial = (t_type == 'Initial').to_numpy()
+    notional = qty * price
+
+    norm = pd.DataFrame({
+        'Date': pd.to_datetime(column('Date'), errors='coerce'),
+        'Ticker': column('Ticker').astype(str).str.strip().str.upper(),
+        'Type': t_type,
+        'Quantity': qty,
+        'Price': price,
+    }, index=index)
+
+    # 'Initial' does not touch cash; it only adds to holdings and deposits
+    norm['Cash_Delta'] = np.select(
+        [is_deposit, is_withdraw, is_buy & ~is_initial, is_sell],
+        [price, -price, -notional, notional],
+        0.0
+    )
+    norm['Qty_Delta'] = np.select([is_buy, is_sell], [qty, -qty], 0.0)
+    norm['Deposit_Delta'] = np.select(
+        [is_deposit, is_withdraw, is_initial],
+        [price, -price, notional],
+        0.0
+    )
+    return norm
+
+
+# --- 2. Holdings ---
+def _holdings_from_normalized(norm):
+    stock = norm[norm['Type'].isin(HOLDING_TYPES)]
+    if stock.empty:
+        return pd.DataFrame()
+
+    tickers = stock['Ticker'].to_numpy()
+    is_sell = (stock['Type'] == 'Sell').to_numpy()
+    qty_delta = stock['Qty_Delta'].to_numpy()
+
+    # Running quantity per ticker (never reset, same as the row-by-row version)
+    qty_after = stock.groupby('Ticker', sort=False)['Qty_Delta'].cumsum().to_numpy()
+    qty_before = qty_after - qty_delta
+
+    # Cost recurrence: cost = m * cost_prev + b
+    #   Buy/Initial: m = 1,                     b = qty * price
+    #   Sell (qty left > 0): m = after / before, b = 0   (average price kept)
+    #   Sell to <= 0: cost resets to 0 -> starts a new segment
+    reset = is_sell & (qty_after <= 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = np.where(qty_before > 0, qty_after / qty_before, 1.0)
+        log_m = np.where(is_sell & ~reset, np.log(ratio), 0.0)
+    b = np.where(is_sell, 0.0, stock['Quantity'].to_numpy() * stock['Price'].to_numpy())
+
+    work = pd.DataFrame({
+        'Ticker': tickers,
+        'Seg': pd.Series(reset).groupby(tickers, sort=False).cumsum().to_numpy(),
+        'log_m': log_m,
+        'b': b,
+    })
+
+    # Only the last segment of each ticker contributes to the final cost
+    last_seg = work.groupby('Ticker', sort=False)['Seg'].transform('max')
+    work = work[work['Seg'] == last_seg]
+
+    work['L'] = work.groupby('Ticker', sort=False)['log_m'].cumsum()
+    block = np.floor(-work['L'] / _LOG_BLOCK)
+    work['Block'] = block.groupby(work['Ticker'], sort=False).cummax()
+    ref = -work['Block'] * _LOG_BLOCK
+    work['w'] = np.exp(ref - work['L']) * work['b']
+
+    blocks = work.groupby(['Ticker', 'Block'], sort=False).agg(L_end=('L', 'last'), S_end=('w', 'sum'))
+
+    # Carry the cost across the (rare) extra blocks; nearly every ticker has one
+    final_cost = {}
+    for (ticker, blk), row in blocks.iterrows():
+        ref_b = -blk * _LOG_BLOCK
+        carry = 0.0
+        if ticker in final_cost:
+            prev_cost, prev_l = final_cost[ticker]
+            carry = np.exp(ref_b - prev_l) * prev_cost
+        final_cost[ticker] = (np.exp(row['L_end'] - ref_b) * (carry + row['S_end']), row['L_end'])
+
+    grouped = stock.groupby('Ticker', sort=False)
+    summary = pd.DataFrame({
+        'Qty': grouped['Qty_Delta'].sum(),
+        'First_Buy_Date': stock[~stock['Type'].eq('Sell')].groupby('Ticker', sort=False)['Date'].min(),
+    })
+    summary['Cost'] = pd.Series({t: c for t, (c, _) in final_cost.items()})
+    summary = summary[summary['Qty'] > MIN_QTY]
+    if summary.empty:
+        return pd.DataFrame()
+
+    return pd.DataFrame({
+        'Ticker': summary.index,
+        'Qty': summary['Qty'].to_numpy(),
+        'Avg_Buy_Price': (summary['Cost'] / summary['Qty']).to_numpy(),
+        'First_Buy_Date': summary['First_Buy_Date'].to_numpy(),
+    })
+
+
+# --- 3. Full Ledger ---
+def compute_ledger(transactions_df):
+    """
+    One pass over the ledger.
+    Returns {'cash', 'holdings', 'total_deposited'} matching
+    calculate_cash_balance / get_current_holdings / calculate_portfolio_metrics.
+    """
+    if transactions_df is None or transactions_df.empty:
+        return {'cash': 0.0, 'holdings': pd.DataFrame(), 'total_deposited': 0.0}
+
+    norm = normalize_transactions(transactions_df)
+    return {
+        'cash': float(norm['Cash_Delta'].sum()),
+        'holdings': _holdings_from_normalized(norm),
+        'total_deposited': float(norm['Deposit_Delta'].sum()),
+    }
+
+
+# --- 4. Position Matrix (Historical NAV) ---
+def _as_of(deltas, dates):
+    # Cumulative deltas as of each date (transactions dated <= date count)
+    running = deltas.sort_index().cumsum()
+    return running.reindex(pd.DatetimeIndex(dates), method='ffill').fillna(0.0)
+
+
+def build_position_matrix(norm, dates):
+    """
+    dates x tickers matrix of quantity held at the end of each date.
+    Positions at or below MIN_QTY are zeroed, like get_current_holdings.
+    """
+    stock = norm[norm['Type'].isin(HOLDING_TYPES) & norm['Date'].notna()]
+    if stock.empty:
+        return pd.DataFrame(index=pd.DatetimeIndex(dates))
+    deltas = stock.pivot_table(index='Date', columns='Ticker', values='Qty_Delta', aggfunc='sum', fill_value=0.0)
+    positions = _as_of(deltas, dates)
+    return positions.where(positions > MIN_QTY, 0.0)
+
+
+def build_cash_series(norm, dates):
+    """Cash balance at the end of each date."""
+    flows = norm[norm['Date'].notna()].groupby('Date')['Cash_Delta'].sum()
+    if flows.empty:
+        return pd.Series(0.0, index=pd.DatetimeIndex(dates))
+    return _as_of(flows, dates)
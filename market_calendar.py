@@ -0,0 +1,202 @@
+"""
+Market Calendar
+NYSE trading sessions computed from the exchange's holiday rules (no network, no
+extra dependencies): full-day holidays, 1 PM early closes, and open/close times
+in exchange-local time (America/New_York, DST-aware). Also builds trading-day
+indexes (NYSE sessions, or every day for 24/7 crypto) and aligns price panels
+onto them with a vectorized, session-limited forward-fill.
+"""
+
+from datetime import date, datetime, time as dtime, timedelta
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+import pandas as pd
+
+NY = ZoneInfo('America/New_York')
+REGULAR_OPEN = dtime(9, 30)
+REGULAR_CLOSE = dtime(16, 0)
+EARLY_CLOSE = dtime(13, 0)
+
+
+def _easter(year):
+    """Gregorian Easter Sunday (anonymous algorithm)."""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def _nth_weekday(year, month, weekday, n):
+    """n-th (1-based) given weekday of a month; n=-1 for the last one."""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date(year, month + 1, 1) - timedelta(days=1) if month < 12 else date(year, 12, 31)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _observed(d):
+    """Saturday holidays move to Friday, Sunday holidays to Monday."""
+    if d.weekday() == 5:
+        return d - timedelta(days=1)
+    if d.weekday() == 6:
+        return d + timedelta(days=1)
+    return d
+
+
+@lru_cache(maxsize=None)
+def nyse_holidays(year):
+    """Full-day NYSE closures for a year (set of dates)."""
+    days = {
+        _nth_weekday(year, 1, 0, 3),        # Martin Luther King Jr. Day
+        _nth_weekday(year, 2, 0, 3),        # Washington's Birthday
+        _easter(year) - timedelta(days=2),  # Good Friday
+        _nth_weekday(year, 5, 0, -1),       # Memorial Day
+        _observed(date(year, 7, 4)),        # Independence Day
+        _nth_weekday(year, 9, 0, 1),        # Labor Day
+        _nth_weekday(year, 11, 3, 4),       # Thanksgiving
+        _observed(date(year, 12, 25)),      # Christmas
+    }
+    # New Year's Day: a Saturday New Year is not observed on the prior Friday
+    new_year = date(year, 1, 1)
+    if new_year.weekday() != 5:
+        days.add(_observed(new_year))
+    if year >= 2022:
+        days.add(_observed(date(year, 6, 19)))  # Juneteenth
+    return frozenset(days)
+
+
+@lru_cache(maxsize=None)
+def nyse_early_closes(year):
+    """1 PM closes: July 3rd, the day after Thanksgiving and Christmas Eve (when they are trading days)."""
+    candidates = [
+        date(year, 7, 3),
+        _nth_weekday(year, 11, 3, 4) + timedelta(days=1),
+        date(year, 12, 24),
+    ]
+    return frozenset(d for d in candidates if d.weekday() < 5 and d not in nyse_holidays(year))
+
+
+class MarketCalendar:
+    def __init__(self, tz=NY):
+        self.tz = tz
+
+    def _local(self, when):
+        if when is None:
+            return datetime.now(self.tz)
+        if when.tzinfo is None:
+            return when.replace(tzinfo=self.tz)
+        return when.astimezone(self.tz)
+
+    def is_trading_day(self, day):
+        return day.weekday() < 5 and day not in nyse_holidays(day.year)
+
+    def session(self, day):
+        """(open, close) as aware datetimes for a trading day, else None."""
+        if not self.is_trading_day(day):
+            return None
+        close = EARLY_CLOSE if day in nyse_early_closes(day.year) else REGULAR_CLOSE
+        return (datetime.combine(day, REGULAR_OPEN, self.tz), datetime.combine(day, close, self.tz))
+
+    def is_open(self, when=None, grace=timedelta(0)):
+        """True during the regular session (extended past the close by `grace`)."""
+        now = self._local(when)
+        session = self.session(now.date())
+        return session is not None and session[0] <= now < session[1] + grace
+
+    def next_open(self, when=None):
+        """Start of the next session strictly after `when` (or the current one if it hasn't opened yet)."""
+        now = self._local(when)
+        day = now.date()
+        for _ in range(15):
+            session = self.session(day)
+            if session and session[0] > now:
+                return session[0]
+            day += timedelta(days=1)
+        raise RuntimeError("No trading session found in the next 15 days")
+
+    def next_close(self, when=None):
+        """End of the current session if open, else of the next one."""
+        now = self._local(when)
+        session = self.session(now.date())
+        if session and now < session[1]:
+            return session[1]
+        return self.session(self.next_open(now).date())[1]
+
+
+# --- Trading-day indexes (price alignment) ---
+CRYPTO_SUFFIXES = ('-USD', '-USDT', '-USDC', '-EUR', '-GBP', '-BTC', '-ETH')
+
+
+def is_crypto(ticker):
+    """yfinance crypto pairs (BTC-USD, ETH-EUR, ...) trade 24/7."""
+    return str(ticker).upper().endswith(CRYPTO_SUFFIXES)
+
+
+@lru_cache(maxsize=None)
+def _nyse_sessions(year):
+    return pd.bdate_range(date(year, 1, 1), date(year, 12, 31), freq='C', holidays=sorted(nyse_holidays(year)))
+
+
+def trading_days(start, end, crypto=False):
+    """Sessions in [start, end]: NYSE business days, or every calendar day for 24/7 markets."""
+    start, end = pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize()
+    if end < start:
+        return pd.DatetimeIndex([])
+    if crypto:
+        return pd.date_range(start, end, freq='D')
+    days = _nyse_sessions(start.year).append([_nyse_sessions(y) for y in range(start.year + 1, end.year + 1)])
+    return days[(days >= start) & (days <= end)]
+
+
+def sessions_before(day, n):
+    """The NYSE session n sessions before `day` (n >= 1)."""
+    day = pd.Timestamp(day).normalize()
+    days = trading_days(day - timedelta(days=2 * n + 10), day - timedelta(days=1))
+    return days[-n]
+
+
+def trading_index(tickers, start, end):
+    """Daily index for a panel of tickers: every day if any of them is crypto, else NYSE sessions."""
+    return trading_days(start, end, crypto=any(is_crypto(t) for t in tickers))
+
+
+def align_prices(panel, index, limit=5):
+    """
+    Reindexes a dates x tickers Close panel onto `index`, one vectorized pass per market.
+    Each column is forward-filled over at most `limit` of its own sessions (limit=None: no
+    limit) and then sampled on `index`, so a stock's Friday close carries over a 24/7
+    index's weekend without the weekend counting against the limit.
+    """
+    index = pd.DatetimeIndex(index)
+    if panel.empty or index.empty:
+        return pd.DataFrame(index=index, columns=panel.columns, dtype=float)
+    panel = panel.sort_index()
+    lo, hi = min(panel.index[0], index[0]), max(panel.index[-1], index[-1])
+    parts = []
+    for crypto in (False, True):
+        cols = [c for c in panel.columns if is_crypto(c) == crypto]
+        if not cols:
+            continue
+        group = panel[cols]
+        # Closes stamped off-calendar (e.g. a holiday bar) still count as observations
+        observed = group.index[group.notna().any(axis=1)]
+        grid = trading_days(lo, hi, crypto=crypto).union(observed)
+        filled = group.reindex(grid).ffill(limit=limit)
+        parts.append(filled.reindex(index, method='ffill'))
+    return pd.concat(parts, axis=1)[list(panel.columns)]
+
+
+_calendar = MarketCalendar()
+
+
+def get_market_calendar():
+    return _calendar
@@ -0,0 +1,181 @@
+"""
+Ticker Metadata Store
+Persistent SQLite cache of sector / category / name / currency per ticker.
+Repeat loads never hit the price provider (yfinance .info); stale rows are
+served immediately and refreshed in the background; only missing tickers are
+fetched inline. Tickers the provider has no metadata for (delisted, odd symbols)
+are stored as Unknown with a short TTL, so they aren't fetched inline on every load.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+from price_provider import get_price_provider, UNKNOWN_METADATA
+
+DEFAULT_CACHE_DIR = os.getenv('PORTFOLIO_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache'))
+DEFAULT_TTL_SECONDS = 30 * 24 * 3600  # Sector data almost never changes
+DEFAULT_NEGATIVE_TTL_SECONDS = 6 * 3600  # Retry tickers whose fetch failed a few times a day
+
+FIELDS = ['sector', 'category', 'name', 'currency']
+
+
+def _fetch_metadata(tickers):
+    return get_price_provider().get_metadata(tickers)
+
+
+def sector_label(meta):
+    """Sector for display; funds/ETFs fall back to their category."""
+    if not meta:
+        return 'Unknown'
+    sector = meta.get('sector') or 'Unknown'
+    if sector == 'Unknown':
+        sector = meta.get('category') or 'Unknown'
+    return sector
+
+
+class MetadataStore:
+    def __init__(self, path=None, ttl_seconds=DEFAULT_TTL_SECONDS, fetcher=None,
+                 negative_ttl_seconds=DEFAULT_NEGATIVE_TTL_SECONDS):
+        """
+        path: SQLite file (defaults to .cache/metadata.sqlite)
+        fetcher: callable(tickers) -> {ticker: dict with FIELDS} (defaults to the price provider)
+        negative_ttl_seconds: how long an Unknown placeholder for a failed ticker stays fresh
+        """
+        self.path = path or os.path.join(DEFAULT_CACHE_DIR, 'metadata.sqlite')
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self._fetch = fetcher or _fetch_metadata
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.fetch_errors = 0
+
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS ticker_metadata ("
+                "ticker TEXT PRIMARY KEY, sector TEXT, category TEXT, name TEXT, currency TEXT, fetched_at REAL)"
+            )
+            # Per-row TTL (NULL = ttl_seconds); added to caches created before negative caching
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(ticker_metadata)")}
+            if 'ttl' not in columns:
+                conn.execute("ALTER TABLE ticker_metadata ADD COLUMN ttl REAL")
+
+    def _connect(self):
+        # One short-lived connection per call keeps this safe across Streamlit threads
+        return sqlite3.connect(self.path, timeout=10)
+
+    def _read(self, tickers):
+        if not tickers:
+            return {}
+        placeholders = ",".join("?" * len(tickers))
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT ticker, sector, category, name, currency, fetched_at, ttl FROM ticker_metadata WHERE ticker IN ({placeholders})",
+                list(tickers)
+            ).fetchall()
+        return {r[0]: dict(zip(FIELDS + ['fetched_at', 'ttl'], r[1:])) for r in rows}
+
+    def _write(self, records, ttl=None):
+        if not records:
+            return
+        now = time.time()
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO ticker_metadata (ticker, sector, category, name, currency, fetched_at, ttl) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(t, m.get('sector'), m.get('category'), m.get('name'), m.get('currency'), now, ttl) for t, m in records.items()]
+            )
+
+    def _fetch_many(self, tickers, negative=()):
+        """
+        Fetches and stores tickers. Those in `negative` that come back without metadata are
+        stored as Unknown for negative_ttl_seconds; without a row they'd be fetched inline on
+        every load. Other failures (a good row whose refresh failed) keep their current row.
+        """
+        if not tickers:
+            return {}
+        try:
+            fetched = self._fetch(tickers) or {}
+        except Exception as e:
+            print(f"Metadata fetch failed for {tickers}: {e}")
+            fetched = {}
+        unknown = {t: {**UNKNOWN_METADATA, 'name': t} for t in negative if t not in fetched}
+        with self._lock:
+            self.fetch_errors += len([t for t in tickers if t not in fetched])
+        self._write(fetched)
+        self._write(unknown, ttl=self.negative_ttl_seconds)
+        return {**unknown, **fetched}
+
+    def _refresh_in_background(self, tickers, negative=()):
+        with self._lock:
+            tickers = [t for t in tickers if t not in self._refreshing]
+            self._refreshing.update(tickers)
+        if not tickers:
+            return
+        negative = [t for t in negative if t in tickers]
+
+        def run():
+            try:
+                self._fetch_many(tickers, negative)
+            finally:
+                with self._lock:
+                    self._refreshing.difference_update(tickers)
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def get_many(self, tickers):
+        """
+        Returns {ticker: {sector, category, name, currency}}.
+        Cached rows (fresh or stale) are hits; only missing tickers are fetched now.
+        """
+        tickers = list(dict.fromkeys(tickers))
+        cached = self._read(tickers)
+        now = time.time()
+
+        stale = [t for t, m in cached.items() if now - (m['fetched_at'] or 0) > (m['ttl'] or self.ttl_seconds)]
+        missing = [t for t in tickers if t not in cached]
+        with self._lock:
+            self.hits += len(cached)
+            self.stale_hits += len(stale)
+            self.misses += len(missing)
+
+        if stale:
+            # Expired Unknown placeholders are re-stamped if the provider still has nothing
+            self._refresh_in_background(stale, negative=[t for t in stale if cached[t]['ttl']])
+
+        result = {t: {k: m[k] for k in FIELDS} for t, m in cached.items()}
+        result.update(self._fetch_many(missing, negative=missing))
+        return result
+
+    def get(self, ticker):
+        return self.get_many([ticker]).get(ticker)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'fetch_errors': self.fetch_errors,
+                'hit_rate': (self.hits / lookups) if lookups else 0.0,
+                'refreshing': len(self._refreshing),
+            }
+
+
+# --- Process-wide store ---
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_metadata_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = MetadataStore()
+        return _store
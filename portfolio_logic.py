@@ -1,183 +1,80 @@
 import pandas as pd
-import yfinance as yf
-from datetime import datetime, timedelta  
+from datetime import datetime  
 import requests
 import smtplib
 import ssl
 from email.message import EmailMessage
 import time
 import threading
+import gspread
+from gspread.utils import rowcol_to_a1
+
+from alert_index import AlertIndex
+from alert_mailer import AlertDispatcher
+from benchmark_series import get_benchmark_series
+from metadata_store import get_metadata_store, sector_label
+from price_store import get_price_store
+from price_provider import get_price_provider
+from quote_cache import get_quote_cache
+from sheets_retry import call_with_backoff
+from ledger import compute_ledger, normalize_transactions, build_position_matrix, build_cash_series
+from market_calendar import is_crypto, sessions_before, trading_index, align_prices
+from returns import external_flows, cumulative_twr
+
+# Missing closes are carried forward at most this many sessions of the ticker's own market
+PRICE_FFILL_SESSIONS = 5
 
 # --- 1. Cash Balance ---
 def calculate_cash_balance(transactions_df):
-    cash = 0.0
-    if transactions_df.empty:
-        return cash
-        
-    for _, row in transactions_df.iterrows():
-        t_type = str(row['Type']).strip()
-        try:
-            price = float(row['Price'])
-            quantity = float(row['Quantity'])
-        except:
-            price = 0.0
-            quantity = 0.0
-
-        if t_type == 'Deposit Cash':
-            cash += price
-        elif t_type == 'Withdraw Cash':
-            cash -= price
-        elif t_type == 'Buy':
-            cash -= quantity * price
-        elif t_type == 'Sell':
-            cash += quantity * price
-        elif t_type == 'Initial':
-            # Initial Setup does not affect cash balance
-            pass
-    
-    return cash
+    return compute_ledger(transactions_df)['cash']
 
 # --- 2. Holdings ---
 def get_current_holdings(transactions_df):
-    holdings = {}
-    if transactions_df.empty:
-        return pd.DataFrame()
-    
-    # Include 'Initial' as a valid holding acquisition
-    stock_transactions = transactions_df[
-        transactions_df['Type'].isin(['Buy', 'Sell', 'Initial'])
-    ].copy()
-    
-    for _, row in stock_transactions.iterrows():
-        ticker = str(row['Ticker']).strip().upper()
-        
-        if ticker not in holdings:
-            holdings[ticker] = {
-                'total_qty': 0.0,
-                'total_cost': 0.0,
-                'first_buy_date': None
-            }
-        
-        qty = float(row['Quantity'])
-        price = float(row['Price'])
-        t_type = str(row['Type']).strip()
+    # 'Initial' behaves exactly like 'Buy' for holdings calculations
+    return compute_ledger(transactions_df)['holdings']
 
-        t_type = str(row['Type']).strip()
-        
-        # 'Initial' behaves exactly like 'Buy' for holdings calculations
-        if t_type == 'Buy' or t_type == 'Initial':
-            holdings[ticker]['total_qty'] += qty
-            holdings[ticker]['total_cost'] += qty * price
-            
-            current_date = pd.to_datetime(row['Date'])
-            if holdings[ticker]['first_buy_date'] is None:
-                holdings[ticker]['first_buy_date'] = current_date
-            else:
-                if holdings[ticker]['first_buy_date'] is not None:
-                    holdings[ticker]['first_buy_date'] = min(
-                        holdings[ticker]['first_buy_date'],
-                        current_date
-                    )
-        
-        elif t_type == 'Sell':
-            holdings[ticker]['total_qty'] -= qty
-            if holdings[ticker]['total_qty'] > 0:
-                avg_price = holdings[ticker]['total_cost'] / (holdings[ticker]['total_qty'] + qty)
-                holdings[ticker]['total_cost'] = holdings[ticker]['total_qty'] * avg_price
-            else:
-                holdings[ticker]['total_cost'] = 0
-    
-    holdings_list = []
-    for ticker, data in holdings.items():
-        if data['total_qty'] > 0.0001:
-            holdings_list.append({
-                'Ticker': ticker,
-                'Qty': data['total_qty'],
-                'Avg_Buy_Price': data['total_cost'] / data['total_qty'],
-                'First_Buy_Date': data['first_buy_date']
-            })
-    
-    return pd.DataFrame(holdings_list) if holdings_list else pd.DataFrame()
-
-# --- 3. Live Prices (The Hybrid Bulletproof Fix) ---
+# --- 3. Live Prices (Shared Quote Cache) ---
 def fetch_live_prices(tickers):
     """
-    Fetches 5 days of history in bulk to guarantee Prices + Daily Returns.
-    Only attempts Sector individually (and fails silently if needed).
+    Prices + Daily Returns come from the process-wide quote cache
+    (bulk 5-day download on a miss, shared across sessions).
+    Sector comes from the persistent metadata store (fails silently if needed).
     """
     price_data = {}
     if not tickers:
         return price_data
     
+    # --- A. Get Price & Daily Return ---
     try:
-        # 1. BULK DOWNLOAD - This guarantees we get prices
-        data = yf.download(tickers, period="5d", progress=False)
-        
-        # Check if we got data
-        if 'Close' in data.columns:
-            closes = data['Close']
-            
-            for ticker in tickers:
-                current_price = 0.0
-                prev_close = 0.0
-                sector = 'Unknown'
-                
-                # --- A. Get Price & Daily Return from Bulk Data ---
-                try:
-                    if isinstance(closes, pd.Series):
-                        ticker_history = closes
-                    elif isinstance(closes, pd.DataFrame) and ticker in closes.columns:
-                        ticker_history = closes[ticker]
-                    else:
-                        ticker_history = pd.Series()
-
-                    ticker_history = ticker_history.dropna()
-                    
-                    if not ticker_history.empty:
-                        current_price = float(ticker_history.iloc[-1])
-                        
-                        if len(ticker_history) >= 2:
-                            prev_close = float(ticker_history.iloc[-2])
-                        else:
-                            prev_close = current_price
-                except:
-                    pass
-                
-                # --- B. Get Sector (Optional) ---
-                if current_price > 0:
-                    try:
-                        info = yf.Ticker(ticker).info
-                        sector = info.get('sector', 'Unknown')
-                        if sector == 'Unknown':
-                            sector = info.get('category', 'Unknown')
-                    except:
-                        pass
-                
-                # Store Data
-                price_data[ticker] = {
-                    'price': current_price,
-                    'prev_close': prev_close,
-                    'sector': sector
-                }
-        else:
-            for ticker in tickers:
-                price_data[ticker] = {'price': 0.0, 'prev_close': 0.0, 'sector': 'Unknown'}
-                
+        quotes = get_quote_cache().get_many(tickers)
     except Exception as e:
         print(f"Critical Error in fetch_live_prices: {e}")
-        for ticker in tickers:
-            price_data[ticker] = {'price': 0.0, 'prev_close': 0.0, 'sector': 'Unknown'}
+        quotes = {}
+    
+    for ticker in tickers:
+        quote = quotes.get(ticker) or {}
+        price_data[ticker] = {
+            'price': quote.get('price', 0.0),
+            'prev_close': quote.get('prev_close', 0.0),
+            'sector': 'Unknown'
+        }
+    
+    # --- B. Get Sector (Optional, cached on disk) ---
+    priced = [t for t in price_data if price_data[t]['price'] > 0]
+    try:
+        metadata = get_metadata_store().get_many(priced)
+        for ticker in priced:
+            price_data[ticker]['sector'] = sector_label(metadata.get(ticker))
+    except Exception as e:
+        print(f"Metadata lookup failed: {e}")
     
     return price_data
 
 # --- Helper for SPY ---
 def calculate_spy_return(start_date):
+    # Served from the shared SPY series (one download covers every start date)
     try:
-        data = yf.download('SPY', start=start_date, progress=False)['Close']
-        if data.empty: return 0.0
-        start_p = float(data.iloc[0])
-        end_p = float(data.iloc[-1])
-        return ((end_p - start_p) / start_p) * 100
+        return get_benchmark_series('SPY').return_since(start_date)
     except:
         return 0.0
 
@@ -193,12 +90,8 @@ def validate_ticker(ticker):
     if ticker == 'CASH': return True, 'CASH'
     
     try:
-        # Quick check using Ticker.info or history
-        # History is safer/faster than info which downloads a lot of JSON
-        t = yf.Ticker(ticker)
-        # Fetch 1 day of history to verify existence
-        hist = t.history(period='1d')
-        if hist.empty:
+        # Fetch 1 day of history (via the price provider) to verify existence
+        if not get_price_provider().validate_ticker(ticker):
             return False, f"Invalid Ticker: {ticker}"
         return True, ticker
     except:
@@ -209,8 +102,15 @@ def build_portfolio_table(holdings_df, price_data, cash_balance):
     if holdings_df.empty:
         return pd.DataFrame()
     
+    # SPY return since each first buy: one download, vectorized lookup
+    try:
+        spy_returns = get_benchmark_series('SPY').returns_since(holdings_df['First_Buy_Date'])
+    except Exception as e:
+        print(f"SPY benchmark lookup failed: {e}")
+        spy_returns = [0.0] * len(holdings_df)
+    
     rows = []
-    for _, row in holdings_df.iterrows():
+    for (_, row), spy_ret in zip(holdings_df.iterrows(), spy_returns):
         ticker = row['Ticker']
         qty = row['Qty']
         avg = row['Avg_Buy_Price']
@@ -229,10 +129,6 @@ def build_portfolio_table(holdings_df, price_data, cash_balance):
         if prev > 0:
             daily_return_pct = ((curr - prev) / prev * 100)
         
-        spy_ret = 0.0
-        if row['First_Buy_Date'] is not None:
-            spy_ret = calculate_spy_return(row['First_Buy_Date'])
-            
         alpha = total_return_pct - spy_ret
         
         rows.append({
@@ -263,7 +159,7 @@ def build_portfolio_table(holdings_df, price_data, cash_balance):
     return pd.DataFrame()
 
 # --- 5. Metrics ---
-def calculate_portfolio_metrics(portfolio_df, cash_balance, transactions_df):
+def calculate_portfolio_metrics(portfolio_df, cash_balance, transactions_df, total_deposited=None):
     if portfolio_df.empty:
         mkt_val = 0.0
         daily_pnl = 0.0
@@ -272,25 +168,12 @@ def calculate_portfolio_metrics(portfolio_df, cash_balance, transactions_df):
         daily_pnl = (portfolio_df['Market Value'] * (portfolio_df['Daily Return %'] / 100)).sum()
     
     # Calculate Total Deposited: Initial positions + Deposit Cash - Withdraw Cash
-    total_deposited = 0.0
-    if not transactions_df.empty:
-        for _, r in transactions_df.iterrows():
-            t_type = str(r['Type']).strip()
-            try:
-                price = float(r['Price'])
-                quantity = float(r['Quantity']) if 'Quantity' in r else 0.0
-            except:
-                price = 0.0
-                quantity = 0.0
-                
-            if t_type == 'Deposit Cash': 
-                total_deposited += price
-            elif t_type == 'Withdraw Cash': 
-                total_deposited -= price
-            elif t_type == 'Initial':
-                # Add cost basis of initial positions
-                total_deposited += (quantity * price)
-            # Note: Buy/Sell don't affect total_deposited, they just move money between cash and holdings
+    # Note: Buy/Sell don't affect total_deposited, they just move money between cash and holdings
+    # Pass total_deposited from compute_ledger() to skip re-reading the ledger
+    if total_deposited is None:
+        total_deposited = 0.0
+        if not transactions_df.empty:
+            total_deposited = float(normalize_transactions(transactions_df)['Deposit_Delta'].sum())
             
     total_val = mkt_val + cash_balance
     ret_dol = total_val - total_deposited
@@ -308,7 +191,7 @@ def calculate_portfolio_metrics(portfolio_df, cash_balance, transactions_df):
 # --- 6. Historical Performance Calculation (Robust Bulk Fix) ---
 def calculate_historical_portfolio_value(transactions_df, start_date, end_date=None):
     """
-    Reconstruct daily portfolio value using bulk download (safest against blocks).
+    Reconstruct daily portfolio value from the local price store (bulk-downloads gaps only).
     """
     if transactions_df.empty:
         return pd.DataFrame()
@@ -325,123 +208,73 @@ def calculate_historical_portfolio_value(transactions_df, start_date, end_date=N
     if 'SPY' not in tickers:
         tickers.append('SPY')
 
-    # 2. Download ALL history at once (Much faster & avoids bans)
-    # We buffer the start date by 10 days to ensure we have data for the start
-    safe_start = pd.to_datetime(start_date) - timedelta(days=10)
+    # 2. Read history from the local price store (downloads only missing ranges)
+    # Start enough sessions early for the forward-fill to have a close to carry into the start
+    safe_start = sessions_before(start_date, PRICE_FFILL_SESSIONS + 1)
     
     try:
-        # threads=False is safer for Streamlit Cloud
-        raw_data = yf.download(tickers, start=safe_start, end=end_date, progress=False, threads=False)
+        price_data = get_price_store().get_closes(tickers, safe_start, end_date)
     except Exception as e:
-        print(f"Download failed: {e}")
+        print(f"Price history failed: {e}")
+        return pd.DataFrame()
+
+    if price_data.empty:
         return pd.DataFrame()
 
-    # 3. Process the downloaded data structure
-    price_data = pd.DataFrame()
+    # 3. Reconstruct Portfolio Value (vectorized position matrix)
+    return reconstruct_portfolio_history(transactions_df, price_data, start_date)
 
-    try:
-        # Scenario A: Multiple Tickers (returns MultiIndex columns)
-        if isinstance(raw_data.columns, pd.MultiIndex):
-            if 'Close' in raw_data.columns:
-                price_data = raw_data['Close']
-            else:
-                return pd.DataFrame() # Data format unexpected
-        
-        # Scenario B: Single Ticker (returns Flat columns: Open, High, Low, Close)
-        else:
-            if 'Close' in raw_data.columns:
-                # If we asked for 1 ticker, this IS the data for that ticker
-                # We need to rename 'Close' to the ticker symbol
-                ticker_name = tickers[0] 
-                price_data = raw_data[['Close']].copy()
-                price_data.columns = [ticker_name]
-            else:
-                return pd.DataFrame()
-                
-    except Exception as e:
-        print(f"Data processing failed: {e}")
+
+def reconstruct_portfolio_history(transactions_df, price_data, start_date):
+    """
+    Daily portfolio value from a dates x tickers Close panel (SPY included).
+    Value = cash series + sum(position matrix * forward-filled prices).
+    """
+    if transactions_df.empty or price_data.empty:
         return pd.DataFrame()
 
-    if price_data.empty:
+    norm = normalize_transactions(transactions_df)
+    first_trade = norm['Date'].min()
+    if pd.isna(first_trade):
+        return pd.DataFrame()
+    # One trading calendar for the whole panel (every day if any ticker is crypto),
+    # from the requested start / first transaction to the latest close
+    dates = trading_index(price_data.columns, max(pd.to_datetime(start_date), first_trade), price_data.index.max())
+    if dates.empty:
         return pd.DataFrame()
 
-    # 4. Reconstruct Portfolio Value Day by Day
-    # Handle timezone issues
-    price_data.index = price_data.index.tz_localize(None)
-    dates = price_data.index
-    
-    trans_sorted = transactions_df.sort_values('Date')
-    history_records = []
-    
-    for date in dates:
-        # Ignore dates before our actual requested start (due to the 10-day buffer)
-        if date < pd.to_datetime(start_date):
-            continue
+    # Missing prices: carry the last close forward up to 5 sessions, else 0
+    prices = align_prices(price_data, dates, limit=PRICE_FFILL_SESSIONS).fillna(0.0)
+
+    positions = build_position_matrix(norm, dates)
+    held = positions.columns.intersection(prices.columns)
+    holdings_val = (positions[held] * prices[held]).sum(axis=1)
+    cash = build_cash_series(norm, dates)
+
+    spy = pd.Series(0.0, index=dates)
+    if 'SPY' in price_data.columns:
+        spy = align_prices(price_data[['SPY']], dates, limit=None)['SPY'].fillna(0.0)
 
-        # Transactions up to this day
-        current_trans = trans_sorted[trans_sorted['Date'] <= date]
-        
-        if current_trans.empty:
-            continue
-            
-        cash = calculate_cash_balance(current_trans)
-        holdings = get_current_holdings(current_trans)
-        
-        portfolio_val = cash
-        
-        if not holdings.empty:
-            for _, row in holdings.iterrows():
-                t = row['Ticker']
-                q = row['Qty']
-                
-                # Check if we have price data for this ticker
-                if t in price_data.columns:
-                    price = price_data.loc[date, t]
-                    
-                    # Fix NaNs (Forward Fill logic manually)
-                    if pd.isna(price):
-                        # Look at previous 5 days
-                        prev_days = price_data[t].loc[:date].tail(6)[:-1] # Exclude current
-                        if not prev_days.empty:
-                             valid_prev = prev_days.dropna()
-                             if not valid_prev.empty:
-                                 price = valid_prev.iloc[-1]
-                             else:
-                                 price = 0.0
-                        else:
-                             price = 0.0
-                    
-                    portfolio_val += float(q) * float(price)
-        
-        # Get SPY value
-        spy_val = 0.0
-        if 'SPY' in price_data.columns:
-            spy_val = price_data.loc[date, 'SPY']
-            if pd.isna(spy_val):
-                 valid_spy = price_data['SPY'].loc[:date].dropna()
-                 if not valid_spy.empty:
-                     spy_val = valid_spy.iloc[-1]
-
-        history_records.append({
-            'Date': date,
-            'Portfolio_Value': portfolio_val,
-            'SPY_Price': spy_val
-        })
-    
     # 5. Final Output
-    history_df = pd.DataFrame(history_records)
-    
-    if history_df.empty:
-        return pd.DataFrame()
+    history_df = pd.DataFrame({
+        'Date': dates,
+        'Portfolio_Value': (cash + holdings_val).to_numpy(),
+        'SPY_Price': spy.to_numpy(),
+        # Deposits / withdrawals / 'Initial' positions: money moved in, not earned
+        'Net_Flow': external_flows(transactions_df, dates).to_numpy(),
+    })
+
+    return _add_return_columns(history_df)
+
 
-    # Normalize to Percentage Return (Starting at 0%)
-    initial_port = history_df['Portfolio_Value'].iloc[0]
+def _add_return_columns(history_df):
+    """
+    Percentage returns starting at 0% on the first row. The portfolio line is
+    time-weighted, so cash moving in or out doesn't show up as gains or losses.
+    """
     initial_spy = history_df['SPY_Price'].iloc[0]
     
-    if initial_port > 0:
-        history_df['Portfolio_Return_%'] = (history_df['Portfolio_Value'] - initial_port) / initial_port * 100
-    else:
-        history_df['Portfolio_Return_%'] = 0.0
+    history_df['Portfolio_Return_%'] = cumulative_twr(history_df['Portfolio_Value'], history_df['Net_Flow'])
         
     if initial_spy > 0:
         history_df['SPY_Return_%'] = (history_df['SPY_Price'] - initial_spy) / initial_spy * 100
@@ -449,6 +282,19 @@ def calculate_historical_portfolio_value(transactions_df, start_date, end_date=N
         history_df['SPY_Return_%'] = 0.0
         
     return history_df
+
+
+def rebase_history(history_df, start_date):
+    """
+    Slice of a full-range history from start_date on, with returns rebased to 0% at
+    the slice's first day. Lets every timeframe share one reconstructed series.
+    """
+    if history_df.empty:
+        return history_df
+    sliced = history_df[history_df['Date'] >= pd.to_datetime(start_date)]
+    if sliced.empty:
+        return pd.DataFrame()
+    return _add_return_columns(sliced.reset_index(drop=True).copy())
     
 # --- 7. Sector ---
 def get_sector_allocation(portfolio_df):
@@ -485,6 +331,13 @@ def ensure_alerts_sheet(client, sheet_name="Alerts"):
 # So I will implement it here, assuming `spreadsheet` is passed.
 
 def check_and_create_alerts_sheet(spreadsheet):
+    """
+    Returns the Alerts worksheet, creating it if missing.
+    Also accepts the Alerts worksheet itself (e.g. PortfolioManager.get_alerts_sheet()),
+    which is returned as-is without any API call.
+    """
+    if hasattr(spreadsheet, 'get_all_records'):
+        return spreadsheet
     try:
         worksheet = spreadsheet.worksheet("Alerts")
     except:
@@ -497,112 +350,94 @@ def send_alert_email(ticker, price, direction, subscribers, sender_creds):
     """
     Sends email to a list of subscribers.
     subscribers: list of email strings
+    For several alerts at once use AlertDispatcher (one SMTP session per cycle).
     """
-    sender_email = sender_creds.get('user')
-    password = sender_creds.get('password')
-    
-    if not sender_email or not password:
-        return False
-        
-    # Remove duplicates and cleanup
-    recipients = list(set([s.strip() for s in subscribers if '@' in s]))
-    
-    if not recipients:
+    dispatcher = AlertDispatcher.from_creds(sender_creds, digest=False)
+    if dispatcher is None:
         return False
-
-    msg = EmailMessage()
-    msg.set_content(f"🚀 ALERT TRIGGERED!\n\nTicker: {ticker}\nCondition: {direction} ${price:.2f}\n\nCurrent Price: ${price:.2f}\n\nHappy Trading!")
-    msg['Subject'] = f"🔔 Alert: {ticker} hit ${price:.2f}"
-    msg['From'] = sender_email
-    msg['Bcc'] = ", ".join(recipients) # Use Bcc to hide other subscribers
-    
-    try:
-        context = ssl.create_default_context()
-        with smtplib.SMTP_SSL("smtp.gmail.com", 465, context=context) as server:
-            server.login(sender_email, password)
-            server.send_message(msg)
-        return True
-    except Exception as e:
-        print(f"Failed to send email: {e}")
+    if not dispatcher.add(ticker, ticker, price, direction, subscribers):
         return False
+    return dispatcher.send()[ticker]
 
 def process_alerts(spreadsheet, email_creds):
     """
     Checks alerts and sends emails to subscribers. 
+    Status / Last Checked changes are written in one batch_update at the end of the cycle.
+    Returns a summary of the cycle, including the Sheets API calls it made.
     """
+    summary = {'alerts': 0, 'triggered': 0, 'api_calls': 0, 'write_retries': 0, 'write_failed': False,
+               'nearest_gap': None, 'nearest_crypto_gap': None, 'tickers': []}
+    
     ws = check_and_create_alerts_sheet(spreadsheet)
+    if ws is not spreadsheet:
+        summary['api_calls'] += 1  # worksheet lookup (none when the cached worksheet is passed in)
     data = ws.get_all_records()
+    summary['api_calls'] += 1  # read
     df = pd.DataFrame(data)
     
-    if df.empty: return
+    if df.empty: return summary
     
     # Check for required columns (handling migration somewhat gracefully or just failing)
     required = ["Ticker", "Target Price", "Direction", "Subscribers", "Status"]
     if not all(col in df.columns for col in required):
         # If headers are mismatch, might need manual fix or we skip
         # For now, let's assume they are correct as per plan
-        return
+        return summary
 
-    triggered_count = 0
+    # Index active alerts by ticker so each price only bisects its sorted thresholds
+    index = AlertIndex.from_records(data)
+    summary['alerts'] = len(index)
+    if not len(index): return summary
     
-    # Fetch live prices for all tickers in alerts
-    tickers = df['Ticker'].unique().tolist()
-    if not tickers: return
+    prices = fetch_live_prices(index.tickers())
+    # How close the nearest pending alert is; the scheduler polls faster when this is small
+    summary['nearest_gap'] = index.nearest_gap(prices)
+    # Crypto trades 24/7: its gap alone drives polling while the NYSE is closed
+    summary['nearest_crypto_gap'] = index.nearest_gap({t: p for t, p in prices.items() if is_crypto(t)})
     
-    prices = fetch_live_prices(tickers)
+    # gspread is 1-indexed, header is row 1, so data row i is i+2
+    # Headers: ["Ticker", "Target Price", "Direction", "Subscribers", "Status", "Note", "Last Checked"]
+    status_col = df.columns.get_loc("Status") + 1
+    last_checked_col = df.columns.get_loc("Last Checked") + 1 if "Last Checked" in df.columns else None
+    checked_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    updates = []
     
-    for i, row in df.iterrows():
-        ticker = row['Ticker']
-        try:
-            target = float(row['Target Price'])
-        except:
-            continue
-            
-        direction = row['Direction']
-        status = row['Status']
-        subscribers_str = str(row['Subscribers'])
-        
-        # If already sent, skip (Global Status)
-        if str(status).lower() == "sent":
-            continue
-            
-        current_price = prices.get(ticker, {}).get('price', 0)
-        if current_price == 0: continue
+    # Send every fired alert over one SMTP session (one digest per subscriber)
+    delivered = {}
+    fired = index.evaluate(prices)
+    dispatcher = AlertDispatcher.from_creds(email_creds)
+    if fired and dispatcher:
+        for i, ticker, current_price in fired:
+            row = df.iloc[i]
+            dispatcher.add(i, ticker, current_price, row['Direction'], str(row['Subscribers']), target=row['Target Price'])
+        delivered = dispatcher.send()
+        summary['emails'] = dispatcher.stats()
+    
+    for i in sorted(k for k, sent in delivered.items() if sent):
+        # Queue the row's status change; everything is written together below
+        updates.append({'range': rowcol_to_a1(i + 2, status_col), 'values': [["Sent"]]})
+        if last_checked_col:
+            updates.append({'range': rowcol_to_a1(i + 2, last_checked_col), 'values': [[checked_at]]})
+        summary['triggered'] += 1
+        index.remove(i)
+    summary['tickers'] = index.tickers()  # still pending after this cycle
+    
+    if updates:
+        def count_retry(attempt, error, delay):
+            summary['write_retries'] += 1
+            summary['api_calls'] += 1
+            print(f"Alert status write rate-limited, retry {attempt} in {delay:.1f}s: {error}")
         
-        hit = False
-        if direction == "Above" and current_price >= target:
-            hit = True
-        elif direction == "Below" and current_price <= target:
-            hit = True
-            
-        if hit:
-            # Parse subscribers
-            subs_list = subscribers_str.split(',')
-            
-            # Send Email to all subscribers
-            sent = send_alert_email(ticker, current_price, direction, subs_list, email_creds)
-            
-            if sent:
-                # Update row status to Sent
-                # gspread is 1-indexed, header is row 1, so data row i is i+2
-                # Status is column 5, Last Checked is column 7 (based on new headers)
-                # Let's find column index dynamically if possible or hardcode based on check_and_create
-                # Headers: ["Ticker", "Target Price", "Direction", "Subscribers", "Status", "Note", "Last Checked"]
-                # Status is col 5
-                
-                try:
-                    # Find 'Status' column index
-                    status_col = df.columns.get_loc("Status") + 1
-                    last_checked_col = df.columns.get_loc("Last Checked") + 1
-                    
-                    ws.update_cell(i + 2, status_col, "Sent")
-                    ws.update_cell(i + 2, last_checked_col, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-                except:
-                    # Fallback hardcoded if columns align
-                    ws.update_cell(i + 2, 5, "Sent") 
-                
-                triggered_count += 1
-
+        summary['api_calls'] += 1
+        try:
+            call_with_backoff(ws.batch_update, updates, on_retry=count_retry)
+        except Exception as e:
+            # Emails went out but rows stay Active, so they will fire again next cycle
+            summary['write_failed'] = True
+            print(f"Failed to write alert statuses: {e}")
+    
+    print(f"Alert cycle: {summary['triggered']}/{summary['alerts']} triggered, {summary['api_calls']} Sheets API calls")
+    return summary
 
 
 def reset_all_alerts(spreadsheet):
@@ -1,52 +1,143 @@
+import threading
+
 import gspread
 from google.oauth2.service_account import Credentials
+from gspread.exceptions import WorksheetNotFound
+
+from user_index import UserIndex
 
 class PortfolioManager:
-    def __init__(self, creds_input):
+    def __init__(self, creds_input, client=None):
         """
         Initialize the Portfolio Manager with Google Sheets API credentials.
+        client: ready-made gspread-compatible client (e.g. fake_sheets.FakeClient); skips auth.
         """
-        scopes = ["https://www.googleapis.com/auth/spreadsheets", "https://www.googleapis.com/auth/drive"]
-        
-        if isinstance(creds_input, dict):
-            # Handle newline characters in private key from Streamlit Secrets
-            if 'private_key' in creds_input:
-                creds_input['private_key'] = creds_input['private_key'].replace('\\n', '\n')
-            creds = Credentials.from_service_account_info(creds_input, scopes=scopes)
+        if client is not None:
+            self.client = client
         else:
-            # Handle local file credentials
-            creds = Credentials.from_service_account_file(creds_input, scopes=scopes)
+            scopes = ["https://www.googleapis.com/auth/spreadsheets", "https://www.googleapis.com/auth/drive"]
             
-        self.client = gspread.authorize(creds)
+            if isinstance(creds_input, dict):
+                # Handle newline characters in private key from Streamlit Secrets
+                if 'private_key' in creds_input:
+                    creds_input['private_key'] = creds_input['private_key'].replace('\\n', '\n')
+                creds = Credentials.from_service_account_info(creds_input, scopes=scopes)
+            else:
+                # Handle local file credentials
+                creds = Credentials.from_service_account_file(creds_input, scopes=scopes)
+                
+            self.client = gspread.authorize(creds)
         
         # --- CONFIGURATION ---
         self.USERS_DB_ID = '1NwDxpF_NaeZxWLS2VvSnJYmwj_ztN2ym4l3V0ZiYce4' 
         # The ID of your Master Portfolio Tracker file
         self.MASTER_FILE_ID = '1NwDxpF_NaeZxWLS2VvSnJYmwj_ztN2ym4l3V0ZiYce4' 
+        # Worksheet holding the Users table (Username, Password, Sheet_ID, Email)
+        self.USERS_SHEET_GID = 1266209882
+        self.ALERTS_SHEET_TITLE = "Alerts"
+        self.ALERTS_SHEET_HEADERS = ["Ticker", "Target Price", "Direction", "Subscribers", "Status", "Note", "Last Checked"]
+
+        # Cached Spreadsheet / Worksheet handles: opening a spreadsheet or looking up a tab
+        # by name costs a metadata API call, so each one is resolved once and reused.
+        self._spreadsheets = {}   # spreadsheet key -> Spreadsheet
+        self._worksheets = {}     # (spreadsheet key, title) -> Worksheet
+        self._users_sheet = None
+        self._handles_lock = threading.RLock()
+
+        # Users keyed by username; re-read only when the users spreadsheet changes
+        self.user_index = UserIndex(lambda: self.get_users_sheet().get_all_records(), self._users_revision)
+
+    # --- Handle cache ---
+    def get_spreadsheet(self, key=None):
+        """Cached open_by_key (defaults to the users / alerts database)."""
+        key = key or self.USERS_DB_ID
+        with self._handles_lock:
+            sh = self._spreadsheets.get(key)
+            if sh is None:
+                sh = self.client.open_by_key(key)
+                self._spreadsheets[key] = sh
+            return sh
+
+    def get_worksheet(self, title, key=None):
+        """
+        Cached worksheet lookup by title. Raises WorksheetNotFound; misses are not cached,
+        so a tab created later (e.g. a user's restored User_ tab) is found on the next call.
+        """
+        key = key or self.MASTER_FILE_ID
+        with self._handles_lock:
+            ws = self._worksheets.get((key, title))
+            if ws is None:
+                ws = self.get_spreadsheet(key).worksheet(title)
+                self._worksheets[(key, title)] = ws
+            return ws
+
+    def remember_worksheet(self, ws, key=None):
+        """Adds a handle we already hold (e.g. from add_worksheet) to the cache."""
+        with self._handles_lock:
+            self._worksheets[(key or self.MASTER_FILE_ID, ws.title)] = ws
+
+    def get_users_sheet(self):
+        """The Users worksheet (GID lookup, falling back to the first tab)."""
+        with self._handles_lock:
+            if self._users_sheet is None:
+                db_spreadsheet = self.get_spreadsheet(self.USERS_DB_ID)
+                db_sheet = None
+                for worksheet in db_spreadsheet.worksheets():
+                    if str(worksheet.id) == str(self.USERS_SHEET_GID):
+                        db_sheet = worksheet
+                        break
+                if db_sheet is None: db_sheet = db_spreadsheet.get_worksheet(0)
+                self._users_sheet = db_sheet
+            return self._users_sheet
+
+    def get_alerts_sheet(self):
+        """The shared Alerts worksheet, created with headers on first use if missing."""
+        with self._handles_lock:
+            try:
+                return self.get_worksheet(self.ALERTS_SHEET_TITLE, self.USERS_DB_ID)
+            except WorksheetNotFound:
+                ws = self.get_spreadsheet(self.USERS_DB_ID).add_worksheet(title=self.ALERTS_SHEET_TITLE, rows=100, cols=10)
+                ws.append_row(self.ALERTS_SHEET_HEADERS)
+                self.remember_worksheet(ws, self.USERS_DB_ID)
+                return ws
+
+    def spreadsheet_revision(self, key=None):
+        """Spreadsheet last update time: one small Drive call instead of re-reading a table."""
+        sh = self.get_spreadsheet(key)
+        getter = getattr(sh, 'get_lastUpdateTime', None)
+        return getter() if getter else sh.lastUpdateTime
+
+    def _users_revision(self):
+        return self.spreadsheet_revision(self.USERS_DB_ID)
+
+    def invalidate_handles(self, title=None):
+        """
+        Drops cached handles so the next access re-resolves them: everything, or only the
+        worksheets with `title`. Call after a tab is renamed / deleted or an action fails.
+        """
+        with self._handles_lock:
+            if title is None:
+                self._spreadsheets.clear()
+                self._worksheets.clear()
+                self._users_sheet = None
+            else:
+                for k in [k for k in self._worksheets if k[1] == title]:
+                    del self._worksheets[k]
 
     def sign_up(self, username, password, user_email=""):
         """
         Registers a new user, creates their specific tabs, and cleans up the sheet.
         """
         try:
-            # 1. Access the Users Database
-            db_spreadsheet = self.client.open_by_key(self.USERS_DB_ID)
-            
-            # Find the specific worksheet in DB (GID 1266209882)
-            db_sheet = None
-            for worksheet in db_spreadsheet.worksheets():
-                if str(worksheet.id) == '1266209882':
-                    db_sheet = worksheet
-                    break
-            if db_sheet is None: db_sheet = db_spreadsheet.get_worksheet(0)
+            # 1. Access the Users Database (cached handle, GID 1266209882)
+            db_sheet = self.get_users_sheet()
 
             # 2. Check if username already exists
-            existing_users = db_sheet.col_values(1)
-            if username in existing_users:
+            if self.user_index.exists(username):
                 return False, "Error: Username already taken."
 
             # --- 3. Create Transaction Tab ---
-            master_file = self.client.open_by_key(self.MASTER_FILE_ID)
+            master_file = self.get_spreadsheet(self.MASTER_FILE_ID)
             
             # Create the tab
             new_user_tab = master_file.add_worksheet(title=f"User_{username}", rows="100", cols="5")
@@ -57,20 +148,24 @@ class PortfolioManager:
             
             # Clean up: Delete all columns from F onwards (resize to exactly 5 columns)
             new_user_tab.resize(rows=100, cols=5)
+            self.remember_worksheet(new_user_tab)
 
             # --- 4. Create Alerts Tab ---
             # This ensures every user has a place to store price alerts
             alerts_tab = master_file.add_worksheet(title=f"Alerts_{username}", rows="50", cols="4")
             alert_headers = ["Ticker", "Target", "Condition", "Active"]
             alerts_tab.append_row(alert_headers)
+            self.remember_worksheet(alerts_tab)
 
             # 5. Save user to Database
             # We store the Transaction Tab Name in the 'Sheet_ID' column
             db_sheet.append_row([username, password, f"User_{username}", user_email])
+            self.user_index.add({'Username': username, 'Password': password, 'Sheet_ID': f"User_{username}", 'Email': user_email})
             
             return True, "Success! User created."
             
         except Exception as e:
+            self.invalidate_handles()
             return False, f"Error during signup: {str(e)}"
 
     def login(self, username, password):
@@ -79,48 +174,37 @@ class PortfolioManager:
         """
         print(f"DEBUG: NEW LOGIN EXECUTING for {username}")
         try:
-            db_spreadsheet = self.client.open_by_key(self.USERS_DB_ID)
-            db_sheet = None
-            for worksheet in db_spreadsheet.worksheets():
-                if str(worksheet.id) == '1266209882':
-                    db_sheet = worksheet
-                    break
-            if db_sheet is None: db_sheet = db_spreadsheet.get_worksheet(0)
-
-            all_records = db_sheet.get_all_records() 
-            for record in all_records:
-                if str(record.get('Username')) == str(username) and str(record.get('Password')) == str(password):
-                    master_file = self.client.open_by_key(self.MASTER_FILE_ID)
-                    
-                    user_tab_name = record.get('Sheet_ID') 
-                    
-                    # 1. Transaction Tab
-                    try:
-                        trans_tab = master_file.worksheet(user_tab_name)
-                    except Exception as e:
-                        print(f"Error finding user tab: {e}")
-                        return False, None, None, None
-                    
-                    # 2. Alerts Tab
-                    alerts_tab_name = user_tab_name.replace("User_", "Alerts_")
-                    
+            record = self.user_index.authenticate(username, password)
+            if record is not None:
+                user_tab_name = record.get('Sheet_ID') 
+                
+                # 1. Transaction Tab
+                try:
+                    trans_tab = self.get_worksheet(user_tab_name)
+                except Exception as e:
+                    print(f"Error finding user tab: {e}")
+                    return False, None, None, None
+                
+                # 2. Alerts Tab
+                alerts_tab_name = user_tab_name.replace("User_", "Alerts_")
+                
+                try:
+                    alerts_tab = self.get_worksheet(alerts_tab_name)
+                except:
                     try:
-                        alerts_tab = master_file.worksheet(alerts_tab_name)
+                         # Fallback for old style "Alerts_Ben" vs "Alerts_User_Ben" (just trying)
+                         alerts_tab = self.get_worksheet(f"Alerts_{username}")
                     except:
-                        try:
-                             # Fallback for old style "Alerts_Ben" vs "Alerts_User_Ben" (just trying)
-                             alerts_tab = master_file.worksheet(f"Alerts_{username}")
-                        except:
-                            print("Alerts tab not found.")
-                            alerts_tab = None 
-                    
-                    # 3. Email
-                    user_email = record.get('Email', '')
-                    if not user_email: user_email = "unknown@email.com"
-                    
-                    print(f"DEBUG: LOGIN SUCCESS - Email: {user_email}")
-                    # RETURN 4 VALUES (Success, Trans, Alerts, Email)
-                    return True, trans_tab, alerts_tab, user_email
+                        print("Alerts tab not found.")
+                        alerts_tab = None 
+                
+                # 3. Email
+                user_email = record.get('Email', '')
+                if not user_email: user_email = "unknown@email.com"
+                
+                print(f"DEBUG: LOGIN SUCCESS - Email: {user_email}")
+                # RETURN 4 VALUES (Success, Trans, Alerts, Email)
+                return True, trans_tab, alerts_tab, user_email
             
             # RETURN 4 VALUES (User not found)
             print("Login failed: User not found")
@@ -128,6 +212,7 @@ class PortfolioManager:
             
         except Exception as e:
             print(f"Login error (EXCEPTION): {e}")
+            self.invalidate_handles()
             import traceback
             traceback.print_exc()
             # RETURN 4 VALUES (General Error)
@@ -0,0 +1,245 @@
+"""
+Price Providers
+Every price consumer (history, live quotes, metadata, ticker validation) goes
+through a PriceProvider so the whole pipeline can run offline from fixtures.
+
+Select with environment variables:
+    PRICE_PROVIDER=yfinance (default) | local
+    PRICE_FIXTURES_DIR=path/to/fixtures   (for 'local')
+"""
+
+import os
+import threading
+from datetime import timedelta
+
+import pandas as pd
+import yfinance as yf
+
+from bulk_download import BulkDownloader, DOWNLOAD_WORKERS
+
+UNKNOWN_METADATA = {'sector': 'Unknown', 'category': 'Unknown', 'name': None, 'currency': 'USD'}
+
+
+def extract_closes(raw_data, tickers):
+    """
+    dates x tickers Close frame from a yf.download() result (single or multi ticker).
+    A ticker with no data in the range keeps an all-NaN (or zero-row) column.
+    """
+    if raw_data is None or len(raw_data.columns) == 0:
+        return pd.DataFrame()
+    # Scenario A: Multiple Tickers (returns MultiIndex columns)
+    if isinstance(raw_data.columns, pd.MultiIndex):
+        if 'Close' not in raw_data.columns.get_level_values(0):
+            return pd.DataFrame()
+        closes = raw_data['Close']
+    # Scenario B: Single Ticker (returns Flat columns: Open, High, Low, Close)
+    elif 'Close' in raw_data.columns:
+        closes = raw_data[['Close']].copy()
+        closes.columns = [tickers[0]]
+    else:
+        return pd.DataFrame()
+    closes = closes.copy()
+    if getattr(closes.index, 'tz', None) is not None:
+        closes.index = closes.index.tz_localize(None)
+    return closes
+
+
+def drop_raised(closes, raised):
+    """
+    Drops the columns of tickers whose request raised (rate limit, timeout). yfinance returns
+    them as all-NaN columns, like tickers with no data in the range; without them in the
+    answer the downloader retries them. "No data" is a soft error in yfinance (no traceback)
+    and stays an empty answer.
+    """
+    raised = {str(t).upper() for t in raised}
+    return closes.drop(columns=[c for c in closes.columns if str(c).upper() in raised])
+
+
+def quotes_from_closes(closes, tickers):
+    """{ticker: {'price', 'prev_close'}} from the last two valid closes (0.0 when no data)."""
+    quotes = {}
+    for ticker in tickers:
+        current_price = 0.0
+        prev_close = 0.0
+        if ticker in closes.columns:
+            history = closes[ticker].dropna()
+            if not history.empty:
+                current_price = float(history.iloc[-1])
+                prev_close = float(history.iloc[-2]) if len(history) >= 2 else current_price
+        quotes[ticker] = {'price': current_price, 'prev_close': prev_close}
+    return quotes
+
+
+# --- Interface ---
+class PriceProvider:
+    """
+    Batch interface for market data. Dates are naive and 'end' is inclusive.
+    """
+    name = 'base'
+
+    def get_history(self, tickers, start, end):
+        """dates x tickers frame of daily closes."""
+        raise NotImplementedError
+
+    def get_latest_quotes(self, tickers):
+        """{ticker: {'price', 'prev_close'}}; 0.0 when unavailable."""
+        raise NotImplementedError
+
+    def get_metadata(self, tickers):
+        """{ticker: {'sector', 'category', 'name', 'currency'}}; missing tickers are omitted."""
+        raise NotImplementedError
+
+    def validate_ticker(self, ticker):
+        """True if the ticker has recent price data."""
+        quote = self.get_latest_quotes([ticker]).get(ticker) or {}
+        return quote.get('price', 0) > 0
+
+
+# --- yfinance ---
+class YFinanceProvider(PriceProvider):
+    name = 'yfinance'
+
+    def __init__(self, downloader=None):
+        # Older yfinance keeps download state in module globals: concurrent calls would mix results
+        workers = DOWNLOAD_WORKERS if hasattr(yf.multi, '_DownloadCtx') else 1
+        self.downloader = downloader or BulkDownloader(self._download_chunk, max_workers=workers)
+
+    @staticmethod
+    def _download_chunk(tickers, start, end):
+        # threads=False is safer for Streamlit Cloud (chunks run in the downloader's bounded pool);
+        # yfinance 'end' is exclusive
+        end = pd.Timestamp(end) + timedelta(days=1)
+        if hasattr(yf.multi, '_DownloadCtx'):
+            # Same call as yf.download(), keeping the per-call context to see which tickers raised
+            ctx = yf.multi._DownloadCtx()
+            raw = yf.multi._download_impl(ctx, tickers, start=start, end=end, auto_adjust=True,
+                                          progress=False, threads=False)
+            raised = set(ctx.tracebacks)
+        else:
+            raw = yf.download(tickers, start=start, end=end, progress=False, threads=False)
+            raised = set(getattr(getattr(yf, 'shared', None), '_TRACEBACKS', {}))
+        return drop_raised(extract_closes(raw, tickers), raised)
+
+    def get_history(self, tickers, start, end):
+        return self.downloader.download(tickers, start, end)
+
+    def get_latest_quotes(self, tickers):
+        # 5 days of history in bulk guarantees Prices + Daily Returns
+        raw = yf.download(tickers, period="5d", progress=False)
+        return quotes_from_closes(extract_closes(raw, tickers), tickers)
+
+    def get_metadata(self, tickers):
+        metadata = {}
+        for ticker in tickers:
+            try:
+                info = yf.Ticker(ticker).info or {}
+            except Exception as e:
+                print(f"Metadata fetch failed for {ticker}: {e}")
+                continue
+            metadata[ticker] = {
+                'sector': info.get('sector', 'Unknown'),
+                'category': info.get('category', 'Unknown'),
+                'name': info.get('shortName') or info.get('longName') or ticker,
+                'currency': info.get('currency', 'USD'),
+            }
+        return metadata
+
+    def validate_ticker(self, ticker):
+        # History is safer/faster than info which downloads a lot of JSON
+        return not yf.Ticker(ticker).history(period='1d').empty
+
+
+# --- Local fixtures ---
+class LocalFileProvider(PriceProvider):
+    """
+    Reads fixtures from a directory:
+        prices.parquet or prices.csv  - wide panel, 'Date' column + one Close column per ticker
+        metadata.csv                  - Ticker, sector, category, name, currency
+    'as_of' pins "today" so latest quotes are reproducible.
+    """
+    name = 'local'
+
+    def __init__(self, fixtures_dir, as_of=None):
+        self.fixtures_dir = fixtures_dir
+        self.as_of = pd.Timestamp(as_of) if as_of is not None else None
+        self._panel = None
+        self._metadata = None
+        self._lock = threading.Lock()
+
+    def _load_panel(self):
+        with self._lock:
+            if self._panel is None:
+                parquet = os.path.join(self.fixtures_dir, 'prices.parquet')
+                if os.path.exists(parquet):
+                    panel = pd.read_parquet(parquet)
+                else:
+                    panel = pd.read_csv(os.path.join(self.fixtures_dir, 'prices.csv'))
+                if 'Date' in panel.columns:
+                    panel = panel.set_index('Date')
+                panel.index = pd.to_datetime(panel.index)
+                self._panel = panel.sort_index()
+            return self._panel
+
+    def _load_metadata(self):
+        with self._lock:
+            if self._metadata is None:
+                path = os.path.join(self.fixtures_dir, 'metadata.csv')
+                if os.path.exists(path):
+                    df = pd.read_csv(path).set_index('Ticker')
+                    self._metadata = {t: {**UNKNOWN_METADATA, 'name': t, **row.dropna().to_dict()}
+                                      for t, row in df.iterrows()}
+                else:
+                    self._metadata = {}
+            return self._metadata
+
+    def get_history(self, tickers, start, end):
+        panel = self._load_panel()
+        end = pd.Timestamp(end)
+        if self.as_of is not None:
+            end = min(end, self.as_of)
+        cols = [t for t in tickers if t in panel.columns]
+        return panel.loc[pd.Timestamp(start):end, cols].dropna(how='all')
+
+    def get_latest_quotes(self, tickers):
+        panel = self._load_panel()
+        if self.as_of is not None:
+            panel = panel.loc[:self.as_of]
+        return quotes_from_closes(panel.tail(10), tickers)
+
+    def get_metadata(self, tickers):
+        metadata = self._load_metadata()
+        return {t: metadata[t] for t in tickers if t in metadata}
+
+
+def save_fixtures(fixtures_dir, panel, metadata=None):
+    """Writes a Close panel (and optional metadata frame) in LocalFileProvider's layout."""
+    os.makedirs(fixtures_dir, exist_ok=True)
+    out = panel.copy()
+    out.index.name = 'Date'
+    out.reset_index().to_csv(os.path.join(fixtures_dir, 'prices.csv'), index=False)
+    if metadata is not None:
+        metadata.to_csv(os.path.join(fixtures_dir, 'metadata.csv'), index=False)
+
+
+# --- Process-wide provider ---
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def get_price_provider():
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            if os.getenv('PRICE_PROVIDER', 'yfinance').lower() == 'local':
+                _provider = LocalFileProvider(os.getenv('PRICE_FIXTURES_DIR', 'fixtures'),
+                                              as_of=os.getenv('PRICE_FIXTURES_AS_OF'))
+            else:
+                _provider = YFinanceProvider()
+        return _provider
+
+
+def set_price_provider(provider):
+    """Swap the provider (benchmarks, load tests, offline runs)."""
+    global _provider
+    with _provider_lock:
+        _provider = provider
@@ -0,0 +1,238 @@
+"""
+Local Price History Store
+SQLite table of daily closes keyed by (ticker, date), plus the date range already
+covered per ticker. Reads come from disk; only ranges not yet stored are downloaded.
+A range the provider answered with no closes (before an IPO, after a delisting) is
+remembered for a short TTL only, never as coverage.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, time as dtime, timedelta, timezone
+
+import pandas as pd
+
+from market_calendar import get_market_calendar, is_crypto, trading_days
+from metadata_store import DEFAULT_CACHE_DIR
+from price_provider import get_price_provider
+
+# The latest bar can still change intraday; re-check the tail at most this often
+DEFAULT_TAIL_TTL_SECONDS = 15 * 60
+# A session's close can still be revised for a while after the bell
+TAIL_SETTLE_SECONDS = 60 * 60
+# Skip re-downloading a range that came back empty for this long
+DEFAULT_EMPTY_TTL_SECONDS = 6 * 3600
+
+
+def _download_closes(tickers, start, end):
+    return get_price_provider().get_history(tickers, start, end)
+
+
+def _day(value):
+    return pd.Timestamp(value).normalize()
+
+
+def _session(ticker, day):
+    """(open, close) aware datetimes of the ticker's session on `day`, or None (crypto: the UTC day)."""
+    if is_crypto(ticker):
+        start = datetime.combine(day.date(), dtime(0), timezone.utc)
+        return start, start + timedelta(days=1)
+    return get_market_calendar().session(day.date())
+
+
+def _tail_may_change(ticker, cov_end, end, checked_at, now):
+    """
+    True if a re-download could change the tail: the last stored session was checked
+    before it settled (and has opened), or a later session up to `end` has opened.
+    False on weekends, holidays and after a settled close.
+    """
+    checked = datetime.fromtimestamp(checked_at or 0, timezone.utc)
+    last = _session(ticker, cov_end)
+    if last is not None and last[0] <= now and checked < last[1] + timedelta(seconds=TAIL_SETTLE_SECONDS):
+        return True
+    later = trading_days(cov_end + timedelta(days=1), end, crypto=is_crypto(ticker))
+    return len(later) > 0 and _session(ticker, later[0])[0] <= now
+
+
+class PriceStore:
+    def __init__(self, path=None, tail_ttl_seconds=DEFAULT_TAIL_TTL_SECONDS, downloader=None,
+                 empty_ttl_seconds=DEFAULT_EMPTY_TTL_SECONDS):
+        """
+        path: SQLite file (defaults to .cache/prices.sqlite)
+        downloader: callable(tickers, start, end) -> dates x tickers Close frame
+        """
+        self.path = path or os.path.join(DEFAULT_CACHE_DIR, 'prices.sqlite')
+        self.tail_ttl_seconds = tail_ttl_seconds
+        self.empty_ttl_seconds = empty_ttl_seconds
+        self._download = downloader or _download_closes
+        self._lock = threading.Lock()
+        self.network_calls = 0
+        self.rows_written = 0
+
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS prices ("
+                "ticker TEXT, date TEXT, close REAL, PRIMARY KEY (ticker, date))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS coverage ("
+                "ticker TEXT PRIMARY KEY, start TEXT, end TEXT, checked_at REAL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS empty_ranges ("
+                "ticker TEXT, start TEXT, end TEXT, checked_at REAL, PRIMARY KEY (ticker, start, end))"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    # --- Coverage ---
+    def _coverage(self, tickers):
+        placeholders = ",".join("?" * len(tickers))
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT ticker, start, end, checked_at FROM coverage WHERE ticker IN ({placeholders})",
+                list(tickers)
+            ).fetchall()
+        return {t: (_day(s), _day(e), c) for t, s, e, c in rows}
+
+    def _recent_empty(self, tickers, now):
+        """{ticker: [(start, end)]} answered with no closes within the empty TTL."""
+        placeholders = ",".join("?" * len(tickers))
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT ticker, start, end FROM empty_ranges WHERE ticker IN ({placeholders}) AND checked_at > ?",
+                list(tickers) + [now - self.empty_ttl_seconds]
+            ).fetchall()
+        empty = {}
+        for t, s, e in rows:
+            empty.setdefault(t, []).append((_day(s), _day(e)))
+        return empty
+
+    def missing_ranges(self, tickers, start, end, now=None):
+        """
+        {(gap_start, gap_end): [tickers]} still to download.
+        Tickers sharing a gap are grouped so they go out in one request.
+        now: epoch seconds (defaults to the current time)
+        """
+        start, end = _day(start), _day(end)
+        coverage = self._coverage(tickers)
+        now = time.time() if now is None else now
+        now_utc = datetime.fromtimestamp(now, timezone.utc)
+        empty = self._recent_empty(tickers, now)
+        gaps = {}
+
+        def add_gap(ticker, gap):
+            if not any(s <= gap[0] and gap[1] <= e for s, e in empty.get(ticker, [])):
+                gaps.setdefault(gap, []).append(ticker)
+
+        for ticker in tickers:
+            if ticker not in coverage:
+                add_gap(ticker, (start, end))
+                continue
+            cov_start, cov_end, checked_at = coverage[ticker]
+            if start < cov_start:
+                # Keep a single contiguous range per ticker
+                add_gap(ticker, (start, cov_start - timedelta(days=1)))
+            if (end >= cov_end and now - (checked_at or 0) > self.tail_ttl_seconds
+                    and _tail_may_change(ticker, cov_end, end, checked_at, now_utc)):
+                # Re-fetch from the last stored day (even when it is the requested end):
+                # its close may have been intraday
+                add_gap(ticker, (min(cov_end, end), end))
+        return gaps
+
+    # --- Read / Write ---
+    def _write(self, closes, tickers, start, end):
+        records = []
+        answered, empty = [], []
+        for ticker in tickers:
+            if ticker not in closes.columns:
+                continue
+            series = closes[ticker].dropna()
+            records.extend((ticker, d.strftime('%Y-%m-%d'), float(v)) for d, v in series.items())
+            (answered if len(series) else empty).append(ticker)
+
+        now = time.time()
+        with self._connect() as conn:
+            conn.executemany("INSERT OR REPLACE INTO prices (ticker, date, close) VALUES (?, ?, ?)", records)
+            # No closes is not proof there are none (a failure can look the same): short TTL, no coverage
+            conn.execute("DELETE FROM empty_ranges WHERE checked_at <= ?", (now - self.empty_ttl_seconds,))
+            conn.executemany(
+                "INSERT OR REPLACE INTO empty_ranges (ticker, start, end, checked_at) VALUES (?, ?, ?, ?)",
+                [(t, start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d'), now) for t in empty]
+            )
+            # Only tickers that returned closes are covered; the rest keep their gap open
+            for ticker in answered:
+                row = conn.execute("SELECT start, end FROM coverage WHERE ticker = ?", (ticker,)).fetchone()
+                new_start, new_end = start, end
+                if row:
+                    new_start = min(start, _day(row[0]))
+                    new_end = max(end, _day(row[1]))
+                conn.execute(
+                    "INSERT OR REPLACE INTO coverage (ticker, start, end, checked_at) VALUES (?, ?, ?, ?)",
+                    (ticker, new_start.strftime('%Y-%m-%d'), new_end.strftime('%Y-%m-%d'), now)
+                )
+        with self._lock:
+            self.rows_written += len(records)
+
+    def read(self, tickers, start, end):
+        """Stored closes as a dates x tickers frame (no network)."""
+        placeholders = ",".join("?" * len(tickers))
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT ticker, date, close FROM prices WHERE ticker IN ({placeholders}) AND date BETWEEN ? AND ?",
+                list(tickers) + [_day(start).strftime('%Y-%m-%d'), _day(end).strftime('%Y-%m-%d')]
+            ).fetchall()
+        if not rows:
+            return pd.DataFrame()
+        long_df = pd.DataFrame(rows, columns=['Ticker', 'Date', 'Close'])
+        long_df['Date'] = pd.to_datetime(long_df['Date'])
+        wide = long_df.pivot(index='Date', columns='Ticker', values='Close').sort_index()
+        wide.columns.name = None
+        return wide[[t for t in tickers if t in wide.columns]]
+
+    def get_closes(self, tickers, start, end=None):
+        """
+        dates x tickers Close frame for [start, end].
+        Downloads only the missing date ranges, then serves everything from disk.
+        """
+        tickers = list(dict.fromkeys(tickers))
+        if not tickers:
+            return pd.DataFrame()
+        start = _day(start)
+        end = _day(end if end is not None else datetime.now())
+
+        for (gap_start, gap_end), gap_tickers in self.missing_ranges(tickers, start, end).items():
+            try:
+                closes = self._download(gap_tickers, gap_start, gap_end)
+                with self._lock:
+                    self.network_calls += 1
+            except Exception as e:
+                print(f"Price download failed for {gap_tickers}: {e}")
+                continue
+            if closes is None:
+                continue
+            self._write(closes, gap_tickers, gap_start, gap_end)
+
+        return self.read(tickers, start, end)
+
+    def stats(self):
+        with self._lock:
+            return {'network_calls': self.network_calls, 'rows_written': self.rows_written}
+
+
+# --- Process-wide store ---
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_price_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = PriceStore()
+        return _store
@@ -0,0 +1,144 @@
+"""
+Shared Quote Cache
+Process-wide TTL cache of latest quotes keyed by ticker, shared by every
+Streamlit session. Concurrent requests for the same ticker share one in-flight
+fetch, and stale quotes are served immediately while a background refresh runs.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+from price_provider import get_price_provider
+
+DEFAULT_TTL_SECONDS = float(os.getenv('QUOTE_TTL_SECONDS', 60))
+# Past this age a quote is too old to serve while refreshing; callers wait instead
+DEFAULT_MAX_STALE_SECONDS = float(os.getenv('QUOTE_MAX_STALE_SECONDS', 15 * 60))
+
+
+def _download_quotes(tickers):
+    return get_price_provider().get_latest_quotes(tickers)
+
+
+class QuoteCache:
+    def __init__(self, fetcher, ttl_seconds=DEFAULT_TTL_SECONDS, max_stale_seconds=DEFAULT_MAX_STALE_SECONDS):
+        """
+        fetcher: callable(list of tickers) -> {ticker: quote dict}; one batch call per miss set
+        """
+        self._fetch = fetcher
+        self.ttl_seconds = ttl_seconds
+        self.max_stale_seconds = max_stale_seconds
+        self._quotes = {}      # ticker -> (quote, fetched_at)
+        self._inflight = {}    # ticker -> Future shared by every waiter
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.fetches = 0
+
+    def _start_fetch(self, tickers):
+        """Registers futures for tickers not already in flight. Caller holds the lock."""
+        owned = [t for t in tickers if t not in self._inflight]
+        for t in owned:
+            self._inflight[t] = Future()
+        return owned
+
+    def _run_fetch(self, tickers):
+        try:
+            quotes = self._fetch(tickers) or {}
+            error = None
+        except Exception as e:
+            quotes, error = {}, e
+        now = time.time()
+        with self._lock:
+            self.fetches += 1
+            futures = {t: self._inflight.pop(t) for t in tickers if t in self._inflight}
+            for t, quote in quotes.items():
+                # Don't pin failed lookups (price 0); the next call retries
+                if quote and quote.get('price', 0) > 0:
+                    self._quotes[t] = (quote, now)
+        for t, future in futures.items():
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(quotes.get(t))
+
+    def get_many(self, tickers):
+        """
+        Returns {ticker: quote}. Fresh and stale-but-servable quotes return at once;
+        only missing ones block, and those are shared with any concurrent caller.
+        """
+        tickers = list(dict.fromkeys(tickers))
+        result, to_wait, refresh = {}, {}, []
+        now = time.time()
+
+        with self._lock:
+            for t in tickers:
+                cached = self._quotes.get(t)
+                age = now - cached[1] if cached else None
+                if cached and age <= self.ttl_seconds:
+                    self.hits += 1
+                    result[t] = cached[0]
+                elif cached and age <= self.max_stale_seconds:
+                    self.stale_hits += 1
+                    result[t] = cached[0]
+                    refresh.append(t)
+                else:
+                    self.misses += 1
+                    if t in self._inflight:
+                        self.coalesced += 1
+                    to_wait[t] = None
+            owned_refresh = self._start_fetch(refresh)
+            owned_now = self._start_fetch(list(to_wait))
+            for t in to_wait:
+                to_wait[t] = self._inflight[t]
+
+        if owned_refresh:
+            threading.Thread(target=self._run_fetch, args=(owned_refresh,), daemon=True).start()
+        if owned_now:
+            self._run_fetch(owned_now)
+
+        for t, future in to_wait.items():
+            try:
+                quote = future.result()
+            except Exception as e:
+                print(f"Quote fetch failed for {t}: {e}")
+                quote = None
+            if quote is not None:
+                result[t] = quote
+        return result
+
+    def invalidate(self, tickers=None):
+        with self._lock:
+            if tickers is None:
+                self._quotes.clear()
+            else:
+                for t in tickers:
+                    self._quotes.pop(t, None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+                'fetches': self.fetches,
+                'cached_tickers': len(self._quotes),
+                'in_flight': len(self._inflight),
+            }
+
+
+# --- Process-wide cache (shared by every session) ---
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_quote_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = QuoteCache(_download_quotes)
+        return _cache
@@ -0,0 +1,209 @@
+"""
+Returns Engine
+Time-weighted returns (daily returns with external cash flows removed, chained)
+and money-weighted returns (XIRR). The XIRR solver works on a whole batch of
+cash-flow schedules at once - padded (problems x flows) arrays and a
+bracketed Newton iteration in numpy - so every user and every rolling window
+can be solved in one call.
+"""
+
+import numpy as np
+import pandas as pd
+
+from ledger import normalize_transactions
+
+DAYS_PER_YEAR = 365.0  # XIRR convention (matches spreadsheet XIRR)
+# Solve on x = log(1 + rate) within +-max(10, 50 / span in years): wide enough for any
+# annualized rate of a short window, narrow enough that exp() can't overflow
+_X_MIN_BRACKET = 10.0
+_X_SPAN_BRACKET = 50.0
+
+
+# --- 1. External cash flows ---
+def external_flows(transactions_df, dates):
+    """
+    Money moved in (+) or out (-) of the portfolio on each date: deposits, withdrawals
+    and 'Initial' positions. Flows dated between two dates count on the next one;
+    flows outside [first date, last date] are left out (they're already in, or not
+    yet in, the values).
+    """
+    dates = pd.DatetimeIndex(dates)
+    if transactions_df is None or transactions_df.empty or dates.empty:
+        return pd.Series(0.0, index=dates)
+    norm = normalize_transactions(transactions_df)
+    flows = norm[norm['Date'].notna()].groupby('Date')['Deposit_Delta'].sum().sort_index()
+    if flows.empty:
+        return pd.Series(0.0, index=dates)
+    # Position of the first date on or after each flow
+    pos = np.searchsorted(dates.values, flows.index.values, side='left')
+    keep = (pos < len(dates)) & (flows.index.values >= dates.values[0])
+    out = np.zeros(len(dates))
+    np.add.at(out, pos[keep], flows.to_numpy()[keep])
+    return pd.Series(out, index=dates)
+
+
+# --- 2. Time-weighted ---
+def time_weighted_returns(values, flows):
+    """
+    Daily returns with flows removed: r_t = V_t / (V_{t-1} + F_t) - 1 (a flow is invested
+    at the start of its day). The first day, and days with nothing invested, return 0.
+    """
+    v = np.asarray(values, dtype=float)
+    f = np.asarray(flows, dtype=float)
+    r = np.zeros(len(v))
+    if len(v) > 1:
+        base = v[:-1] + f[1:]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            r[1:] = np.where(base > 0, v[1:] / base - 1.0, 0.0)
+    index = values.index if isinstance(values, pd.Series) else None
+    return pd.Series(r, index=index)
+
+
+def cumulative_twr(values, flows):
+    """Chained time-weighted return since the first day, in %."""
+    daily = time_weighted_returns(values, flows)
+    return (np.cumprod(1.0 + daily.to_numpy()) - 1.0) * 100
+
+
+# --- 3. Money-weighted (XIRR) ---
+def _solve_log_rates(amounts, years, mask=None, tol=1e-9, max_iter=100):
+    """
+    log(1 + IRR) per row of a padded batch: -inf for a total loss (money in, nothing back),
+    NaN where no IRR exists.
+    """
+    a = np.asarray(amounts, dtype=float)
+    t = np.asarray(years, dtype=float)
+    if a.ndim == 1:
+        a, t = a[None, :], t[None, :]
+        mask = None if mask is None else np.asarray(mask)[None, :]
+    if mask is not None:
+        a = np.where(mask, a, 0.0)
+    # Zero amounts (days without a flow, padding) don't change the NPV: pack each row's real
+    # flows to the front and cut the width to the longest row, e.g. 5,040 days -> ~250 flows
+    nonzero = a != 0
+    t = np.where(nonzero, t, 0.0)
+    width = int(nonzero.sum(axis=1).max()) if a.size else 0
+    if width < a.shape[1]:
+        order = np.argsort(~nonzero, axis=1, kind='stable')[:, :width]
+        a = np.take_along_axis(a, order, axis=1)
+        t = np.take_along_axis(t, order, axis=1)
+    k = a.shape[0]
+
+    def npv(x, rows=slice(None)):
+        ar, tr = a[rows], t[rows]
+        disc = np.exp(-tr * x[:, None])
+        return (ar * disc).sum(axis=1), -(ar * tr * disc).sum(axis=1)
+
+    span = t.max(axis=1)
+    with np.errstate(divide='ignore'):
+        width = np.maximum(_X_MIN_BRACKET, np.where(span > 0, _X_SPAN_BRACKET / span, _X_MIN_BRACKET))
+    lo, hi = -width, width.copy()
+    f_lo, _ = npv(lo)
+    f_hi, _ = npv(hi)
+    solvable = np.sign(f_lo) * np.sign(f_hi) < 0
+    scale = np.abs(a).sum(axis=1) + 1e-300
+
+    # Newton from 0% with the bracket as a safeguard: a step leaving it falls back to bisection.
+    # Each pass only evaluates the rows that haven't converged yet.
+    x = np.zeros(k)
+    active = np.flatnonzero(solvable)
+    for _ in range(max_iter):
+        if not active.size:
+            break
+        xa = x[active]
+        f, df = npv(xa, active)
+        converged = np.abs(f) <= tol * scale[active]
+        below = np.sign(f) == np.sign(f_lo[active])
+        lo_a = np.where(below, xa, lo[active])
+        hi_a = np.where(below, hi[active], xa)
+        f_lo[active] = np.where(below, f, f_lo[active])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            step = xa - f / df
+        bisect = ~np.isfinite(step) | (step <= np.minimum(lo_a, hi_a)) | (step >= np.maximum(lo_a, hi_a))
+        x[active] = np.where(converged, xa, np.where(bisect, 0.5 * (lo_a + hi_a), step))
+        lo[active], hi[active] = lo_a, hi_a
+        active = active[~converged & (np.abs(hi_a - lo_a) >= 1e-14)]
+
+    total_loss = (a < 0).any(axis=1) & ~(a > 0).any(axis=1)
+    return np.where(solvable, x, np.where(total_loss, -np.inf, np.nan))
+
+
+def xirr_batch(amounts, years, mask=None, tol=1e-9, max_iter=100):
+    """
+    Annual IRR for each row of a padded batch of cash-flow schedules.
+    amounts, years: (problems x flows) arrays; years are measured from each row's first flow.
+    mask: which cells are real flows (default: all).
+    Returns a float array: -1.0 (-100%) where nothing came back, NaN where no IRR exists
+    (e.g. no money in).
+    """
+    with np.errstate(over='ignore'):
+        return np.expm1(_solve_log_rates(amounts, years, mask, tol, max_iter))
+
+
+def pad_schedules(schedules):
+    """
+    [(dates, amounts), ...] of different lengths -> (amounts, years, mask) arrays for
+    xirr_batch, e.g. one schedule per user.
+    """
+    width = max((len(d) for d, _ in schedules), default=0)
+    amounts = np.zeros((len(schedules), width))
+    years = np.zeros((len(schedules), width))
+    mask = np.zeros((len(schedules), width), dtype=bool)
+    for i, (dates, amts) in enumerate(schedules):
+        dates = pd.DatetimeIndex(dates)
+        n = len(dates)
+        if n:
+            amounts[i, :n] = np.asarray(amts, dtype=float)
+            years[i, :n] = (dates - dates.min()).days.to_numpy() / DAYS_PER_YEAR
+            mask[i, :n] = True
+    return amounts, years, mask
+
+
+def xirr(dates, amounts):
+    """IRR of one schedule of dated flows (negative = invested, positive = returned)."""
+    dates = pd.DatetimeIndex(dates)
+    if len(dates) < 2:
+        return float('nan')
+    years = (dates - dates.min()).days.to_numpy() / DAYS_PER_YEAR
+    return float(xirr_batch(np.asarray(amounts, dtype=float), years)[0])
+
+
+def money_weighted_return(values, flows, annualize=True):
+    """
+    XIRR of a value series: the first value and every later flow are invested,
+    the last value is what you'd get back. annualize=False gives the same rate
+    compounded over the series' own span (for periods shorter than a year).
+    """
+    values = pd.Series(values)
+    if len(values) < 2:
+        return float('nan')
+    f = np.asarray(flows, dtype=float)
+    amounts = -f.copy()
+    amounts[0] = -values.iloc[0]
+    amounts[-1] += values.iloc[-1]
+    years = (pd.DatetimeIndex(values.index) - values.index[0]).days.to_numpy() / DAYS_PER_YEAR
+    x = _solve_log_rates(amounts, years)[0]
+    with np.errstate(over='ignore'):
+        return float(np.expm1(x if annualize else x * years[-1]))
+
+
+def rolling_xirr(values, flows, window):
+    """
+    XIRR of every `window`-row window of a value series, solved as one batch.
+    Returns a Series indexed by each window's last date.
+    """
+    values = pd.Series(values)
+    n = len(values)
+    if n <= window:
+        return pd.Series(dtype=float)
+    v = values.to_numpy(dtype=float)
+    f = np.asarray(flows, dtype=float)
+    days = (values.index - values.index[0]).days.to_numpy() / DAYS_PER_YEAR
+
+    ends = np.arange(window, n)
+    cols = ends[:, None] - window + np.arange(window + 1)[None, :]
+    amounts = -f[cols]
+    amounts[:, 0] = -v[ends - window]
+    amounts[:, -1] += v[ends]
+    years = days[cols] - days[cols[:, :1]]
+    return pd.Series(xirr_batch(amounts, years), index=values.index[ends])
@@ -0,0 +1,116 @@
+"""
+Risk Analytics
+Risk measures over the reconstructed NAV (history frame from
+calculate_historical_portfolio_value, SPY close included): rolling volatility,
+beta and correlation to SPY, Sharpe and Sortino ratios, max drawdown and
+drawdown duration. Portfolio returns are time-weighted (cash flows removed), so
+a deposit is not a rally and a withdrawal is not a crash. Everything is computed
+in vectorized passes over the full history; no prices are fetched.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from returns import time_weighted_returns
+
+ROLLING_WINDOW = 63  # ~3 months of sessions
+RISK_FREE_RATE = float(os.getenv('RISK_FREE_RATE', 0.0))  # annual, for Sharpe / Sortino
+
+
+def daily_returns(history_df):
+    """Date-indexed frame of daily 'Portfolio' (time-weighted) and 'SPY' returns, first day dropped."""
+    if history_df is None or len(history_df) < 2:
+        return pd.DataFrame(columns=['Portfolio', 'SPY'], dtype=float)
+    dates = pd.DatetimeIndex(history_df['Date'])
+    spy = history_df['SPY_Price'].to_numpy(dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        spy_r = np.where(spy[:-1] > 0, spy[1:] / spy[:-1] - 1.0, np.nan)
+    rets = pd.DataFrame({
+        'Portfolio': time_weighted_returns(history_df['Portfolio_Value'], history_df['Net_Flow']).to_numpy()[1:],
+        'SPY': spy_r,
+    }, index=dates[1:])
+    return rets
+
+
+def periods_per_year(index):
+    """Sessions per year of a daily index: ~252 on the NYSE calendar, ~365 with crypto held."""
+    if len(index) < 2:
+        return 252.0
+    years = (index[-1] - index[0]).days / 365.25
+    return len(index) / years if years > 0 else 252.0
+
+
+def rolling_risk(rets, window=ROLLING_WINDOW, annualization=None):
+    """Rolling annualized volatility (%), beta and correlation to SPY over `window` sessions."""
+    ann = annualization or periods_per_year(rets.index)
+    port, spy = rets['Portfolio'], rets['SPY']
+    roll_port = port.rolling(window, min_periods=window)
+    cov = roll_port.cov(spy)
+    var_spy = spy.rolling(window, min_periods=window).var()
+    return pd.DataFrame({
+        'Volatility_%': roll_port.std() * np.sqrt(ann) * 100,
+        'Beta': cov / var_spy.where(var_spy > 0),
+        'Correlation': roll_port.corr(spy),
+    })
+
+
+def drawdowns(rets):
+    """
+    Drawdown of the time-weighted growth index (%, <= 0) and the number of sessions
+    since its last peak at each date.
+    """
+    growth = np.cumprod(1.0 + rets['Portfolio'].to_numpy())
+    growth = np.concatenate([[1.0], growth])  # the day before the first return is the first peak
+    peak = np.maximum.accumulate(growth)
+    dd = (growth / peak - 1.0) * 100
+    # Sessions since the last new high: position minus the position of the running peak
+    pos = np.arange(len(growth))
+    last_peak = np.maximum.accumulate(np.where(growth >= peak, pos, 0))
+    return pd.DataFrame({'Drawdown_%': dd[1:], 'Underwater_Sessions': (pos - last_peak)[1:]}, index=rets.index)
+
+
+def risk_summary(rets, risk_free=RISK_FREE_RATE, annualization=None):
+    """Full-period risk figures; NaN where there is too little data."""
+    ann = annualization or periods_per_year(rets.index)
+    port, spy = rets['Portfolio'], rets['SPY']
+    excess = port - risk_free / ann
+    vol = port.std() * np.sqrt(ann)
+    downside = np.sqrt((np.minimum(excess, 0.0) ** 2).mean()) * np.sqrt(ann)
+    var_spy = spy.var()
+    dd = drawdowns(rets)
+    if len(dd):
+        trough = dd['Drawdown_%'].idxmin()
+        max_dd = float(dd['Drawdown_%'].min())
+        longest = int(dd['Underwater_Sessions'].max())
+    else:
+        trough, max_dd, longest = None, float('nan'), 0
+    return {
+        'volatility_pct': float(vol * 100),
+        'sharpe': float(excess.mean() * ann / vol) if vol > 0 else float('nan'),
+        'sortino': float(excess.mean() * ann / downside) if downside > 0 else float('nan'),
+        'beta': float(port.cov(spy) / var_spy) if var_spy > 0 else float('nan'),
+        'correlation': float(port.corr(spy)) if len(rets) > 2 else float('nan'),
+        'max_drawdown_pct': max_dd,
+        'max_drawdown_date': trough,
+        'longest_drawdown_sessions': longest,
+        'current_drawdown_pct': float(dd['Drawdown_%'].iloc[-1]) if len(dd) else float('nan'),
+    }
+
+
+def compute_risk(history_df, window=ROLLING_WINDOW, risk_free=RISK_FREE_RATE):
+    """
+    Everything the risk panels need from one history frame:
+    {'summary': dict, 'rolling': frame, 'drawdown': frame, 'returns': frame}.
+    """
+    rets = daily_returns(history_df)
+    if rets.empty:
+        return {'summary': {}, 'rolling': pd.DataFrame(), 'drawdown': pd.DataFrame(), 'returns': rets}
+    ann = periods_per_year(rets.index)
+    return {
+        'summary': risk_summary(rets, risk_free, ann),
+        'rolling': rolling_risk(rets, window, ann),
+        'drawdown': drawdowns(rets),
+        'returns': rets,
+    }
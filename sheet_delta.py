@@ -0,0 +1,118 @@
+"""
+Sheet Delta Writes
+Diffs an edited transactions DataFrame against the version that was loaded and
+turns the difference into ONE spreadsheets.batchUpdate: changed rows are
+rewritten in place, deleted rows removed, new rows appended. The batch is applied
+atomically by the Sheets API, so a failure can't leave the tab half-cleared.
+"""
+
+import json
+
+import pandas as pd
+
+TRANSACTION_HEADERS = ["Date", "Ticker", "Type", "Quantity", "Price"]
+# Column -> number format applied with the values (Quantity 4dp, Price 2dp)
+NUMBER_FORMATS = {3: "0.0000", 4: "0.00"}
+
+
+def transaction_rows(df):
+    """Sheet values for each row, formatted as the full rewrite always wrote them."""
+    rows = []
+    for d, ticker, trans_type, qty, price in zip(df['Date'], df['Ticker'], df['Type'], df['Quantity'], df['Price']):
+        if isinstance(d, pd.Timestamp):
+            d = d.strftime('%Y-%m-%d')
+        else:
+            d = str(d)
+        rows.append([d, str(ticker), str(trans_type), float(qty), float(price)])
+    return rows
+
+
+def _same(a, b):
+    # NaN != NaN, but an untouched empty cell is not a change
+    if isinstance(a, float) and isinstance(b, float) and a != a and b != b:
+        return True
+    return a == b
+
+
+def diff_transactions(original_df, edited_df):
+    """
+    Compares by index label: st.data_editor keeps the loaded labels (0..n-1 = sheet rows 2..n+1)
+    for surviving rows and gives new labels to added ones.
+    Returns {'updated': [(label, row)], 'deleted': [labels], 'appended': [rows]}, or None when the
+    original isn't a plain 0..n-1 frame and positions can't be trusted.
+    """
+    if not isinstance(original_df.index, pd.RangeIndex) or original_df.index.start != 0 or original_df.index.step != 1:
+        return None
+    old_rows = dict(zip(original_df.index, transaction_rows(original_df)))
+    new_rows = dict(zip(edited_df.index, transaction_rows(edited_df)))
+
+    updated = [(label, row) for label, row in new_rows.items()
+               if label in old_rows and not all(_same(a, b) for a, b in zip(row, old_rows[label]))]
+    deleted = sorted(label for label in old_rows if label not in new_rows)
+    appended = [row for label, row in new_rows.items() if label not in old_rows]
+    return {'updated': updated, 'deleted': deleted, 'appended': appended}
+
+
+def _cell(col, value):
+    if isinstance(value, float):
+        if value != value:
+            cell = {'userEnteredValue': {'stringValue': ''}}
+        else:
+            cell = {'userEnteredValue': {'numberValue': value}}
+        if col in NUMBER_FORMATS:
+            cell['userEnteredFormat'] = {'numberFormat': {'type': 'NUMBER', 'pattern': NUMBER_FORMATS[col]}}
+        return cell
+    return {'userEnteredValue': {'stringValue': value}}
+
+
+def _row_data(row):
+    return {'values': [_cell(col, v) for col, v in enumerate(row)]}
+
+
+def build_delta_requests(sheet_id, diff):
+    """
+    batchUpdate requests, in an order that keeps row positions valid:
+    in-place updates first, then deletions bottom-up, then appends.
+    """
+    fields = 'userEnteredValue,userEnteredFormat.numberFormat'
+    requests = []
+    for label, row in diff['updated']:
+        requests.append({'updateCells': {
+            'start': {'sheetId': sheet_id, 'rowIndex': int(label) + 1, 'columnIndex': 0},
+            'rows': [_row_data(row)],
+            'fields': fields,
+        }})
+    # Merge consecutive deleted labels into ranges, highest first
+    ranges = []
+    for label in sorted(diff['deleted'], reverse=True):
+        if ranges and ranges[-1][0] == label + 1:
+            ranges[-1][0] = label
+        else:
+            ranges.append([label, label])
+    for first, last in ranges:
+        requests.append({'deleteDimension': {'range': {
+            'sheetId': sheet_id, 'dimension': 'ROWS', 'startIndex': int(first) + 1, 'endIndex': int(last) + 2,
+        }}})
+    if diff['appended']:
+        requests.append({'appendCells': {
+            'sheetId': sheet_id,
+            'rows': [_row_data(row) for row in diff['appended']],
+            'fields': fields,
+        }})
+    return requests
+
+
+def full_rewrite_payload(df, sheet_id):
+    """What the old clear + rewrite + reformat path sent, for payload comparisons."""
+    values = [TRANSACTION_HEADERS] + transaction_rows(df)
+    formats = [{'repeatCell': {
+        'range': {'sheetId': sheet_id, 'startColumnIndex': col, 'endColumnIndex': col + 1, 'startRowIndex': 1},
+        'cell': {'userEnteredFormat': {'numberFormat': {'type': 'NUMBER', 'pattern': pattern}}},
+        'fields': 'userEnteredFormat.numberFormat',
+    }} for col, pattern in NUMBER_FORMATS.items()]
+    return [{}, {'range': 'A1', 'values': values}, {'requests': formats}]
+
+
+def payload_bytes(payload):
+    """Size of a request body as JSON, the way it goes over the wire."""
+    return len(json.dumps(payload, default=str).encode())
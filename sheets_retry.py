@@ -0,0 +1,41 @@
+"""
+Sheets Retry
+Exponential backoff for Google Sheets calls that hit rate limits (429) or
+transient server errors (5xx). Anything else is raised immediately.
+Non-idempotent writes (appends, row deletes) pass retry_status=RATE_LIMIT_STATUS:
+a 5xx may come back after the write was applied, and retrying it would apply it twice.
+"""
+
+import random
+import time
+
+from gspread.exceptions import APIError
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+RATE_LIMIT_STATUS = {429}  # rejected before anything was applied
+
+
+def is_retryable(error, retry_status=RETRYABLE_STATUS):
+    if not isinstance(error, APIError):
+        return False
+    status = getattr(getattr(error, 'response', None), 'status_code', None)
+    return status in retry_status
+
+
+def call_with_backoff(func, *args, retries=4, base_delay=1.0, max_delay=32.0, on_retry=None, sleep=time.sleep,
+                      retry_status=RETRYABLE_STATUS, **kwargs):
+    """
+    Calls func(*args, **kwargs), retrying APIErrors with a status in `retry_status` up to
+    `retries` times with exponential backoff plus jitter (base_delay * 2**attempt, capped
+    at max_delay). on_retry(attempt, error, delay) is called before each sleep.
+    """
+    for attempt in range(retries + 1):
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            if attempt == retries or not is_retryable(e, retry_status):
+                raise
+            delay = min(max_delay, base_delay * 2 ** attempt) * random.uniform(0.5, 1.0)
+            if on_retry:
+                on_retry(attempt + 1, e, delay)
+            sleep(delay)
@@ -0,0 +1,141 @@
+"""
+Per-User Cache
+Process-wide cache of derived per-user data (parsed transactions, ledger,
+history), keyed by user and a content fingerprint of the ledger. A write by one
+user invalidates only that user's entries, instead of st.cache_data.clear()
+sending every user on the server back to a cold start. Sheet reads themselves
+are gated on a cheap revision marker (get_revisioned), so unchanged reruns make
+no Sheets read at all.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+DEFAULT_MAX_ENTRIES = 512
+REVISION_CHECK_SECONDS = float(os.getenv('REVISION_CHECK_SECONDS', 30))
+
+
+def ledger_fingerprint(data):
+    """Stable content hash of a transactions DataFrame or of the raw sheet records."""
+    h = hashlib.sha1()
+    if isinstance(data, pd.DataFrame):
+        h.update(','.join(map(str, data.columns)).encode())
+        h.update(pd.util.hash_pandas_object(data, index=True).values.tobytes())
+    else:
+        h.update(json.dumps(data, sort_keys=True, default=str).encode())
+    return h.hexdigest()[:16]
+
+
+class UserCache:
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # (user, kind, fingerprint, extra) -> (value, expires_at)
+        self._revisioned = {}  # (user, kind) -> [value, revision, checked_at]
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.revision_checks = 0
+        self.revision_skips = 0
+        self.loads = 0
+
+    def get_or_compute(self, user, kind, fingerprint, compute, extra=(), ttl_seconds=None):
+        """
+        Returns the cached value for (user, kind, fingerprint, extra), computing it on a miss.
+        ttl_seconds: optional expiry for values that also depend on time (e.g. history up to today).
+        """
+        key = (user, kind, fingerprint, tuple(extra))
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[1] is None or entry[1] > now):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        value = compute()
+        with self._lock:
+            self._entries[key] = (value, now + ttl_seconds if ttl_seconds else None)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def get_revisioned(self, user, kind, get_revision, load, check_interval=REVISION_CHECK_SECONDS):
+        """
+        Returns the last loaded value while the source's revision marker is unchanged.
+        Within check_interval of the last check nothing is called at all; after that one
+        get_revision() call decides between the cached value and a fresh load().
+        """
+        key = (user, kind)
+        now = time.time()
+        with self._lock:
+            entry = self._revisioned.get(key)
+            if entry is not None and now - entry[2] < check_interval:
+                self.hits += 1
+                return entry[0]
+        try:
+            revision = get_revision()
+        except Exception as e:
+            print(f"Revision check failed for {user}/{kind}: {e}")
+            revision = None
+        with self._lock:
+            self.revision_checks += 1
+            entry = self._revisioned.get(key)
+            if entry is not None and revision is not None and revision == entry[1]:
+                entry[2] = now
+                self.revision_skips += 1
+                return entry[0]
+            self.misses += 1
+
+        value = load()
+        with self._lock:
+            self.loads += 1
+            self._revisioned[key] = [value, revision, now]
+        return value
+
+    def invalidate_user(self, user, kind=None):
+        """Drops one user's entries (optionally only one kind); other users keep theirs."""
+        with self._lock:
+            stale = [k for k in self._entries if k[0] == user and (kind is None or k[1] == kind)]
+            for k in stale:
+                del self._entries[k]
+            for k in [k for k in self._revisioned if k[0] == user and (kind is None or k[1] == kind)]:
+                del self._revisioned[k]
+            self.invalidations += 1
+            return len(stale)
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'users': len({k[0] for k in self._entries}),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total, 3) if total else None,
+                'invalidations': self.invalidations,
+                'revision_checks': self.revision_checks,
+                'revision_skips': self.revision_skips,
+                'loads': self.loads,
+            }
+
+
+# --- Process-wide cache (shared by every session) ---
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_user_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = UserCache()
+        return _cache
@@ -0,0 +1,102 @@
+"""
+User Index
+In-memory dict of the Users sheet keyed by username, so login and sign-up are
+dictionary lookups instead of downloading and scanning the whole table. The
+table is only re-read when the spreadsheet's revision (last update time) changes;
+the revision itself is checked at most every `check_interval` seconds.
+"""
+
+import hmac
+import os
+import threading
+import time
+
+USER_INDEX_CHECK_SECONDS = float(os.getenv('USER_INDEX_CHECK_SECONDS', 30))
+
+
+class UserIndex:
+    def __init__(self, load_records, get_revision, check_interval=USER_INDEX_CHECK_SECONDS):
+        """
+        load_records: callable() -> list of user dicts (worksheet.get_all_records())
+        get_revision: callable() -> opaque value that changes whenever the sheet changes
+        """
+        self._load = load_records
+        self._get_revision = get_revision
+        self.check_interval = check_interval
+        self._users = None
+        self._revision = None
+        self._checked_at = 0.0
+        self._lock = threading.RLock()
+        self.reloads = 0
+        self.revision_checks = 0
+        self.lookups = 0
+
+    def _refresh(self, force=False):
+        now = time.time()
+        if self._users is not None and not force and now - self._checked_at < self.check_interval:
+            return
+        try:
+            revision = self._get_revision()
+            self.revision_checks += 1
+        except Exception as e:
+            print(f"User index revision check failed: {e}")
+            revision = None
+        self._checked_at = now
+        if self._users is not None and revision is not None and revision == self._revision:
+            return
+        users = {}
+        for record in self._load():
+            # First row wins for duplicate usernames, as with the old top-down scan
+            users.setdefault(str(record.get('Username')), record)
+        self._users = users
+        self._revision = revision
+        self.reloads += 1
+
+    def get(self, username):
+        """The user's record or None. A miss re-checks the revision once (user may have just signed up)."""
+        username = str(username)
+        with self._lock:
+            self.lookups += 1
+            self._refresh()
+            record = self._users.get(username)
+            if record is None:
+                self._refresh(force=True)
+                record = self._users.get(username)
+            return record
+
+    def authenticate(self, username, password):
+        """Returns the user's record if the password matches, else None."""
+        record = self.get(username)
+        if record is None:
+            return None
+        if not hmac.compare_digest(str(record.get('Password')), str(password)):
+            # The password may have been changed in the sheet since we loaded it
+            with self._lock:
+                self._refresh(force=True)
+                record = self._users.get(str(username))
+            if record is None or not hmac.compare_digest(str(record.get('Password')), str(password)):
+                return None
+        return record
+
+    def exists(self, username):
+        return self.get(username) is not None
+
+    def add(self, record):
+        """Records a user we just appended, so it is visible without a reload."""
+        with self._lock:
+            if self._users is not None:
+                self._users.setdefault(str(record.get('Username')), record)
+
+    def invalidate(self):
+        with self._lock:
+            self._users = None
+            self._revision = None
+
+    def stats(self):
+        with self._lock:
+            return {
+                'users': len(self._users) if self._users is not None else None,
+                'lookups': self.lookups,
+                'reloads': self.reloads,
+                'revision_checks': self.revision_checks,
+            }
@@ -0,0 +1,205 @@
+"""
+Write-Behind Queue
+Appends are accepted immediately and written by one background thread in
+batched append_rows calls (one per worksheet per flush), so adding 30 rows costs
+one API call instead of 30 and never blocks the UI. Rows for a worksheet are
+written strictly in the order they were queued: a batch that is rate limited
+stays at the head of its queue and is retried before anything behind it. Appends
+are not idempotent, so a batch that fails any other way (a 5xx may arrive after
+the rows were written) is parked in `failed` for the UI to show rather than
+being sent again.
+"""
+
+import atexit
+import os
+import threading
+import time
+
+from sheets_retry import call_with_backoff, is_retryable, RATE_LIMIT_STATUS
+
+WRITE_FLUSH_DELAY = float(os.getenv('WRITE_FLUSH_DELAY', 0.5))
+WRITE_RETRY_SECONDS = 30
+MAX_BATCH_ROWS = 1000
+
+
+def worksheet_key(ws):
+    """(spreadsheet id, sheet id): stable across re-fetched handles of the same tab."""
+    sh = getattr(ws, 'spreadsheet', None)
+    return (getattr(sh, 'id', None), ws.id)
+
+
+class WriteBehindQueue:
+    def __init__(self, flush_delay=WRITE_FLUSH_DELAY, retry_seconds=WRITE_RETRY_SECONDS,
+                 max_batch=MAX_BATCH_ROWS, on_flush=None):
+        """
+        flush_delay: how long to collect appends before writing (coalesces bursts into one call)
+        retry_seconds: wait before re-trying a batch that is still rate limited after its backoff retries
+        on_flush: optional callable(worksheet, rows) run once rows are in the sheet (e.g. cache invalidation)
+        """
+        self.flush_delay = flush_delay
+        self.retry_seconds = retry_seconds
+        self.max_batch = max_batch
+        self.on_flush = on_flush
+        self._queues = {}    # key -> {'ws': worksheet, 'rows': [...], 'retry_at': ts or None}
+        self._failed = {}    # key -> [(row, error)]
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # one writer at a time keeps per-sheet order
+        self._wake = threading.Event()
+        self._thread = None
+        self.enqueued = 0
+        self.written = 0
+        self.batches = 0
+        self.retries = 0
+        self.failed_rows = 0
+
+    # --- Producer side (UI) ---
+    def enqueue(self, ws, rows):
+        """Queues rows for ws and returns immediately; returns the number of rows queued."""
+        rows = [list(r) for r in rows]
+        if not rows:
+            return 0
+        with self._lock:
+            entry = self._queues.setdefault(worksheet_key(ws), {'ws': ws, 'rows': [], 'retry_at': None})
+            entry['ws'] = ws
+            entry['rows'].extend(rows)
+            self.enqueued += len(rows)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name='write-behind', daemon=True)
+                self._thread.start()
+        self._wake.set()
+        return len(rows)
+
+    def pending(self, ws):
+        """Rows queued for ws but not yet written, in order (for optimistic display)."""
+        with self._lock:
+            entry = self._queues.get(worksheet_key(ws))
+            return [list(r) for r in entry['rows']] if entry else []
+
+    def failed(self, ws):
+        """[(row, error)] rejected for ws."""
+        with self._lock:
+            return list(self._failed.get(worksheet_key(ws), []))
+
+    def requeue_failed(self, ws):
+        """Puts ws's rejected rows back in the queue (e.g. after the user fixed the tab)."""
+        with self._lock:
+            rows = [row for row, _ in self._failed.pop(worksheet_key(ws), [])]
+        return self.enqueue(ws, rows)
+
+    def discard_failed(self, ws):
+        with self._lock:
+            return len(self._failed.pop(worksheet_key(ws), []))
+
+    # --- Writer side ---
+    def _flush_key(self, key):
+        """Writes the head batch for key. Returns True if it was written."""
+        with self._lock:
+            entry = self._queues.get(key)
+            if not entry or not entry['rows']:
+                return True
+            ws, batch = entry['ws'], list(entry['rows'][:self.max_batch])
+
+        def on_retry(attempt, error, delay):
+            with self._lock:
+                self.retries += 1
+            print(f"Write-behind append to {ws.title} retry {attempt} in {delay:.1f}s: {error}")
+
+        try:
+            call_with_backoff(ws.append_rows, batch, on_retry=on_retry, retry_status=RATE_LIMIT_STATUS)
+        except Exception as e:
+            with self._lock:
+                if is_retryable(e, RATE_LIMIT_STATUS):
+                    # Keep the batch at the head so nothing behind it overtakes it
+                    entry['retry_at'] = time.time() + self.retry_seconds
+                else:
+                    del entry['rows'][:len(batch)]
+                    self._failed.setdefault(key, []).extend((row, str(e)) for row in batch)
+                    self.failed_rows += len(batch)
+                    if not entry['rows']:
+                        self._queues.pop(key, None)
+            print(f"Write-behind append to {ws.title} failed ({len(batch)} rows): {e}")
+            return False
+
+        with self._lock:
+            del entry['rows'][:len(batch)]
+            entry['retry_at'] = None
+            if not entry['rows']:
+                self._queues.pop(key, None)
+            self.written += len(batch)
+            self.batches += 1
+            # Same critical section as the removal, so pending() and the invalidation change together
+            if self.on_flush is not None:
+                try:
+                    self.on_flush(ws, batch)
+                except Exception as e:
+                    print(f"Write-behind on_flush failed: {e}")
+        return True
+
+    def _flush(self, keys, respect_retry=True):
+        with self._flush_lock:
+            now = time.time()
+            for key in keys:
+                while True:
+                    with self._lock:
+                        entry = self._queues.get(key)
+                        if not entry or not entry['rows']:
+                            break
+                        if respect_retry and entry['retry_at'] and entry['retry_at'] > now:
+                            break
+                    if not self._flush_key(key):
+                        break
+
+    def flush(self, ws=None):
+        """
+        Writes everything queued (for ws, or for every sheet) now, ignoring retry waits.
+        Returns True if nothing is left pending for the target.
+        """
+        with self._lock:
+            keys = [worksheet_key(ws)] if ws is not None else list(self._queues)
+        self._flush(keys, respect_retry=False)
+        with self._lock:
+            return not any(self._queues.get(k, {}).get('rows') for k in keys)
+
+    def _next_wait(self):
+        with self._lock:
+            retry_ats = [e['retry_at'] for e in self._queues.values() if e['rows'] and e['retry_at']]
+        if not retry_ats:
+            return None
+        return max(0.0, min(retry_ats) - time.time())
+
+    def _loop(self):
+        while True:
+            self._wake.wait(self._next_wait())
+            self._wake.clear()
+            # Let a burst of appends (e.g. Build Portfolio) land in the same batch
+            time.sleep(self.flush_delay)
+            with self._lock:
+                keys = list(self._queues)
+            self._flush(keys)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'pending_rows': sum(len(e['rows']) for e in self._queues.values()),
+                'enqueued': self.enqueued,
+                'written': self.written,
+                'batches': self.batches,
+                'retries': self.retries,
+                'failed_rows': self.failed_rows,
+            }
+
+
+# --- Process-wide queue (shared by every session) ---
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_write_queue(on_flush=None):
+    """Returns the process's queue, creating it with `on_flush` on first call (later callbacks are ignored)."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = WriteBehindQueue(on_flush=on_flush)
+            # Best effort: don't lose queued rows on a clean shutdown
+            atexit.register(_queue.flush)
+        return _queue